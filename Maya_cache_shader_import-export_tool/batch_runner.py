@@ -0,0 +1,464 @@
+import os
+import re
+import sys
+import json
+import queue
+import subprocess
+import threading
+import time
+
+import build_manifest
+import maya_config
+from event_channel import EVENTS_ENV, JOB_ID_ENV, EventServer
+from job_supervisor import Activity, QueueState, forward_output, new_process_group, supervise
+from metrics_report import METRICS_ENV, new_batch_metrics_path, summarize
+from reference_plan import plan_references
+from scene_scan import default_index
+from shot_db import iter_project_files
+
+
+MEMORY_PER_JOB_MB = 4096
+OPTIONS_ENV = "MAYA_PIPELINE_OPTIONS"
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_DIR = os.path.join(BASE_DIR, "script")
+RUN_JOB_SCRIPT = os.path.join(SCRIPT_DIR, "run_job.py")
+
+TASKS = {
+    "cache_script.py": "cache",
+    "sharder_export.py": "shader",
+    "cache_sharder_script.py": "build",
+}
+TASK_VARIABLES = {
+    "cache": "scene_path",
+    "shader": "scene_path",
+    "build": "json_path",
+}
+# Tasks that run under mayapy; a headless build saves its lighting scene. With
+# headless=False they open GUI Maya, and a build is left open for the artist.
+HEADLESS_TASKS = ("cache", "shader", "build")
+
+
+def available_memory_mb():
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/meminfo", "r") as f:
+                for line in f:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) // 1024
+        except (OSError, ValueError):
+            return None
+        return None
+
+    if sys.platform == "win32":
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("sullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys // (1024 * 1024)
+    return None
+
+
+def default_worker_count(memory_per_job_mb=MEMORY_PER_JOB_MB):
+    workers = os.cpu_count() or 1
+    memory = available_memory_mb()
+    if memory:
+        workers = min(workers, memory // memory_per_job_mb)
+    return max(1, workers)
+
+
+def find_scene_lits(root):
+    # Every scene_lit.json under root, found by the same crawl as the shot index
+    return sorted(entry.path for entry in iter_project_files(root) if entry.name == "scene_lit.json")
+
+
+def scene_lit_maya_version(json_file):
+    try:
+        with open(json_file, "r") as f:
+            json_data = json.load(f)
+    except Exception as e:
+        print("Failed to read JSON file:", json_file, e)
+        return None
+
+    maya_version = json_data.get("File_info", {}).get("maya_version")
+    match = re.match(r"\d{4}", str(maya_version or ""))
+    return int(match.group(0)) if match else None
+
+
+def get_maya_version(maya_scene_file):
+    if maya_scene_file.lower().endswith(".json"):
+        return scene_lit_maya_version(maya_scene_file)
+    return default_index().maya_version(maya_scene_file)
+
+
+def maya_executable(year):
+    # MAYA_EXECUTABLE points every job at one binary, e.g. a fake maya for testing.
+    override = os.environ.get("MAYA_EXECUTABLE")
+    if override:
+        return override
+    return maya_config.resolve(year).maya
+
+
+def mayapy_executable(year):
+    override = os.environ.get("MAYAPY_EXECUTABLE")
+    if override:
+        return override
+    return maya_config.resolve(year).mayapy
+
+
+def maya_environment(year):
+    # Extra variables from the version's config entry (module paths, licensing...)
+    return maya_config.resolve(year).env
+
+
+def build_batch_command(mayapy_exe, task, value):
+    # mayapy run_job.py <task> <path>: no GUI, exits when the job is done
+    return [mayapy_exe, RUN_JOB_SCRIPT, task, value]
+
+
+def build_maya_command(maya_exe, task, value, quit_when_done=False):
+    # GUI Maya runs the same entry point from -command; repr() keeps any path
+    # a valid Python literal, then it is escaped for the MEL string
+    code = (
+        f"import sys; sys.path.insert(0, {SCRIPT_DIR!r}); import run_job; "
+        f"run_job.run_in_session({task!r}, {value!r}, quit_when_done={quit_when_done})"
+    )
+    mel_code = code.replace("\\", "\\\\").replace('"', '\\"')
+    return [maya_exe, "-command", f'python("{mel_code}")']
+
+
+def print_summary(results, log=print):
+    counts = {JobResult.OK: 0, JobResult.FAILED: 0, JobResult.SKIPPED: 0}
+    for result in results:
+        counts[result.status] += 1
+
+    log("Batch process completed for all files.")
+    log(f"  ok: {counts[JobResult.OK]}  failed: {counts[JobResult.FAILED]}  "
+        f"skipped: {counts[JobResult.SKIPPED]}")
+    for result in results:
+        if result.status != JobResult.OK:
+            log(f"  {result.status.upper()}: {result.file_path} {result.message}")
+
+
+def task_for_script(script_path):
+    return TASKS.get(os.path.basename(script_path))
+
+
+def script_for_task(task):
+    for script_name, script_task in TASKS.items():
+        if script_task == task:
+            return os.path.join(SCRIPT_DIR, script_name)
+    raise ValueError(f"Unknown task: {task}")
+
+
+class BatchJob:
+    def __init__(self, file_path, script_path, var_name=None, options=None, priority=0):
+        self.file_path = file_path
+        self.script_path = script_path
+        self.var_name = var_name or TASK_VARIABLES.get(task_for_script(script_path), "scene_path")
+        self.options = options or {}
+        self.priority = priority
+
+    @classmethod
+    def for_task(cls, task, file_path, options=None, priority=0):
+        return cls(file_path, script_for_task(task), options=options, priority=priority)
+
+    @property
+    def task(self):
+        return task_for_script(self.script_path)
+
+
+class JobResult:
+    OK = "ok"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+    def __init__(self, file_path, status, exit_code=None, message="", duration=0.0, retryable=False, done=None):
+        self.file_path = file_path
+        self.status = status
+        # Whether the outputs exist: jobs that ran and up-to-date skips, not
+        # skips for a missing Maya version or executable
+        self.done = status == self.OK if done is None else done
+        self.exit_code = exit_code
+        self.message = message
+        self.duration = duration
+        self.retryable = retryable
+        self.attempts = 1
+
+    def to_dict(self):
+        return {
+            "file_path": self.file_path,
+            "status": self.status,
+            "exit_code": self.exit_code,
+            "message": self.message,
+            "duration": round(self.duration, 3),
+            "attempts": self.attempts,
+        }
+
+
+def job_environment(job, metrics_path=None, events_address=None):
+    # Variables the Maya-side scripts read: job options (script/job_options.py),
+    # the batch metrics file (script/job_metrics.py) and the event socket
+    # (script/job_events.py)
+    options = job.options
+    if job.task == "cache" and job.options.get("selective_load"):
+        # The reference plan rides along with the options but isn't one: it
+        # is derived from the inputs the manifest already hashes
+        plan = plan_references(job.file_path, job.options.get("load_references"))
+        if plan:
+            options = dict(job.options, reference_plan=plan)
+    env = {OPTIONS_ENV: json.dumps(options, sort_keys=True)}
+    if metrics_path:
+        env[METRICS_ENV] = metrics_path
+    if events_address:
+        env[EVENTS_ENV] = events_address
+        env[JOB_ID_ENV] = job.file_path
+    return env
+
+
+def by_priority(jobs):
+    # (index, job) pairs, highest priority first; equal priorities keep their order
+    return sorted(enumerate(jobs), key=lambda item: -item[1].priority)
+
+
+def start_events(callback, total, workers):
+    # None without a callback; jobs then run without an event socket
+    if not callback:
+        return None
+    server = EventServer(callback)
+    server.dispatch({"event": "batch_start", "total": total, "workers": workers})
+    return server
+
+
+def job_done_event(server, job, result):
+    if server and result:
+        server.dispatch({"event": "job_done", "job": job.file_path, "task": job.task,
+                         "status": result.status, "message": result.message,
+                         "duration": round(result.duration, 3)})
+
+
+def check_up_to_date(job, force=False):
+    # Returns (skipped_result, manifest_record); skipped_result is set when
+    # the outputs are current and force is off.
+    try:
+        up_to_date, record = build_manifest.check(job.task, job.file_path, job.script_path, job.options)
+    except OSError as e:
+        print("Manifest check failed:", job.file_path, e)
+        return None, None
+    if up_to_date and not force:
+        return JobResult(job.file_path, JobResult.SKIPPED, message="up to date", done=True), record
+    return None, record
+
+
+def finish_build(job, record, result):
+    if result.status != JobResult.OK or not record:
+        return
+    try:
+        build_manifest.write_manifest(job.task, job.file_path, record)
+    except OSError as e:
+        print("Manifest write failed:", job.file_path, e)
+
+
+class BatchRunner:
+    def __init__(self, max_workers=None, queue_size=None,
+                 version_resolver=get_maya_version,
+                 executable_resolver=None, force=False, event_callback=None, headless=True,
+                 wall_timeout=None, idle_timeout=None, retries=0, retry_delay=30,
+                 retry_exit_codes=(), state_path=None):
+        self.force = force
+        self.headless = headless
+        self.event_callback = event_callback
+        self.events = None
+        self.wall_timeout = wall_timeout
+        self.idle_timeout = idle_timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.retry_exit_codes = tuple(retry_exit_codes)
+        self.state_path = state_path
+        self.state = None
+        self.dead_letter = []
+        self.activity = Activity()
+        self.metrics_path = None
+        self.report = None
+        self.max_workers = max_workers or default_worker_count()
+        self.queue_size = queue_size or self.max_workers * 2
+        self.version_resolver = version_resolver
+        self.executable_resolver = executable_resolver
+        self._lock = threading.Lock()
+
+    def log(self, *args):
+        with self._lock:
+            print(*args)
+            sys.stdout.flush()
+
+    def prepare(self, job):
+        year = self.version_resolver(job.file_path)
+        if not year:
+            return None, JobResult(job.file_path, JobResult.SKIPPED, message="version not found")
+
+        headless = self.headless and job.task in HEADLESS_TASKS
+        resolver = self.executable_resolver or (mayapy_executable if headless else maya_executable)
+        maya_exe = resolver(year)
+        if not os.path.exists(maya_exe):
+            return None, JobResult(job.file_path, JobResult.SKIPPED, message=f"Maya not found: {maya_exe}")
+
+        if headless:
+            command = build_batch_command(maya_exe, job.task, job.file_path)
+        else:
+            command = build_maya_command(maya_exe, job.task, job.file_path,
+                                         quit_when_done=job.task != "build")
+        return (command, maya_environment(year)), None
+
+    def run_job(self, job):
+        launch, skipped = self.prepare(job)
+        if skipped:
+            return skipped
+
+        skipped, record = check_up_to_date(job, self.force)
+        if skipped:
+            return skipped
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.state:
+                self.state.update(job, "running", attempts=attempt)
+            result = self.launch(job, *launch)
+            result.attempts = attempt
+            if result.status == JobResult.OK or attempt > self.retries or not self.is_retryable(result):
+                break
+            delay = self.retry_delay * 2 ** (attempt - 1)
+            self.log(f"  Retrying in {delay}s ({result.message}): {job.file_path}")
+            time.sleep(delay)
+
+        finish_build(job, record, result)
+        return result
+
+    def launch(self, job, command, maya_env=None):
+        # Output is forwarded line by line; output and job events both count as
+        # activity for the no-output timeout
+        start = time.time()
+        key = job.file_path
+        self.activity.touch(key)
+        try:
+            events_address = self.events.address if self.events else None
+            env = dict(os.environ, **(maya_env or {}))
+            env.update(job_environment(job, self.metrics_path, events_address))
+            process = subprocess.Popen(command, env=env, stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT, **new_process_group())
+        except OSError as e:
+            return JobResult(job.file_path, JobResult.FAILED, message=str(e),
+                             duration=time.time() - start, retryable=True)
+
+        reader = forward_output(process.stdout, self.log, lambda: self.activity.touch(key))
+        exit_code, reason = supervise(process, self.wall_timeout, self.idle_timeout,
+                                      lambda: self.activity.last(key))
+        reader.join(timeout=5)
+        self.activity.forget(key)
+
+        if reason:
+            return JobResult(job.file_path, JobResult.FAILED, exit_code, f"killed: {reason}",
+                             time.time() - start, retryable=True)
+        status = JobResult.OK if exit_code == 0 else JobResult.FAILED
+        message = "" if exit_code == 0 else f"exit code {exit_code}"
+        return JobResult(job.file_path, status, exit_code, message, time.time() - start)
+
+    def is_retryable(self, result):
+        # Timeouts, launch errors, crashes (killed by a signal) and listed exit
+        # codes; a script error fails the same way every time
+        if result.retryable:
+            return True
+        if result.exit_code is not None and result.exit_code < 0:
+            return True
+        return result.exit_code in self.retry_exit_codes
+
+    def handle_event(self, event):
+        if event.get("job"):
+            self.activity.touch(event["job"])
+        if self.event_callback:
+            self.event_callback(event)
+
+    def record_result(self, job, result):
+        if result.status == JobResult.FAILED:
+            self.dead_letter.append(dict(result.to_dict(), task=job.task))
+        if not self.state:
+            return
+        # A job that couldn't start stays pending, so a resumed run tries it again
+        status = result.status if result.done or result.status == JobResult.FAILED else "pending"
+        self.state.update(job, status, attempts=result.attempts, message=result.message)
+        if result.status == JobResult.FAILED:
+            self.state.add_dead_letter(job, result)
+
+    def run(self, jobs):
+        jobs = list(jobs)
+        total = len(jobs)
+        results = [None] * total
+        pending = queue.Queue(maxsize=self.queue_size)
+        self.metrics_path = new_batch_metrics_path()
+        self.dead_letter = []
+        self.state = QueueState(self.state_path) if self.state_path else None
+        workers = min(self.max_workers, total) or 1
+
+        self.log(f"Starting batch process for {total} file(s) with {workers} worker(s)...\n")
+        if self.event_callback or self.idle_timeout:
+            self.events = start_events(self.handle_event, total, workers)
+
+        def worker():
+            while True:
+                item = pending.get()
+                if item is None:
+                    break
+                idx, job = item
+                if self.state and self.state.is_done(job):
+                    result = JobResult(job.file_path, JobResult.SKIPPED, message="done in an earlier run",
+                                       done=True)
+                else:
+                    self.log(f"[{idx + 1}/{total}] Processing: {job.file_path}")
+                    result = self.run_job(job)
+                    self.record_result(job, result)
+                results[idx] = result
+                job_done_event(self.events, job, result)
+                if result.status == JobResult.SKIPPED:
+                    self.log(f"   Skipping ({result.message}): {job.file_path}\n")
+                else:
+                    self.log(f"  Finished ({result.status}): {job.file_path}\n")
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+
+        # put() blocks while the queue is full, so at most queue_size jobs wait at once
+        for item in by_priority(jobs):
+            pending.put(item)
+        for _ in threads:
+            pending.put(None)
+        for thread in threads:
+            thread.join()
+        if self.events:
+            self.events.close()
+            self.events = None
+
+        self.print_summary(results)
+        if self.dead_letter:
+            self.log(f"Dead letter: {len(self.dead_letter)} job(s) failed after retries")
+            for entry in self.dead_letter:
+                self.log(f"   {entry['task']}: {entry['file_path']} ({entry['message']})")
+        self.report = summarize(self.metrics_path, self.log)
+        return results
+
+    def print_summary(self, results):
+        print_summary(results, self.log)
@@ -0,0 +1,727 @@
+import os
+import sys
+import json
+import types
+import shlex
+import fnmatch
+from collections import Counter
+
+
+# In-memory stand-in for maya.cmds / maya.mel with enough of both to run the
+# pipeline scripts end to end. Scene, shader and Alembic files written here are
+# JSON, so only this module reads them back. Short names are assumed unique,
+# which the scene generator guarantees; nested references are not loaded.
+
+FORMAT = "fake_maya/1"
+
+INHERITED_TYPES = {
+    "transform": ["dagNode", "transform"],
+    "parentConstraint": ["dagNode", "transform", "constraint", "parentConstraint"],
+    "mesh": ["dagNode", "shape", "surfaceShape", "mesh"],
+    "nurbsCurve": ["dagNode", "shape", "nurbsCurve"],
+    "camera": ["dagNode", "shape", "camera"],
+    "gpuCache": ["dagNode", "shape", "gpuCache"],
+    "lambert": ["shadingDependNode", "lambert"],
+    "blinn": ["shadingDependNode", "lambert", "reflect", "blinn"],
+    "file": ["shadingDependNode", "texture2d", "file"],
+    "shadingEngine": ["entity", "objectSet", "shadingEngine"],
+    "objectSet": ["entity", "objectSet"],
+}
+MATERIAL_FILTER = "lsThroughFilter DefaultShadingGroupsAndMaterialsFilter;"
+
+CMDS_COMMANDS = (
+    "AbcExport", "about", "bakeResults", "createNode", "currentTime", "currentUnit", "delete",
+    "editRenderLayerGlobals", "error", "evalDeferred", "evaluationManager", "file", "fileInfo",
+    "getAttr", "getPanel", "listAttr", "listCameras", "listConnections", "listHistory",
+    "listRelatives", "loadPlugin", "ls", "modelEditor", "nodeType", "objExists", "pickWalk",
+    "playbackOptions", "pluginInfo", "quit", "referenceQuery", "refresh", "scriptJob", "select",
+    "setAttr", "sets",
+)
+
+
+def inherited_types(node_type):
+    return INHERITED_TYPES.get(node_type, [node_type])
+
+
+def is_dag(node_type):
+    return "dagNode" in inherited_types(node_type)
+
+
+def _flag(kwargs, *names, default=None):
+    # Maya flags come in long and short form; the first one given wins
+    for name in names:
+        if name in kwargs:
+            return kwargs[name]
+    return default
+
+
+def _names(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    return [value]
+
+
+def _unique(items):
+    seen = set()
+    return [item for item in items if not (item in seen or seen.add(item))]
+
+
+def write_file(path, data):
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    with open(path, "w") as f:
+        json.dump(dict(data, format=FORMAT), f)
+
+
+def read_file(path):
+    with open(path, "r") as f:
+        data = json.load(f)
+    if data.get("format") != FORMAT:
+        raise RuntimeError(f"Not a fake_maya file: {path}")
+    return data
+
+
+class Scene:
+    def __init__(self, path=""):
+        self.path = path
+        self.nodes = {}
+        self.children = {}
+        self.incoming = {}
+        self.outgoing = {}
+        self.members = {}
+        self.memberships = {}
+        self.references = {}
+        self.file_info = {}
+        self.playback = [1.0, 120.0]
+        self.time_unit = "film"
+        self.current_time = 1.0
+        self.selection = []
+
+    # nodes
+
+    def add_node(self, name, node_type, parent=None, attrs=None, reference=None):
+        if name in self.nodes:
+            raise RuntimeError(f"Node already exists: {name}")
+        if parent is not None and parent not in self.nodes:
+            raise RuntimeError(f"No object matches name: {parent}")
+        self.nodes[name] = {"type": node_type, "parent": parent, "attrs": dict(attrs or {}),
+                            "reference": reference}
+        self.children[name] = []
+        if parent is not None:
+            self.children[parent].append(name)
+        if reference:
+            self.references[reference]["nodes"].append(name)
+        return name
+
+    def unique_name(self, name):
+        if name not in self.nodes:
+            return name
+        base = name.rstrip("0123456789")
+        index = 1
+        while f"{base}{index}" in self.nodes:
+            index += 1
+        return f"{base}{index}"
+
+    def remove_node(self, name):
+        for child in list(self.children.get(name, [])):
+            self.remove_node(child)
+        node = self.nodes.pop(name)
+        self.children.pop(name, None)
+        if node["parent"] is not None:
+            self.children[node["parent"]].remove(name)
+        for plug, source in self.incoming.pop(name, []):
+            self.outgoing[source.split(".", 1)[0]].remove((source, plug))
+        for plug, destination in self.outgoing.pop(name, []):
+            self.incoming[destination.split(".", 1)[0]].remove((destination, plug))
+        for object_set in self.memberships.pop(name, []):
+            self.members[object_set].remove(name)
+        for member in self.members.pop(name, []):
+            self.memberships[member].remove(name)
+        if node["reference"] in self.references:
+            self.references[node["reference"]]["nodes"].remove(name)
+        if name in self.selection:
+            self.selection.remove(name)
+
+    def resolve(self, name):
+        # Short name, long name or plug to the node's short name; None if missing
+        if not isinstance(name, str):
+            return None
+        name = name.split(".", 1)[0].rsplit("|", 1)[-1]
+        return name if name in self.nodes else None
+
+    def require(self, name):
+        node = self.resolve(name)
+        if node is None:
+            raise RuntimeError(f"No object matches name: {name}")
+        return node
+
+    def long_name(self, name):
+        if not is_dag(self.nodes[name]["type"]):
+            return name
+        parts = []
+        while name is not None:
+            parts.append(name)
+            name = self.nodes[name]["parent"]
+        return "|" + "|".join(reversed(parts))
+
+    def descendants(self, name):
+        result = []
+        pending = list(reversed(self.children[name]))
+        while pending:
+            child = pending.pop()
+            result.append(child)
+            pending.extend(reversed(self.children[child]))
+        return result
+
+    # connections and sets
+
+    def connect(self, source, destination):
+        source_node, destination_node = self.require(source), self.require(destination)
+        self.outgoing.setdefault(source_node, []).append((source, destination))
+        self.incoming.setdefault(destination_node, []).append((destination, source))
+
+    def add_member(self, object_set, member):
+        if member not in self.members.setdefault(object_set, []):
+            self.members[object_set].append(member)
+            self.memberships.setdefault(member, []).append(object_set)
+
+    def remove_member(self, object_set, member):
+        if member in self.members.get(object_set, []):
+            self.members[object_set].remove(member)
+            self.memberships[member].remove(object_set)
+
+    def connections(self, name, source=True, destination=True):
+        # (own plug, other plug) pairs; set membership shows up as
+        # member.instObjGroups[0] -> set.dagSetMembers[i] like in Maya
+        result = []
+        if source:
+            result.extend(self.incoming.get(name, []))
+            result.extend((f"{name}.dagSetMembers[{index}]", f"{member}.instObjGroups[0]")
+                          for index, member in enumerate(self.members.get(name, [])))
+        if destination:
+            result.extend(self.outgoing.get(name, []))
+            result.extend((f"{name}.instObjGroups[0]",
+                           f"{object_set}.dagSetMembers[{self.members[object_set].index(name)}]")
+                          for object_set in self.memberships.get(name, []))
+        return result
+
+    def history(self, names):
+        result = _unique(names)
+        seen = set(result)
+        pending = list(result)
+        while pending:
+            name = pending.pop()
+            for _, other in self.connections(name, source=True, destination=False):
+                node = other.split(".", 1)[0]
+                if node not in seen:
+                    seen.add(node)
+                    result.append(node)
+                    pending.append(node)
+        return result
+
+    # files
+
+    def snapshot(self, names):
+        names = set(names)
+        nodes = [[name, node["type"], node["parent"] if node["parent"] in names else None, node["attrs"]]
+                 for name, node in self.nodes.items() if name in names]
+        connections = [[source, destination] for name in self.nodes if name in names
+                       for destination, source in self.incoming.get(name, [])
+                       if source.split(".", 1)[0] in names]
+        sets = {object_set: [member for member in members if member in names]
+                for object_set, members in self.members.items() if object_set in names}
+        return {"nodes": nodes, "connections": connections, "sets": sets}
+
+    def save_data(self):
+        local = [name for name, node in self.nodes.items() if not node["reference"]]
+        data = self.snapshot(local)
+        data.update({
+            "references": [{"file": ref["path"], "namespace": ref["namespace"], "loaded": ref["loaded"]}
+                           for ref in self.references.values()],
+            "file_info": self.file_info,
+            "playback": self.playback,
+            "time_unit": self.time_unit,
+        })
+        return data
+
+    def add_data(self, data, namespace=None, reference=None):
+        def prefix(name):
+            return f"{namespace}:{name}" if namespace and name is not None else name
+
+        created = []
+        for name, node_type, parent, attrs in data.get("nodes", []):
+            created.append(self.add_node(prefix(name), node_type, prefix(parent), attrs, reference))
+        for source, destination in data.get("connections", []):
+            self.connect(prefix(source), prefix(destination))
+        for object_set, members in data.get("sets", {}).items():
+            for member in members:
+                self.add_member(prefix(object_set), prefix(member))
+        return created
+
+    def add_reference(self, path, namespace, loaded=True):
+        copies = sum(1 for ref in self.references.values() if ref["path"] == path)
+        file_name = f"{path}{{{copies}}}" if copies else path
+        reference = self.unique_name(f"{namespace}RN")
+        self.nodes[reference] = {"type": "reference", "parent": None, "attrs": {}, "reference": None}
+        self.children[reference] = []
+        self.references[reference] = {"path": path, "file": file_name, "namespace": namespace,
+                                      "loaded": False, "nodes": []}
+        if loaded:
+            self.load_reference(reference)
+        return reference
+
+    def load_reference(self, reference):
+        ref = self.references[reference]
+        if not ref["loaded"]:
+            self.add_data(read_file(ref["path"]), ref["namespace"], reference)
+            ref["loaded"] = True
+
+    def unload_reference(self, reference):
+        ref = self.references[reference]
+        for name in list(ref["nodes"]):
+            if name in self.nodes:
+                self.remove_node(name)
+        ref["loaded"] = False
+
+    def replace_reference(self, reference, path):
+        # Reference edits are not kept; the pipeline reassigns shaders itself
+        ref = self.references[reference]
+        loaded = ref["loaded"]
+        self.unload_reference(reference)
+        copies = sum(1 for other in self.references.values() if other is not ref and other["path"] == path)
+        ref["path"], ref["file"] = path, f"{path}{{{copies}}}" if copies else path
+        if loaded:
+            self.load_reference(reference)
+
+    def remove_reference(self, reference):
+        self.unload_reference(reference)
+        del self.references[reference]
+        self.nodes.pop(reference, None)
+        self.children.pop(reference, None)
+
+    def find_reference(self, name):
+        # Reference node, reference file (with or without a copy number) or referenced node
+        if name in self.references:
+            return name
+        for reference, ref in self.references.items():
+            if name in (ref["file"], ref["path"]):
+                return reference
+        node = self.resolve(name)
+        if node is not None and self.nodes[node]["reference"]:
+            return self.nodes[node]["reference"]
+        return None
+
+
+class FakeMaya:
+    def __init__(self, version="2023"):
+        self.version = version
+        self.scene = Scene()
+        self.calls = Counter()
+        self.plugins = set()
+        self.evaluation_mode = "parallel"
+        # mayapy; False stands in for an interactive session with panels
+        self.batch = True
+        self.deferred = []
+        self._script_jobs = 0
+
+    def reset(self):
+        self.scene = Scene()
+        self.calls.clear()
+        self.deferred = []
+
+    # module plumbing
+
+    def command(self, name, module="cmds"):
+        method = getattr(self, "mel_" + name if module == "mel" else name)
+        calls = self.calls
+        key = f"{module}.{name}"
+
+        def wrapper(*args, **kwargs):
+            calls[key] += 1
+            return method(*args, **kwargs)
+
+        wrapper.__name__ = name
+        return wrapper
+
+    def modules(self):
+        package = types.ModuleType("maya")
+        package.__path__ = []
+        cmds = types.ModuleType("maya.cmds")
+        for name in CMDS_COMMANDS:
+            setattr(cmds, name, self.command(name))
+        mel = types.ModuleType("maya.mel")
+        mel.eval = self.command("eval", "mel")
+        standalone = types.ModuleType("maya.standalone")
+        standalone.initialize = lambda name=None: None
+        standalone.uninitialize = lambda: None
+        package.cmds, package.mel, package.standalone = cmds, mel, standalone
+        return {"maya": package, "maya.cmds": cmds, "maya.mel": mel, "maya.standalone": standalone}
+
+    # cmds
+
+    def AbcExport(self, j=None, **kwargs):
+        for job in _names(j or _flag(kwargs, "jobArg")):
+            args = shlex.split(job)
+            roots, path, strip = [], None, False
+            for index, arg in enumerate(args):
+                if arg == "-root":
+                    roots.append(args[index + 1])
+                elif arg == "-file":
+                    path = args[index + 1]
+                elif arg == "-stripNamespaces":
+                    strip = True
+            if not path:
+                raise RuntimeError("AbcExport: no -file given")
+            names = []
+            for root in roots:
+                node = self.scene.require(root)
+                names += [node] + self.scene.descendants(node)
+            data = self.scene.snapshot(names)
+            # Roots become top-level nodes in the cache
+            rename = (lambda name: name.rsplit(":", 1)[-1] if name else name) if strip else (lambda name: name)
+            data = {"nodes": [[rename(name), node_type, rename(parent), attrs]
+                              for name, node_type, parent, attrs in data["nodes"]]}
+            write_file(path, data)
+
+    def about(self, version=False, **kwargs):
+        if version:
+            return self.version
+        if _flag(kwargs, "batch", "b"):
+            return self.batch
+        return None
+
+    def bakeResults(self, nodes=None, **kwargs):
+        for node in _names(nodes):
+            self.scene.require(node)
+        return len(_names(nodes))
+
+    def createNode(self, node_type, n=None, p=None, **kwargs):
+        name = self.scene.unique_name(n or _flag(kwargs, "name") or node_type + "1")
+        parent = _flag(kwargs, "parent", default=p)
+        return self.scene.add_node(name, node_type, self.scene.require(parent) if parent else None)
+
+    def currentTime(self, time=None, q=False, **kwargs):
+        if q or _flag(kwargs, "query"):
+            return self.scene.current_time
+        self.scene.current_time = time
+        return time
+
+    def currentUnit(self, q=False, time=None, **kwargs):
+        if q or _flag(kwargs, "query"):
+            return self.scene.time_unit
+        if time:
+            self.scene.time_unit = time
+
+    def delete(self, nodes=None, **kwargs):
+        for name in _names(nodes) or list(self.scene.selection):
+            node = self.scene.resolve(name)
+            if node is not None:
+                self.scene.remove_node(node)
+
+    def editRenderLayerGlobals(self, **kwargs):
+        return None
+
+    def error(self, message):
+        raise RuntimeError(message)
+
+    def evalDeferred(self, command, **kwargs):
+        self.deferred.append(command)
+
+    def evaluationManager(self, q=False, mode=None, **kwargs):
+        if q or _flag(kwargs, "query"):
+            return [self.evaluation_mode]
+        if mode:
+            self.evaluation_mode = mode
+
+    def file(self, path=None, **kwargs):
+        scene = self.scene
+        if _flag(kwargs, "q", "query"):
+            if _flag(kwargs, "sn", "sceneName"):
+                return scene.path
+            if _flag(kwargs, "r", "reference"):
+                return [ref["file"] for ref in scene.references.values()]
+            raise RuntimeError("fake_maya: unsupported file query")
+        if _flag(kwargs, "new"):
+            self.scene = Scene()
+            return ""
+        if _flag(kwargs, "o", "open"):
+            data = read_file(path)
+            self.scene = scene = Scene(path)
+            scene.add_data(data)
+            scene.file_info = dict(data.get("file_info", {}))
+            scene.playback = list(data.get("playback", scene.playback))
+            scene.time_unit = data.get("time_unit", scene.time_unit)
+            load = _flag(kwargs, "lrd", "loadReferenceDepth", default="all") != "none"
+            for ref in data.get("references", []):
+                scene.add_reference(ref["file"], ref["namespace"], loaded=load and ref.get("loaded", True))
+            return path
+        reference = _flag(kwargs, "lr", "loadReference")
+        if reference:
+            node = scene.find_reference(reference)
+            if node is None:
+                raise RuntimeError(f"Reference not found: {reference}")
+            if path:
+                scene.replace_reference(node, path)
+            else:
+                scene.load_reference(node)
+            return scene.references[node]["file"]
+        if _flag(kwargs, "rr", "removeReference"):
+            node = scene.find_reference(path)
+            if node is None:
+                raise RuntimeError(f"Reference not found: {path}")
+            scene.remove_reference(node)
+            return None
+        if _flag(kwargs, "rn", "rename"):
+            scene.path = _flag(kwargs, "rn", "rename")
+            return scene.path
+        if _flag(kwargs, "s", "save"):
+            write_file(scene.path, scene.save_data())
+            return scene.path
+        if _flag(kwargs, "es", "exportSelected"):
+            # The selection and its upstream history, without DAG nodes or set members
+            names = [name for name in scene.history(scene.selection) if not is_dag(scene.nodes[name]["type"])]
+            write_file(path, scene.snapshot(names))
+            return path
+        if _flag(kwargs, "r", "reference"):
+            if not os.path.exists(path):
+                raise RuntimeError(f"File not found: {path}")
+            namespace = _flag(kwargs, "ns", "namespace") or os.path.splitext(os.path.basename(path))[0]
+            deferred = _flag(kwargs, "dr", "deferReference", default=False)
+            node = scene.add_reference(path, namespace, loaded=not deferred)
+            return scene.references[node]["file"]
+        raise RuntimeError("fake_maya: unsupported file call")
+
+    def fileInfo(self, key=None, value=None, q=False, **kwargs):
+        if q or _flag(kwargs, "query"):
+            return [self.scene.file_info[key]] if key in self.scene.file_info else []
+        self.scene.file_info[key] = value
+
+    def getAttr(self, plug, **kwargs):
+        node, _, attr = plug.partition(".")
+        attrs = self.scene.nodes[self.scene.require(node)]["attrs"]
+        if attr not in attrs:
+            raise ValueError(f"No attribute: {plug}")
+        return attrs[attr]
+
+    def getPanel(self, all=False, withFocus=False, typeOf=None, **kwargs):
+        if self.batch:
+            return None
+        panels = ["modelPanel1", "modelPanel2", "modelPanel3", "modelPanel4", "outlinerPanel1"]
+        if all:
+            return panels
+        if withFocus:
+            return "modelPanel4"
+        if typeOf:
+            return "modelPanel" if typeOf.startswith("modelPanel") else "scriptedPanel"
+        return None
+
+    def listAttr(self, node, **kwargs):
+        return sorted(self.scene.nodes[self.scene.require(node)]["attrs"]) or None
+
+    def listCameras(self, **kwargs):
+        scene = self.scene
+        return sorted(node["parent"] for node in scene.nodes.values()
+                      if node["type"] == "camera" and node["parent"])
+
+    def listConnections(self, nodes=None, s=True, d=True, c=False, p=False, **kwargs):
+        source = _flag(kwargs, "source", default=s)
+        destination = _flag(kwargs, "destination", default=d)
+        connections = _flag(kwargs, "connections", default=c)
+        plugs = _flag(kwargs, "plugs", default=p)
+        result = []
+        for name in _unique(self.scene.resolve(name) for name in _names(nodes)):
+            if name is None:
+                continue
+            for own, other in self.scene.connections(name, source, destination):
+                if connections:
+                    result.append(own)
+                result.append(other if plugs else other.split(".", 1)[0])
+        return result or None
+
+    def listHistory(self, nodes=None, **kwargs):
+        names = [self.scene.require(name) for name in _names(nodes)]
+        return self.scene.history(names) or None
+
+    def listRelatives(self, nodes=None, **kwargs):
+        scene = self.scene
+        full = _flag(kwargs, "f", "fullPath", default=False)
+        node_type = _flag(kwargs, "typ", "type")
+        result = []
+        for name in _names(nodes):
+            node = scene.resolve(name)
+            if node is None:
+                raise ValueError(f"No object matches name: {name}")
+            if _flag(kwargs, "p", "parent"):
+                related = [scene.nodes[node]["parent"]] if scene.nodes[node]["parent"] else []
+            elif _flag(kwargs, "ad", "allDescendents"):
+                related = scene.descendants(node)
+            else:
+                related = list(scene.children[node])
+            if _flag(kwargs, "s", "shapes"):
+                related = [child for child in related if "shape" in inherited_types(scene.nodes[child]["type"])]
+            if node_type:
+                types_ = _names(node_type)
+                related = [child for child in related
+                           if any(t in inherited_types(scene.nodes[child]["type"]) for t in types_)]
+            result.extend(scene.long_name(child) if full else child for child in related)
+        return result or None
+
+    def loadPlugin(self, name, **kwargs):
+        self.plugins.add(name)
+        return [os.path.splitext(name)[0]]
+
+    def ls(self, *args, **kwargs):
+        scene = self.scene
+        names = []
+        for arg in args:
+            names += _names(arg)
+        if names:
+            candidates = []
+            for name in names:
+                if "*" in name or "?" in name:
+                    candidates += fnmatch.filter(scene.nodes, name)
+                else:
+                    node = scene.resolve(name)
+                    if node is not None:
+                        candidates.append(node)
+            candidates = _unique(candidates)
+        else:
+            candidates = list(scene.nodes)
+        if _flag(kwargs, "dag"):
+            candidates = _unique(
+                node for name in candidates if is_dag(scene.nodes[name]["type"])
+                for node in [name] + scene.descendants(name)
+            )
+        node_type = _flag(kwargs, "type", "typ")
+        if node_type:
+            types_ = _names(node_type)
+            candidates = [name for name in candidates
+                          if any(t in inherited_types(scene.nodes[name]["type"]) for t in types_)]
+        if _flag(kwargs, "sl", "selection"):
+            candidates = [name for name in candidates if name in scene.selection]
+        if _flag(kwargs, "l", "long"):
+            return [scene.long_name(name) for name in candidates]
+        return candidates
+
+    def modelEditor(self, panel=None, **kwargs):
+        return panel
+
+    def nodeType(self, node, inherited=False, **kwargs):
+        node_type = self.scene.nodes[self.scene.require(node)]["type"]
+        if inherited or _flag(kwargs, "i"):
+            return list(inherited_types(node_type))
+        return node_type
+
+    def objExists(self, name):
+        return self.scene.resolve(name) is not None
+
+    def pickWalk(self, nodes=None, d="down", **kwargs):
+        direction = _flag(kwargs, "direction", default=d)
+        result = []
+        for name in _names(nodes):
+            node = self.scene.require(name)
+            if direction == "up" and self.scene.nodes[node]["parent"]:
+                result.append(self.scene.nodes[node]["parent"])
+            else:
+                result.append(node)
+        return result
+
+    def playbackOptions(self, q=False, **kwargs):
+        scene = self.scene
+        if q or _flag(kwargs, "query"):
+            if _flag(kwargs, "min", "minTime"):
+                return scene.playback[0]
+            if _flag(kwargs, "max", "maxTime"):
+                return scene.playback[1]
+            return None
+        if _flag(kwargs, "min", "minTime") is not None:
+            scene.playback[0] = float(_flag(kwargs, "min", "minTime"))
+        if _flag(kwargs, "max", "maxTime") is not None:
+            scene.playback[1] = float(_flag(kwargs, "max", "maxTime"))
+
+    def pluginInfo(self, name, q=False, l=False, **kwargs):
+        return name in self.plugins
+
+    def quit(self, **kwargs):
+        return None
+
+    def referenceQuery(self, name, **kwargs):
+        scene = self.scene
+        if _flag(kwargs, "inr", "isNodeReferenced"):
+            node = scene.require(name)
+            return bool(scene.nodes[node]["reference"])
+        reference = scene.find_reference(name)
+        if reference is None:
+            raise RuntimeError(f"Not a reference or referenced node: {name}")
+        ref = scene.references[reference]
+        if _flag(kwargs, "ns", "namespace"):
+            return ":" + ref["namespace"]
+        if _flag(kwargs, "rfn", "referenceNode"):
+            return reference
+        if _flag(kwargs, "il", "isLoaded"):
+            return ref["loaded"]
+        if _flag(kwargs, "f", "filename"):
+            return ref["file"]
+        raise RuntimeError("fake_maya: unsupported referenceQuery")
+
+    def refresh(self, **kwargs):
+        return None
+
+    def scriptJob(self, **kwargs):
+        if _flag(kwargs, "kill", "k") is not None:
+            return None
+        self._script_jobs += 1
+        return self._script_jobs
+
+    def select(self, nodes=None, **kwargs):
+        if _flag(kwargs, "cl", "clear"):
+            self.scene.selection = []
+            return
+        self.scene.selection = _unique(self.scene.require(name) for name in _names(nodes))
+
+    def setAttr(self, plug, *values, **kwargs):
+        node, _, attr = plug.partition(".")
+        self.scene.nodes[self.scene.require(node)]["attrs"][attr] = values[0] if len(values) == 1 else list(values)
+
+    def sets(self, nodes=None, **kwargs):
+        scene = self.scene
+        if _flag(kwargs, "q", "query"):
+            return list(scene.members.get(scene.require(nodes), [])) or None
+        target_set = _flag(kwargs, "fe", "forceElement")
+        if target_set is not None:
+            target_set = scene.require(target_set)
+            for name in _names(nodes):
+                node = scene.require(name)
+                # A transform stands for its shapes, as in Maya
+                shapes = [child for child in scene.children[node]
+                          if "shape" in inherited_types(scene.nodes[child]["type"])] or [node]
+                for shape in shapes:
+                    for object_set in list(scene.memberships.get(shape, [])):
+                        if scene.nodes[object_set]["type"] == "shadingEngine":
+                            scene.remove_member(object_set, shape)
+                    scene.add_member(target_set, shape)
+            return None
+        raise RuntimeError("fake_maya: unsupported sets call")
+
+    # mel
+
+    def mel_eval(self, command):
+        if command.strip() == MATERIAL_FILTER:
+            scene = self.scene
+            engines = [name for name, node in scene.nodes.items() if node["type"] == "shadingEngine"]
+            materials = _unique(
+                source.split(".", 1)[0] for engine in engines
+                for plug, source in scene.incoming.get(engine, []) if plug.endswith(".surfaceShader")
+            )
+            return materials + engines
+        raise RuntimeError(f"fake_maya: unsupported MEL: {command}")
+
+
+def install(maya=None):
+    # Puts the fake in sys.modules; import the pipeline scripts afterwards
+    maya = maya or FakeMaya()
+    sys.modules.update(maya.modules())
+    return maya
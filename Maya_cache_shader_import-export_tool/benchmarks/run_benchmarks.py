@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+import fake_maya
+from scene_gen import SIZES, generate_shot
+
+
+# Runs the shader export, cache export and lighting build against synthetic
+# shots on the fake Maya backend and reports wall time and Maya call counts.
+# Call counts are deterministic, so --baseline catches a new per-node loop
+# without timing noise; --max-slowdown adds a wall-time check.
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_DIR = os.path.join(os.path.dirname(BENCH_DIR), "script")
+DEFAULT_SIZES = ("tiny", "small", "medium")
+UPDATED_CACHES = 2
+OPTIONS_ENV = "MAYA_PIPELINE_OPTIONS"
+METRICS_ENV = "MAYA_PIPELINE_METRICS"
+
+MAYA = fake_maya.install()
+sys.path.insert(0, SCRIPT_DIR)
+
+from cache_script import ExportAlembic  # noqa: E402
+from sharder_export import shader_ex  # noqa: E402
+from cache_sharder_script import process_scene  # noqa: E402
+
+
+def bench_shader_export(shot):
+    exporter = shader_ex()
+    for asset in shot["assets"]:
+        exporter.getShaders(asset)
+
+
+def bench_cache_export(shot):
+    ExportAlembic().open_maya(shot["scene"])
+
+
+def scene_lit_path(shot):
+    scene_name = os.path.splitext(os.path.basename(shot["scene"]))[0]
+    return os.path.join(os.path.dirname(shot["scene"]), f"Cache_{scene_name}", "scene_lit.json")
+
+
+def with_option(name, value, function, *args):
+    saved = os.environ.get(OPTIONS_ENV)
+    os.environ[OPTIONS_ENV] = json.dumps(dict(json.loads(saved or "{}"), **{name: value}))
+    try:
+        return function(*args)
+    finally:
+        os.environ[OPTIONS_ENV] = saved or "{}"
+
+
+def bench_lighting_build(shot):
+    MAYA.scene = fake_maya.Scene()
+    process_scene(scene_lit_path(shot))
+
+
+def setup_lighting_update(shot):
+    # A built lighting scene, then a republish of the first caches
+    bench_lighting_build(shot)
+    with open(scene_lit_path(shot), "r") as f:
+        assets = json.load(f)["Cache_shader_info"]
+    for name in sorted(assets)[:UPDATED_CACHES]:
+        path = assets[name]["cache_file_path"]
+        data = fake_maya.read_file(path)
+        data["published"] = data.get("published", 0) + 1
+        fake_maya.write_file(path, data)
+
+
+def bench_lighting_update(shot):
+    with_option("build_mode", "update", process_scene, scene_lit_path(shot))
+
+
+# In pipeline order: the build reads what the two exports wrote. Setup
+# functions run before each timed run and are not counted.
+BENCHMARKS = (
+    ("shader_export", bench_shader_export, None),
+    ("cache_export", bench_cache_export, None),
+    ("lighting_build", bench_lighting_build, None),
+    ("lighting_update", bench_lighting_update, setup_lighting_update),
+)
+
+
+def read_stages(metrics_path):
+    stages = {}
+    if not os.path.exists(metrics_path):
+        return stages
+    with open(metrics_path, "r") as f:
+        for line in f:
+            for name, entry in json.loads(line).get("stages", {}).items():
+                stages[name] = round(stages.get(name, 0.0) + entry["seconds"], 4)
+    return stages
+
+
+def run_benchmark(name, function, shot, work_dir, repeat=1, setup=None):
+    best, calls, stages = None, None, None
+    for attempt in range(repeat):
+        if setup:
+            os.environ[METRICS_ENV] = os.devnull
+            setup(shot)
+        metrics_path = os.path.join(work_dir, f"{name}_{attempt}.jsonl")
+        os.environ[METRICS_ENV] = metrics_path
+        MAYA.calls.clear()
+        start = time.perf_counter()
+        function(shot)
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best, calls, stages = seconds, dict(MAYA.calls), read_stages(metrics_path)
+    return {
+        "benchmark": name,
+        "seconds": round(best, 4),
+        "maya_calls": sum(calls.values()),
+        "calls": dict(sorted(calls.items(), key=lambda item: -item[1])),
+        "stages": stages,
+    }
+
+
+def run_size(size_name, size, repeat=1, keep=None):
+    work_dir = keep or tempfile.mkdtemp(prefix=f"maya_bench_{size_name}_")
+    try:
+        start = time.perf_counter()
+        shot = generate_shot(os.path.join(work_dir, "shot"), size["meshes"], size["references"])
+        generated = time.perf_counter() - start
+        results = []
+        for name, function, setup in BENCHMARKS:
+            result = run_benchmark(name, function, shot, work_dir, repeat, setup)
+            result.update(size=size_name, meshes=size["meshes"], references=size["references"],
+                          generate_seconds=round(generated, 4))
+            results.append(result)
+        return results
+    finally:
+        if not keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def compare(results, baseline, max_call_increase=0.0, max_slowdown=None):
+    # Regressions against an earlier --output file, matched on size and benchmark
+    previous = {(entry["size"], entry["benchmark"]): entry for entry in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        base = previous.get((result["size"], result["benchmark"]))
+        if not base:
+            continue
+        if result["maya_calls"] > base["maya_calls"] * (1.0 + max_call_increase):
+            grown = {
+                command: f"{base['calls'].get(command, 0)} -> {count}"
+                for command, count in result["calls"].items() if count > base["calls"].get(command, 0)
+            }
+            regressions.append(f"{result['size']}/{result['benchmark']}: Maya calls "
+                               f"{base['maya_calls']} -> {result['maya_calls']} {grown}")
+        if max_slowdown is not None and result["seconds"] > base["seconds"] * (1.0 + max_slowdown):
+            regressions.append(f"{result['size']}/{result['benchmark']}: "
+                               f"{base['seconds']}s -> {result['seconds']}s")
+    return regressions
+
+
+def print_report(results, log=print):
+    log(f"{'size':<8} {'meshes':>6} {'refs':>5}  {'benchmark':<15} {'seconds':>9} {'maya calls':>10}  top calls")
+    for result in results:
+        top = ", ".join(f"{command} {count}" for command, count in list(result["calls"].items())[:3])
+        log(f"{result['size']:<8} {result['meshes']:>6} {result['references']:>5}  "
+            f"{result['benchmark']:<15} {result['seconds']:>9.3f} {result['maya_calls']:>10}  {top}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline scripts on a fake Maya backend.")
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES),
+                        help="Comma-separated presets: " + ", ".join(SIZES))
+    parser.add_argument("--meshes", type=int, help="Run one custom size with this many meshes")
+    parser.add_argument("--references", type=int, default=5, help="References for the custom size")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per benchmark; the fastest is kept")
+    parser.add_argument("-o", "--option", action="append", metavar="KEY=VALUE",
+                        help="Job option for every run, e.g. bulk_scene_query=false")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--max-call-increase", type=float, default=0.0,
+                        help="Allowed growth in Maya calls against the baseline (0.1 = 10%%)")
+    parser.add_argument("--max-slowdown", type=float, default=None,
+                        help="Allowed growth in wall time against the baseline; off by default")
+    parser.add_argument("--keep", help="Generate into this folder and keep it")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.meshes is not None:
+        sizes = {"custom": {"meshes": args.meshes, "references": args.references}}
+    else:
+        names = [name.strip() for name in args.sizes.split(",") if name.strip()]
+        unknown = [name for name in names if name not in SIZES]
+        if unknown:
+            print("Unknown sizes:", ", ".join(unknown), file=sys.stderr)
+            return 2
+        sizes = {name: SIZES[name] for name in names}
+
+    options = {}
+    for item in args.option or []:
+        key, _, value = item.partition("=")
+        options[key.strip()] = value.strip()
+    os.environ[OPTIONS_ENV] = json.dumps(options)
+    os.environ.pop("MAYA_PIPELINE_EVENTS", None)
+
+    # The scripts print a lot; the report goes to the real stdout afterwards
+    stdout = sys.stdout
+    results = []
+    try:
+        sys.stdout = open(os.devnull, "w")
+        for size_name, size in sizes.items():
+            keep = os.path.join(args.keep, size_name) if args.keep else None
+            results += run_size(size_name, size, args.repeat, keep)
+    finally:
+        if sys.stdout is not stdout:
+            sys.stdout.close()
+        sys.stdout = stdout
+
+    print_report(results)
+    output = {"options": options, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(results, json.load(f), args.max_call_increase, args.max_slowdown)
+        for regression in regressions:
+            print("REGRESSION:", regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
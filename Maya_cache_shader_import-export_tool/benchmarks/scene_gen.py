@@ -0,0 +1,112 @@
+import os
+import sys
+import json
+import argparse
+
+from fake_maya import write_file
+
+
+# Synthetic shots for the benchmarks: one asset file per reference, each with
+# a rig, controls, a Cache set over its geometry and a few shading networks,
+# plus a shot scene referencing them with a shot camera. The assets sit next to
+# the shot and their namespace is the file name, which is where the cache
+# export looks for Shader_<namespace>.
+
+SIZES = {
+    "tiny": {"meshes": 10, "references": 1},
+    "small": {"meshes": 100, "references": 5},
+    "medium": {"meshes": 1000, "references": 20},
+    "large": {"meshes": 10000, "references": 100},
+}
+MESHES_PER_GROUP = 25
+
+
+def asset_data(meshes, materials=8, controls=10, empty_groups=2):
+    nodes = [["rig", "transform", None, {}], ["geo", "transform", "rig", {}],
+             ["Cache", "objectSet", None, {}]]
+    connections = []
+    sets = {"Cache": ["geo"]}
+
+    shapes = []
+    for index in range(meshes):
+        group = "grp_%03d" % (index // MESHES_PER_GROUP)
+        if index % MESHES_PER_GROUP == 0:
+            nodes.append([group, "transform", "geo", {}])
+        transform = "mesh_%05d" % index
+        nodes.append([transform, "transform", group, {"visibility": True}])
+        nodes.append([transform + "Shape", "mesh", transform, {"castsShadows": True}])
+        shapes.append(transform + "Shape")
+
+    for index in range(controls):
+        control = "ctrl_%03d" % index
+        nodes.append([control, "transform", "rig", {"translateX": 0.0}])
+        nodes.append([control + "Shape", "nurbsCurve", control, {}])
+
+    for index in range(empty_groups):
+        nodes.append(["empty_%02d" % index, "transform", "rig", {}])
+
+    materials = max(1, min(materials, meshes or 1))
+    for index in range(materials):
+        material, texture, place = "mat_%02d" % index, "tex_%02d" % index, "place_%02d" % index
+        engine = material + "SG"
+        nodes += [
+            [place, "place2dTexture", None, {"repeatU": 1.0, "repeatV": 1.0}],
+            [texture, "file", None, {"fileTextureName": "/textures/%s.tx" % texture}],
+            [material, "blinn", None, {"color": [0.5, 0.5, 0.5], "eccentricity": 0.3 + index * 0.01}],
+            [engine, "shadingEngine", None, {}],
+        ]
+        connections += [
+            [place + ".outUV", texture + ".uvCoord"],
+            [texture + ".outColor", material + ".color"],
+            [material + ".outColor", engine + ".surfaceShader"],
+        ]
+        sets[engine] = shapes[index::materials]
+    return {"nodes": nodes, "connections": connections, "sets": sets}
+
+
+def shot_data(asset_paths, start_frame=1001, end_frame=1100):
+    nodes = []
+    for camera in ("persp", "top", "front", "side", "shotCam"):
+        nodes += [[camera, "transform", None, {}], [camera + "Shape", "camera", camera, {}]]
+    references = [
+        {"file": path, "namespace": os.path.splitext(os.path.basename(path))[0], "loaded": True}
+        for path in asset_paths
+    ]
+    return {"nodes": nodes, "connections": [], "sets": {}, "references": references, "file_info": {},
+            "playback": [float(start_frame), float(end_frame)], "time_unit": "film"}
+
+
+def generate_shot(root, meshes=100, references=5, materials=8, controls=10, name="shot"):
+    # Writes the assets and <root>/<name>.ma; meshes are spread over the references
+    if not os.path.exists(root):
+        os.makedirs(root)
+    references = max(1, references)
+    asset_paths = []
+    for index in range(references):
+        count = meshes // references + (1 if index < meshes % references else 0)
+        path = os.path.join(root, "asset_%03d.ma" % index)
+        write_file(path, asset_data(count, materials, controls))
+        asset_paths.append(path)
+    scene_path = os.path.join(root, name + ".ma")
+    write_file(scene_path, shot_data(asset_paths))
+    return {"scene": scene_path, "assets": asset_paths, "meshes": meshes, "references": references}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic shot for the fake_maya benchmarks.")
+    parser.add_argument("root")
+    parser.add_argument("--size", choices=sorted(SIZES), default="small")
+    parser.add_argument("--meshes", type=int, help="Overrides the size preset")
+    parser.add_argument("--references", type=int, help="Overrides the size preset")
+    args = parser.parse_args(argv)
+    size = dict(SIZES[args.size])
+    if args.meshes is not None:
+        size["meshes"] = args.meshes
+    if args.references is not None:
+        size["references"] = args.references
+    print(json.dumps(generate_shot(args.root, **size), indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import os
+import json
+import hashlib
+import threading
+
+from scene_scan import default_index
+
+
+MANIFEST_NAME = "build_manifest.json"
+MANIFEST_VERSION = 1
+
+OUTPUTS = {
+    "cache": ("Cache_{scene}", "scene_lit.json"),
+    "shader": ("Shader_{scene}", "info_shader.json"),
+}
+
+_version_cache = {}
+_version_lock = threading.Lock()
+
+
+def output_dir(task, scene_path):
+    folder, _ = OUTPUTS[task]
+    scene_name = os.path.splitext(os.path.basename(scene_path))[0]
+    return os.path.join(os.path.dirname(scene_path), folder.format(scene=scene_name))
+
+
+def output_file(task, scene_path):
+    return os.path.join(output_dir(task, scene_path), OUTPUTS[task][1])
+
+
+def manifest_path(task, scene_path):
+    return os.path.join(output_dir(task, scene_path), MANIFEST_NAME)
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def exporter_version(script_path):
+    # Any change to the Maya-side scripts invalidates their outputs. The hash is
+    # cached against the scripts' names, sizes and mtimes, so a long-lived GUI
+    # picks up an edited script on the next batch.
+    script_dir = os.path.dirname(os.path.abspath(script_path))
+    scripts = sorted((entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+                     for entry in os.scandir(script_dir) if entry.name.endswith(".py"))
+    with _version_lock:
+        cached = _version_cache.get(script_dir)
+        if cached and cached[0] == scripts:
+            return cached[1]
+
+    digest = hashlib.sha256()
+    for name, _, _ in scripts:
+        digest.update(name.encode("utf-8"))
+        with open(os.path.join(script_dir, name), "rb") as f:
+            digest.update(f.read())
+    version = digest.hexdigest()
+
+    with _version_lock:
+        _version_cache[script_dir] = (scripts, version)
+    return version
+
+
+def resolve_reference(ref_file, scene_dir):
+    path = os.path.expandvars(ref_file.split("{")[0])
+    if not os.path.isabs(path):
+        path = os.path.join(scene_dir, path)
+    return os.path.normpath(path)
+
+
+def collect_inputs(scene_path, index=None):
+    # The scene plus every reference it resolves to, following nested .ma references
+    index = index or default_index()
+    scene_path = os.path.normpath(os.path.abspath(scene_path))
+    inputs, pending, missing = [], [scene_path], []
+    seen = set()
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        if not os.path.exists(path):
+            missing.append(path)
+            continue
+        inputs.append(path)
+        info = index.get(path)
+        for ref in (info or {}).get("references", []):
+            pending.append(resolve_reference(ref["file"], os.path.dirname(path)))
+    return sorted(inputs), sorted(missing)
+
+
+def load_manifest(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def hash_inputs(paths, previous=None):
+    # Reuse the recorded hash when mtime and size are unchanged
+    previous = previous or {}
+    hashed = {}
+    for path in paths:
+        stat = os.stat(path)
+        entry = previous.get(path)
+        if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            hashed[path] = entry
+        else:
+            hashed[path] = {"mtime": stat.st_mtime, "size": stat.st_size, "sha256": file_hash(path)}
+    return hashed
+
+
+def build_record(task, scene_path, script_path, flags=None, previous=None):
+    inputs, missing = collect_inputs(scene_path)
+    previous_inputs = (previous or {}).get("inputs")
+    return {
+        "version": MANIFEST_VERSION,
+        "task": task,
+        "scene_path": os.path.normpath(os.path.abspath(scene_path)),
+        "exporter_version": exporter_version(script_path),
+        "flags": flags or {},
+        "inputs": hash_inputs(inputs, previous_inputs),
+        "missing_inputs": missing,
+    }
+
+
+def check(task, scene_path, script_path, flags=None):
+    # Returns (up_to_date, record). The record is taken before the job runs so a
+    # scene saved while it exports is seen as changed on the next run.
+    if task not in OUTPUTS:
+        return False, None
+    path = manifest_path(task, scene_path)
+    previous = load_manifest(path)
+    if previous and previous.get("version") != MANIFEST_VERSION:
+        previous = None
+    record = build_record(task, scene_path, script_path, flags, previous)
+
+    if not previous or not os.path.exists(output_file(task, scene_path)):
+        return False, record
+    for key in ("exporter_version", "flags", "missing_inputs"):
+        if previous.get(key) != record[key]:
+            return False, record
+    hashes = {path: entry["sha256"] for path, entry in record["inputs"].items()}
+    previous_hashes = {path: entry["sha256"] for path, entry in previous.get("inputs", {}).items()}
+    if hashes != previous_hashes:
+        return False, record
+
+    # Same content under a new mtime (e.g. a touched file): refresh the stats so
+    # the next check doesn't hash it again
+    if record["inputs"] != previous["inputs"]:
+        write_manifest(task, scene_path, record)
+    return True, record
+
+
+def write_manifest(task, scene_path, record):
+    if not record or not os.path.exists(output_file(task, scene_path)):
+        return None
+    path = manifest_path(task, scene_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(record, f, indent=4)
+    os.replace(tmp_path, path)
+    return path
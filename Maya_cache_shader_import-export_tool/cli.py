@@ -0,0 +1,193 @@
+import os
+import sys
+import csv
+import glob
+import json
+import argparse
+
+from batch_runner import BatchJob, BatchRunner, JobResult, find_scene_lits
+
+
+TASKS = ("shader", "cache", "build")
+
+
+def load_manifest(path):
+    # JSON: a list of jobs or {"jobs": [...]}; CSV: a header row with path[,task]
+    if path.lower().endswith(".csv"):
+        with open(path, "r", newline="") as f:
+            return [dict(row) for row in csv.DictReader(f)]
+
+    with open(path, "r") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("jobs", [])
+    return [{"path": entry} if isinstance(entry, str) else entry for entry in data]
+
+
+def expand_input(value, task):
+    if os.path.isdir(value):
+        if task == "build":
+            return find_scene_lits(value)
+        return [os.path.join(value, name) for name in sorted(os.listdir(value))
+                if name.lower().endswith(".ma")]
+    if glob.has_magic(value):
+        return sorted(glob.glob(value))
+    return [value]
+
+
+def parse_options(values):
+    # KEY=VALUE pairs; values are read as JSON when possible (true, 2, "x")
+    options = {}
+    for value in values or []:
+        if "=" not in value:
+            raise ValueError(f"Option must be KEY=VALUE: {value}")
+        key, raw = value.split("=", 1)
+        try:
+            options[key] = json.loads(raw)
+        except ValueError:
+            options[key] = raw
+    return options
+
+
+def collect_jobs(inputs, task=None, options=None):
+    options = options or {}
+    jobs = []
+    for value in inputs:
+        if value.lower().endswith((".json", ".csv")) and not value.lower().endswith("scene_lit.json"):
+            for entry in load_manifest(value):
+                entry_task = entry.get("task") or task
+                if entry_task not in TASKS:
+                    raise ValueError(f"Job has no valid task: {entry}")
+                entry_options = dict(options, **(entry.get("options") or {}))
+                priority = int(entry.get("priority") or 0)
+                for path in expand_input(entry["path"], entry_task):
+                    jobs.append(BatchJob.for_task(entry_task, os.path.abspath(path), entry_options, priority))
+            continue
+
+        if task not in TASKS:
+            raise ValueError(f"A task is required for {value}")
+        for path in expand_input(value, task):
+            jobs.append(BatchJob.for_task(task, os.path.abspath(path), dict(options)))
+    return jobs
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Run shader export, cache export or lighting build jobs without the GUI."
+    )
+    parser.add_argument("task", choices=TASKS + ("run",),
+                        help="Job type, or 'run' to take the task from each manifest entry")
+    parser.add_argument("inputs", nargs="+",
+                        help="Scene folders, globs, scene files or JSON/CSV job manifests")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Maya processes to run at once (default: from CPU count and RAM)")
+    parser.add_argument("-f", "--force", action="store_true",
+                        help="Rebuild even when the outputs are up to date")
+    parser.add_argument("--warm", action="store_true",
+                        help="Run cache/shader jobs in reusable mayapy workers")
+    parser.add_argument("--max-memory-mb", type=int, default=None,
+                        help="Replace a --warm worker once it uses this much memory "
+                             "(default: MAYA_PIPELINE_WORKER_MAX_MEMORY_MB)")
+    parser.add_argument("--gui", action="store_true",
+                        help="Launch jobs in GUI Maya instead of mayapy; builds are left open")
+    parser.add_argument("-o", "--option", action="append", metavar="KEY=VALUE",
+                        help="Job option passed to every job, e.g. bake_evaluation_mode=serial")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Kill a job after this many seconds")
+    parser.add_argument("--idle-timeout", type=float, default=None,
+                        help="Kill a job after this many seconds without output or events")
+    parser.add_argument("--retries", type=int, default=0,
+                        help="Retries for timed-out, hung or crashed jobs")
+    parser.add_argument("--retry-delay", type=float, default=30,
+                        help="Seconds before the first retry; doubles for each further retry")
+    parser.add_argument("--state", default=None,
+                        help="Queue state file; rerunning with the same file resumes the batch")
+    parser.add_argument("--queue", default=None,
+                        help="Submit the jobs to this shared queue folder for farm_queue.py workers")
+    parser.add_argument("--verify", action="store_true",
+                        help="Check the caches and shader files of each cache job afterwards")
+    return parser
+
+
+def batch_runner(args):
+    return BatchRunner(max_workers=args.workers, force=args.force, headless=not args.gui,
+                       wall_timeout=args.timeout, idle_timeout=args.idle_timeout,
+                       retries=args.retries, retry_delay=args.retry_delay, state_path=args.state)
+
+
+def run(args):
+    task = None if args.task == "run" else args.task
+    jobs = collect_jobs(args.inputs, task, parse_options(args.option))
+
+    if args.queue:
+        from farm_queue import submit
+        ids = submit(args.queue, jobs)
+        return {"queued": [{"id": job_id, "task": job.task, "path": job.file_path}
+                           for job_id, job in zip(ids, jobs)]}
+
+    if args.warm:
+        from worker_pool import WorkerPool
+        pool = WorkerPool(size=args.workers or 1, max_memory_mb=args.max_memory_mb, force=args.force,
+                          job_timeout=args.timeout)
+        try:
+            results = pool.run(jobs)
+        finally:
+            pool.close()
+        reports = [pool.report]
+    else:
+        runner = batch_runner(args)
+        results = runner.run(jobs)
+        reports = [runner.report]
+
+    output = {
+        "results": [dict(result.to_dict(), task=job.task) for job, result in zip(jobs, results)],
+        "summary": {
+            status: sum(1 for result in results if result.status == status)
+            for status in (JobResult.OK, JobResult.FAILED, JobResult.SKIPPED)
+        },
+        "metrics": [report for report in reports if report],
+        "dead_letter": [
+            dict(result.to_dict(), task=job.task)
+            for job, result in zip(jobs, results) if result.status == JobResult.FAILED
+        ],
+    }
+    if args.verify:
+        from build_manifest import output_file
+        from verify_caches import verify_shots
+        json_paths = [output_file("cache", job.file_path) for job, result in zip(jobs, results)
+                      if job.task == "cache" and result.status != JobResult.FAILED]
+        output["verification"] = verify_shots(json_paths, args.workers)
+    return output
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.warm:
+        # Warm workers have no retries, idle watchdog or state file
+        ignored = [flag for flag, value in (("--gui", args.gui), ("--idle-timeout", args.idle_timeout),
+                                            ("--retries", args.retries), ("--state", args.state)) if value]
+        if ignored:
+            parser.error("--warm can't be combined with %s" % ", ".join(ignored))
+
+    # Only the JSON result goes to stdout; logs and Maya output go to stderr
+    out = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    try:
+        output = run(args)
+    except (OSError, ValueError) as e:
+        out.write(json.dumps({"error": str(e)}) + "\n")
+        out.close()
+        return 2
+
+    out.write(json.dumps(output, indent=4) + "\n")
+    out.close()
+    failed = output.get("summary", {}).get(JobResult.FAILED)
+    failed = failed or output.get("verification", {}).get("summary", {}).get("fail")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+import json
+import time
+import socket
+import threading
+
+
+EVENTS_ENV = "MAYA_PIPELINE_EVENTS"
+JOB_ID_ENV = "MAYA_PIPELINE_JOB_ID"
+
+
+class EventServer:
+    # Local socket the Maya-side scripts (script/job_events.py) send JSON lines
+    # to. Every event is handed to callback on a reader thread.
+    def __init__(self, callback, host="127.0.0.1"):
+        self.callback = callback
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.bind((host, 0))
+        self._socket.listen(16)
+        self.address = "%s:%d" % self._socket.getsockname()
+        self._closed = False
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                connection, _ = self._socket.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._read, args=(connection,), daemon=True).start()
+
+    def _read(self, connection):
+        with connection, connection.makefile("r", encoding="utf-8", errors="replace") as lines:
+            try:
+                for line in lines:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.dispatch(event)
+            except OSError:
+                pass
+
+    def dispatch(self, event):
+        try:
+            self.callback(event)
+        except Exception as e:
+            print("Event handler failed:", e)
+
+    def close(self):
+        self._closed = True
+        try:
+            self._socket.close()
+        except OSError:
+            pass
+
+
+class BatchProgress:
+    # Folds job events into per-job progress plus batch throughput and ETA.
+    # The launcher adds "batch_start" and "job_done" events of its own.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset(0, 1)
+
+    def reset(self, total, workers):
+        with self._lock:
+            self.total = total
+            self.workers = max(1, workers)
+            self.started = time.time()
+            self.jobs = {}
+            self.done = {}
+            self.frames = 0
+
+    def update(self, event):
+        kind = event.get("event")
+        with self._lock:
+            if kind == "batch_start":
+                self.total = event.get("total", 0)
+                self.workers = max(1, event.get("workers") or 1)
+                self.started = time.time()
+                self.jobs, self.done, self.frames = {}, {}, 0
+                return
+            job_id = event.get("job")
+            if kind == "job_done":
+                self.jobs.pop(job_id, None)
+                # Skipped jobs finish in no time; timing them would pull the ETA down
+                duration = event.get("duration") or 0.0
+                timed = event.get("status") != "skipped" and duration > 0
+                self.done[job_id] = duration if timed else None
+                return
+            if job_id in self.done:
+                # A late event from a job the launcher already finished
+                return
+            job = self.jobs.setdefault(job_id, {"started": time.time(), "stage": None, "fraction": 0.0,
+                                                "last_frame": {}})
+            if kind == "stage_start":
+                job["stage"] = event.get("stage")
+            elif kind == "frame":
+                stage = event.get("stage")
+                start, end, frame = event.get("start"), event.get("end"), event.get("frame")
+                previous = job["last_frame"].get(stage, start)
+                if frame is not None and previous is not None and frame > previous:
+                    self.frames += frame - previous
+                job["last_frame"][stage] = frame
+                if end is not None and start is not None and end > start:
+                    # Bake and Alembic export each take about half of a cache job
+                    part = min(1.0, max(0.0, (frame - start) / float(end - start)))
+                    job["fraction"] = part * 0.5 + (0.5 if stage == "abc_export" else 0.0)
+                job["stage"] = stage
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = max(time.time() - self.started, 1e-6)
+            done = len(self.done)
+            running = sum(job["fraction"] for job in self.jobs.values())
+            progress = (done + running) / self.total if self.total else 0.0
+            eta = None
+            durations = [duration for duration in self.done.values() if duration is not None]
+            if durations:
+                mean = sum(durations) / len(durations)
+                remaining = max(0.0, self.total - done - running)
+                eta = mean * remaining / min(self.workers, max(1, self.total - done))
+            elif progress > 0:
+                eta = elapsed * (1.0 - progress) / progress
+            return {
+                "total": self.total,
+                "done": done,
+                "running": len(self.jobs),
+                "progress": round(progress, 4),
+                "frames_per_second": round(self.frames / elapsed, 2),
+                "eta_seconds": round(eta, 1) if eta is not None else None,
+                "jobs": {
+                    job_id: {"stage": job["stage"], "fraction": round(job["fraction"], 3)}
+                    for job_id, job in self.jobs.items()
+                },
+            }
+
+
+def format_progress(snapshot):
+    text = f"{snapshot['done']}/{snapshot['total']} jobs"
+    if snapshot["running"]:
+        text += f", {snapshot['running']} running"
+    if snapshot["frames_per_second"]:
+        text += f", {snapshot['frames_per_second']} frames/s"
+    if snapshot["eta_seconds"] is not None:
+        minutes, seconds = divmod(int(snapshot["eta_seconds"]), 60)
+        text += f", ETA {minutes}m{seconds:02d}s"
+    return text
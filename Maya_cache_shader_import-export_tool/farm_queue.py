@@ -0,0 +1,418 @@
+import os
+import sys
+import json
+import time
+import uuid
+import signal
+import socket
+import argparse
+import threading
+
+from batch_runner import BatchJob, BatchRunner, JobResult
+
+
+# Job queue on shared storage, drained by worker daemons on any number of nodes:
+#
+#   pending/<id>.json     submitted, waiting (file names sort by priority, then age)
+#   claimed/<id>.json     taken by a worker: a rename out of pending/, so one wins
+#   claimed/<id>.<n>.log  the log of the nth attempt, written by its owner only
+#   leases/<id>.json      the claiming worker's heartbeat
+#   done/<id>.json        job plus result, with the job log as done/<id>.log
+#   failed/<id>.json      the same for failed jobs and jobs out of attempts
+#   failed/<id>.<n>.log   the log of an attempt whose lease was lost
+#
+# A claimed job whose lease stops beating for lease_timeout seconds (or whose
+# worker process is gone, on the same host) goes back to pending/. Lease times
+# come from each node's clock, so keep lease_timeout well above clock skew.
+
+FOLDERS = ("pending", "claimed", "leases", "done", "failed", "tmp")
+LEASE_TIMEOUT = 300
+HEARTBEAT_INTERVAL = 30
+POLL_INTERVAL = 5
+MAX_ATTEMPTS = 3
+
+
+def queue_folders(queue_dir):
+    folders = {name: os.path.join(queue_dir, name) for name in FOLDERS}
+    for folder in folders.values():
+        os.makedirs(folder, exist_ok=True)
+    return folders
+
+
+def read_json(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_json(path, data, tmp_dir=None):
+    # Written under a temp name and renamed, so readers never see half a file
+    tmp_path = os.path.join(tmp_dir or os.path.dirname(path),
+                            f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def job_id(priority=0):
+    # Lower names are claimed first: higher priority, then older
+    rank = 999 - max(-999, min(999, int(priority)))
+    return "p%04d_%d_%s" % (rank, time.time_ns(), uuid.uuid4().hex[:8])
+
+
+def submit(queue_dir, jobs):
+    folders = queue_folders(queue_dir)
+    ids = []
+    for job in jobs:
+        new_id = job_id(job.priority)
+        write_json(os.path.join(folders["pending"], new_id + ".json"), {
+            "id": new_id,
+            "task": job.task,
+            "path": job.file_path,
+            "options": job.options,
+            "priority": job.priority,
+            "submitted": time.time(),
+            "submitted_by": socket.gethostname(),
+            "attempts": 0,
+        }, folders["tmp"])
+        ids.append(new_id)
+    return ids
+
+
+def pid_alive(pid):
+    if sys.platform == "win32":
+        # os.kill(pid, 0) would terminate the process on Windows
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def lease_expired(lease, lease_timeout, now=None):
+    now = now or time.time()
+    if lease.get("host") == socket.gethostname() and lease.get("pid") and not pid_alive(lease["pid"]):
+        return True
+    return now - lease.get("heartbeat", 0) > lease_timeout
+
+
+def attempt_log(folders, job):
+    # One log per lease, so a worker that lost its lease never writes into the
+    # log of the job's new owner
+    return os.path.join(folders["claimed"], "%s.%d.log" % (job["id"], job.get("attempts", 0)))
+
+
+def park_log(folders, job):
+    # Moves the log of an attempt whose lease was lost out of claimed/
+    log_path = attempt_log(folders, job)
+    try:
+        os.replace(log_path, os.path.join(folders["failed"], os.path.basename(log_path)))
+    except OSError:
+        pass
+
+
+def release_stale(queue_dir, lease_timeout=LEASE_TIMEOUT, max_attempts=MAX_ATTEMPTS, log=print):
+    # Puts claimed jobs with dead leases back in pending/ (or failed/ once out of
+    # attempts). The rename decides which node releases a job when several try.
+    folders = queue_folders(queue_dir)
+    released = []
+    for name in sorted(os.listdir(folders["claimed"])):
+        if not name.endswith(".json"):
+            continue
+        claimed_path = os.path.join(folders["claimed"], name)
+        lease_path = os.path.join(folders["leases"], name)
+        try:
+            lease = read_json(lease_path)
+        except (OSError, ValueError):
+            # Claimed but no lease yet (or a torn one): judge by the claim's age
+            try:
+                lease = {"heartbeat": os.path.getmtime(claimed_path)}
+            except OSError:
+                continue
+        if not lease_expired(lease, lease_timeout):
+            continue
+
+        try:
+            job = read_json(claimed_path)
+        except (OSError, ValueError):
+            continue
+        out_of_attempts = job.get("attempts", 0) >= max_attempts
+        target = os.path.join(folders["failed" if out_of_attempts else "pending"], name)
+        try:
+            os.rename(claimed_path, target)
+        except OSError:
+            continue
+        park_log(folders, job)
+        if out_of_attempts:
+            job["result"] = {"status": JobResult.FAILED, "message": "lease expired", "worker": lease.get("worker")}
+            write_json(target, job, folders["tmp"])
+        try:
+            os.remove(lease_path)
+        except OSError:
+            pass
+        log(f"Released stale lease ({lease.get('worker')}): {job.get('path')}")
+        released.append(job["id"])
+    return released
+
+
+def claim(queue_dir, worker):
+    # The first pending job this worker manages to rename into claimed/
+    folders = queue_folders(queue_dir)
+    for name in sorted(os.listdir(folders["pending"])):
+        if not name.endswith(".json"):
+            continue
+        claimed_path = os.path.join(folders["claimed"], name)
+        try:
+            os.rename(os.path.join(folders["pending"], name), claimed_path)
+            # rename keeps the submit time; until the lease exists the claim's
+            # mtime is what release_stale goes by
+            os.utime(claimed_path)
+        except OSError:
+            continue
+        lease = Lease(queue_dir, name, worker)
+        try:
+            lease.beat()
+            job = read_json(claimed_path)
+        except FileNotFoundError:
+            lease.remove()
+            continue
+        except (OSError, ValueError) as e:
+            lease.remove()
+            try:
+                os.rename(claimed_path, os.path.join(folders["failed"], name))
+            except OSError:
+                pass
+            print("Unreadable job moved to failed:", name, e)
+            continue
+        job["attempts"] = job.get("attempts", 0) + 1
+        job["worker"] = worker
+        write_json(claimed_path, job, folders["tmp"])
+        return job, lease
+    return None, None
+
+
+class Lease:
+    def __init__(self, queue_dir, name, worker):
+        folders = queue_folders(queue_dir)
+        self.path = os.path.join(folders["leases"], name)
+        self.tmp_dir = folders["tmp"]
+        self.worker = worker
+        self.claimed = time.time()
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def owned(self):
+        try:
+            lease = read_json(self.path)
+        except (OSError, ValueError):
+            return False
+        return lease.get("worker") == self.worker and lease.get("claimed") == self.claimed
+
+    def beat(self):
+        write_json(self.path, {
+            "worker": self.worker,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "claimed": self.claimed,
+            "heartbeat": time.time(),
+        }, self.tmp_dir)
+
+    def start(self, interval=HEARTBEAT_INTERVAL):
+        def run():
+            while not self._stop.wait(interval):
+                if not self.owned():
+                    # Released as stale; beating now would overwrite the new owner's lease
+                    self.lost = True
+                    return
+                try:
+                    self.beat()
+                except OSError as e:
+                    print("Heartbeat failed:", self.path, e)
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def remove(self):
+        self.stop()
+        if self.lost:
+            return
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class FarmWorker:
+    def __init__(self, queue_dir, slots=1, runner_factory=None, lease_timeout=LEASE_TIMEOUT,
+                 heartbeat=HEARTBEAT_INTERVAL, poll_interval=POLL_INTERVAL, max_attempts=MAX_ATTEMPTS,
+                 exit_when_empty=False):
+        self.queue_dir = queue_dir
+        self.folders = queue_folders(queue_dir)
+        self.slots = max(1, slots)
+        self.runner_factory = runner_factory or (lambda: BatchRunner(max_workers=1))
+        self.lease_timeout = lease_timeout
+        self.heartbeat = heartbeat
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.exit_when_empty = exit_when_empty
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = threading.Event()
+        self.processed = 0
+        self._lock = threading.Lock()
+
+    def log(self, *args):
+        with self._lock:
+            print(*args)
+            sys.stdout.flush()
+
+    def run(self):
+        threads = [threading.Thread(target=self.slot, args=(index,), daemon=True) for index in range(self.slots)]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            self.log("Stopping after the running jobs...")
+            self.stopping.set()
+            for thread in threads:
+                thread.join()
+        return self.processed
+
+    def slot(self, index):
+        worker = f"{self.name}:{index}"
+        while not self.stopping.is_set():
+            release_stale(self.queue_dir, self.lease_timeout, self.max_attempts, self.log)
+            job, lease = claim(self.queue_dir, worker)
+            if not job:
+                if self.exit_when_empty and not any(name.endswith(".json")
+                                                    for name in os.listdir(self.folders["claimed"])):
+                    return
+                self.stopping.wait(self.poll_interval)
+                continue
+            self.run_claimed(job, lease, worker)
+
+    def run_claimed(self, job, lease, worker):
+        name = job["id"] + ".json"
+        claimed_path = os.path.join(self.folders["claimed"], name)
+        log_path = attempt_log(self.folders, job)
+        lease.start(self.heartbeat)
+        self.log(f"[{worker}] {job['task']}: {job['path']} (attempt {job['attempts']})")
+
+        start = time.time()
+        with open(log_path, "a") as log_file:
+            def job_log(*args):
+                log_file.write(" ".join(str(arg) for arg in args) + "\n")
+                log_file.flush()
+
+            runner = self.runner_factory()
+            runner.log = job_log
+            try:
+                batch_job = BatchJob.for_task(job["task"], job["path"], job.get("options"), job.get("priority", 0))
+                result = runner.run_job(batch_job)
+            except Exception as e:
+                job_log("Job failed to start:", e)
+                result = JobResult(job["path"], JobResult.FAILED, message=str(e), duration=time.time() - start)
+        lease.stop()
+
+        if lease.lost or not lease.owned():
+            # Released as stale while we ran; whoever has it now reports it
+            self.log(f"[{worker}] Lease lost, result dropped: {job['path']}")
+            park_log(self.folders, job)
+            return
+
+        job["result"] = dict(result.to_dict(), worker=worker, finished=time.time())
+        # Skips for a missing Maya version or executable go to failed/ too
+        target = self.folders["done" if result.done else "failed"]
+        write_json(claimed_path, job, self.folders["tmp"])
+        os.replace(log_path, os.path.join(target, job["id"] + ".log"))
+        os.rename(claimed_path, os.path.join(target, name))
+        lease.remove()
+        with self._lock:
+            self.processed += 1
+        self.log(f"[{worker}] {result.status}: {job['path']} {result.message}")
+
+
+def status(queue_dir, lease_timeout=LEASE_TIMEOUT):
+    folders = queue_folders(queue_dir)
+    counts = {name: sum(1 for entry in os.listdir(folders[name]) if entry.endswith(".json"))
+              for name in ("pending", "claimed", "done", "failed")}
+    running = []
+    now = time.time()
+    for name in sorted(os.listdir(folders["claimed"])):
+        if not name.endswith(".json"):
+            continue
+        try:
+            job = read_json(os.path.join(folders["claimed"], name))
+            lease = read_json(os.path.join(folders["leases"], name))
+        except (OSError, ValueError):
+            continue
+        running.append({"id": job["id"], "task": job["task"], "path": job["path"], "worker": lease.get("worker"),
+                        "heartbeat_age": round(now - lease.get("heartbeat", 0), 1),
+                        "stale": lease_expired(lease, lease_timeout, now)})
+    return {"counts": counts, "running": running}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Shared-directory job queue for several farm nodes.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    worker = commands.add_parser("worker", help="Claim and run jobs until stopped")
+    worker.add_argument("queue")
+    worker.add_argument("--slots", type=int, default=1, help="Jobs to run at once on this node")
+    worker.add_argument("--lease-timeout", type=float, default=LEASE_TIMEOUT,
+                        help="Seconds without a heartbeat before a claimed job is released")
+    worker.add_argument("--heartbeat", type=float, default=HEARTBEAT_INTERVAL)
+    worker.add_argument("--poll", type=float, default=POLL_INTERVAL, help="Seconds between looks at an empty queue")
+    worker.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS,
+                        help="Claims per job before a stale job goes to failed/")
+    worker.add_argument("--exit-when-empty", action="store_true", help="Stop once nothing is pending or running")
+    worker.add_argument("-f", "--force", action="store_true", help="Rebuild even when the outputs are up to date")
+    worker.add_argument("--timeout", type=float, default=None, help="Kill a job after this many seconds")
+    worker.add_argument("--idle-timeout", type=float, default=None,
+                        help="Kill a job after this many seconds without output")
+    worker.add_argument("--retries", type=int, default=0, help="Local retries for timed-out or crashed jobs")
+
+    for name, help_text in (("status", "Show queue counts and running jobs"),
+                            ("release", "Put jobs with stale leases back in pending/")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("queue")
+        command.add_argument("--lease-timeout", type=float, default=LEASE_TIMEOUT)
+        command.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "status":
+        print(json.dumps(status(args.queue, args.lease_timeout), indent=4))
+        return 0
+    if args.command == "release":
+        print(json.dumps({"released": release_stale(args.queue, args.lease_timeout, args.max_attempts)}, indent=4))
+        return 0
+
+    def runner_factory():
+        return BatchRunner(max_workers=1, force=args.force, wall_timeout=args.timeout,
+                           idle_timeout=args.idle_timeout, retries=args.retries)
+
+    worker = FarmWorker(args.queue, args.slots, runner_factory, args.lease_timeout, args.heartbeat,
+                        args.poll, args.max_attempts, args.exit_when_empty)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda *_: worker.stopping.set())
+    worker.log(f"Worker {worker.name} on {args.queue} with {worker.slots} slot(s)")
+    processed = worker.run()
+    worker.log(f"Worker {worker.name} finished {processed} job(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
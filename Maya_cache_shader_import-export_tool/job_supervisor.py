@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import time
+import signal
+import subprocess
+import threading
+
+
+TIMED_OUT = "timeout"
+HUNG = "no output"
+
+
+def new_process_group():
+    # Popen kwargs that let kill_process_tree reach every child Maya starts
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def kill_process_tree(process):
+    if process.poll() is not None:
+        return
+    try:
+        if sys.platform == "win32":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        process.kill()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        print("Process did not exit after kill:", process.pid)
+
+
+class Activity:
+    # Last sign of life per job: output lines and job events both count
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._times = {}
+
+    def touch(self, key):
+        with self._lock:
+            self._times[key] = time.time()
+
+    def last(self, key):
+        with self._lock:
+            return self._times.get(key)
+
+    def forget(self, key):
+        with self._lock:
+            self._times.pop(key, None)
+
+
+def forward_output(stream, log, on_line):
+    def pump():
+        for raw in iter(stream.readline, b""):
+            on_line()
+            log(raw.decode("utf-8", "replace").rstrip())
+        stream.close()
+
+    thread = threading.Thread(target=pump, daemon=True)
+    thread.start()
+    return thread
+
+
+def supervise(process, wall_timeout=None, idle_timeout=None, last_activity=None, poll_interval=0.5):
+    # Waits for the process; kills its whole tree after wall_timeout seconds in
+    # total or idle_timeout seconds without activity. Returns (exit_code, reason).
+    start = time.time()
+    while True:
+        try:
+            return process.wait(timeout=poll_interval), None
+        except subprocess.TimeoutExpired:
+            pass
+        now = time.time()
+        if wall_timeout and now - start > wall_timeout:
+            kill_process_tree(process)
+            return process.returncode, TIMED_OUT
+        if idle_timeout:
+            last = max(start, (last_activity() if last_activity else None) or start)
+            if now - last > idle_timeout:
+                kill_process_tree(process)
+                return process.returncode, HUNG
+
+
+class QueueState:
+    # Persisted per-job status so an interrupted batch can resume: jobs finished
+    # in an earlier run are skipped, running or pending ones run again.
+    DONE = ("ok", "skipped")
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = {"jobs": {}, "dead_letter": []}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError) as e:
+                print("Ignoring unreadable queue state:", path, e)
+
+    @staticmethod
+    def key(job):
+        return "%s:%s" % (job.task, os.path.normpath(job.file_path))
+
+    def get(self, job):
+        with self._lock:
+            return self.data["jobs"].get(self.key(job))
+
+    def is_done(self, job):
+        entry = self.get(job)
+        return bool(entry) and entry["status"] in self.DONE
+
+    def update(self, job, status, **fields):
+        with self._lock:
+            entry = self.data["jobs"].setdefault(self.key(job), {"task": job.task, "path": job.file_path})
+            entry.update(fields, status=status, updated=time.time())
+            self._save()
+
+    def add_dead_letter(self, job, result):
+        with self._lock:
+            self.data["dead_letter"] = [
+                entry for entry in self.data["dead_letter"] if entry["key"] != self.key(job)
+            ]
+            self.data["dead_letter"].append(dict(result.to_dict(), key=self.key(job), task=job.task))
+            self._save()
+
+    def _save(self):
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, indent=4)
+        os.replace(tmp_path, self.path)
@@ -1,6 +1,5 @@
 import sys
 import os
-import subprocess
 import threading
 import json
 from PySide6.QtWidgets import (
@@ -10,10 +9,32 @@ from PySide6.QtWidgets import (
     QLineEdit,
     QListView,
     QMessageBox,
-    QAbstractItemView
+    QAbstractItemView,
+    QSpinBox,
+    QCheckBox,
+    QProgressBar,
+    QLabel
 )
 from PySide6.QtUiTools import QUiLoader
-from PySide6.QtCore import QFile, QStringListModel
+from PySide6.QtCore import QFile, QStringListModel, QObject, Signal
+
+from batch_runner import (
+    BatchJob,
+    BatchRunner,
+    default_worker_count,
+    find_scene_lits,
+    get_maya_version,
+    maya_executable,
+    task_for_script
+)
+from worker_pool import WORKER_TASKS, WorkerPool
+from scene_scan import default_index
+from event_channel import BatchProgress, format_progress
+
+
+class JobEvents(QObject):
+    # Events arrive on socket reader threads; the signal hands them to the UI thread
+    received = Signal(dict)
 
 
 class MainWindow(QWidget):
@@ -25,6 +46,10 @@ class MainWindow(QWidget):
         self.sharder_script = os.path.join(self.BASE_DIR, "script", "sharder_export.py")
         self.cache_script = os.path.join(self.BASE_DIR, "script", "cache_script.py")
         self.cache_sharder_script = os.path.join(self.BASE_DIR, "script", "cache_sharder_script.py")
+        self.worker_pool = None
+        self.batch_lock = threading.Lock()
+        self.progress = BatchProgress()
+        self.job_events = JobEvents()
         self.load_ui()
         self.setup_widgets()
         self.setup_styles()
@@ -54,6 +79,14 @@ class MainWindow(QWidget):
         self.button_Sharder = self.window.findChild(QPushButton, "Sharder_Button")
         self.button_Cache = self.window.findChild(QPushButton, "Cache_Button")
         self.button_Cac_shd = self.window.findChild(QPushButton, "Cache_Sharder_Button")
+        self.Workers_spin = self.window.findChild(QSpinBox, "Workers_spin")
+        self.Workers_spin.setRange(1, max(os.cpu_count() or 1, 1))
+        self.Workers_spin.setValue(default_worker_count())
+        self.Warm_check = self.window.findChild(QCheckBox, "Warm_check")
+        self.Force_check = self.window.findChild(QCheckBox, "Force_check")
+        self.Progress_bar = self.window.findChild(QProgressBar, "Progress_bar")
+        self.Progress_bar.setRange(0, 1000)
+        self.Status_label = self.window.findChild(QLabel, "Status_label")
         self.listView_Sharder.model = QStringListModel()
         self.listView_Sharder.setModel(self.listView_Sharder.model)
         self.listView_Sharder.files = []
@@ -97,6 +130,18 @@ class MainWindow(QWidget):
         self.button_Sharder.clicked.connect(self.open_selected_maya_with_sharder)
         self.button_Cache.clicked.connect(self.open_selected_maya_with_cache)
         self.button_Cac_shd.clicked.connect(self.run_cache_sharder_script)
+        self.job_events.received.connect(self.on_job_event)
+
+    def on_job_event(self, event):
+        self.progress.update(event)
+        snapshot = self.progress.snapshot()
+        self.Progress_bar.setValue(int(snapshot["progress"] * 1000))
+        text = format_progress(snapshot)
+        if event.get("event") in ("stage_start", "asset", "job_done"):
+            name = os.path.basename(event.get("job") or "")
+            detail = event.get("stage") or event.get("name") or event.get("status")
+            text += f"  |  {name}: {event['event']} {detail}"
+        self.Status_label.setText(text)
 
     def load_ma_files(self, line_edit, list_view):
         folder = line_edit.text().strip()
@@ -105,64 +150,54 @@ class MainWindow(QWidget):
             print("Invalid folder:", folder)
             return
 
-        names, paths = [], []
+        index = default_index()
+        scenes = index.scan_folder(folder)
+        index.save()
 
-        for file in os.listdir(folder):
-            if file.lower().endswith(".ma"):
-                names.append(file)
-                paths.append(os.path.join(folder, file))
+        paths = list(scenes)
+        names = [os.path.basename(path) for path in paths]
 
         list_view.model.setStringList(names)
         list_view.files = paths
 
     def get_maya_version(self, maya_scene_file):
+        return get_maya_version(maya_scene_file)
+
+    def get_worker_pool(self, size):
+        if self.worker_pool is None or self.worker_pool.size != size:
+            if self.worker_pool is not None:
+                self.worker_pool.close()
+            self.worker_pool = WorkerPool(size=size)
+        return self.worker_pool
+
+    def close_worker_pool(self):
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+            self.worker_pool = None
+
+    def open_maya_batch(self, files, script_path, headless=True):
+        if not headless:
+            # An interactive Maya stays open for the whole lighting session, so
+            # it is not a batch: it runs outside the lock and off the progress bar
+            runner = BatchRunner(max_workers=self.Workers_spin.value(), headless=False)
+            runner.force = self.Force_check.isChecked()
+            return runner.run([BatchJob(file_path, script_path) for file_path in files])
+        # Batches share the worker pool and the progress display, so they run
+        # one at a time; a second click waits for the running batch
+        if not self.batch_lock.acquire(blocking=False):
+            print("Waiting for the running batch to finish...")
+            self.batch_lock.acquire()
         try:
-            with open(maya_scene_file, "r") as f:
-                first_line = f.readline().strip()
-        except Exception as e:
-            print("Failed to read file:", e)
-            return None
-
-        for year in range(2022, 2027):
-            if first_line.startswith(f"//Maya ASCII {year}"):
-                return year
-        return None
-
-    def open_maya_sequentially(self, files, script_path):
-        total_files = len(files)
-        print(f"Starting batch process for {total_files} file(s)...\n")
-
-        for idx, file_path in enumerate(files, start=1):
-            print(f"[{idx}/{total_files}] Processing: {file_path}")
-
-            # Determine Maya version
-            year = self.get_maya_version(file_path)
-            if not year:
-                print(f"   Skipping (version not found): {file_path}\n")
-                continue
-
-            maya_exe = rf"C:\Program Files\Autodesk\Maya{year}\bin\maya.exe"
-            if not os.path.exists(maya_exe):
-                print(f"   Skipping (Maya not found): {maya_exe}\n")
-                continue
-
-            script_path_maya = script_path.replace("\\", "/")
-            file_path_maya = file_path.replace("\\", "/")
-
-            # Maya command: inject scene_path
-            maya_command = (
-                f'python("scene_path = r\'{file_path_maya}\'; '
-                f'exec(open(r\'{script_path_maya}\').read())")'
-            )
-
-            print(f"  Launching Maya {year}...\n")
-            process = subprocess.Popen([maya_exe, "-command", maya_command])
-            process.wait()  # Wait for this Maya instance to finish
-
-            print(f"  Finished: {file_path}\n")
-
-        print("Batch process completed for all files.")
-
+            if self.Warm_check.isChecked() and task_for_script(script_path) in WORKER_TASKS:
+                runner = self.get_worker_pool(self.Workers_spin.value())
+            else:
+                runner = BatchRunner(max_workers=self.Workers_spin.value())
+            runner.force = self.Force_check.isChecked()
+            runner.event_callback = self.job_events.received.emit
+            jobs = [BatchJob(file_path, script_path) for file_path in files]
+            return runner.run(jobs)
+        finally:
+            self.batch_lock.release()
 
     def open_selected_maya_with_sharder(self):
         indexes = self.listView_Sharder.selectedIndexes()
@@ -174,7 +209,7 @@ class MainWindow(QWidget):
         files = [self.listView_Sharder.files[row] for row in rows]
 
         threading.Thread(
-            target=self.open_maya_sequentially,
+            target=self.open_maya_batch,
             args=(files, self.sharder_script),
             daemon=True
         ).start()
@@ -189,7 +224,7 @@ class MainWindow(QWidget):
         files = [self.listView_Cache.files[row] for row in rows]
 
         threading.Thread(
-            target=self.open_maya_sequentially,
+            target=self.open_maya_batch,
             args=(files, self.cache_script),
             daemon=True
         ).start()
@@ -208,13 +243,9 @@ class MainWindow(QWidget):
                 f"The directory path is invalid:\n{folder}"
             )
             return
-        json_file = None
-        for file in os.listdir(folder):
-            if file.lower().endswith("scene_lit.json"):
-                json_file = os.path.join(folder, file)
-                break
+        json_files = find_scene_lits(folder)
 
-        if not json_file:
+        if not json_files:
             QMessageBox.warning(
                 self.window,
                 "JSON Not Found",
@@ -222,6 +253,19 @@ class MainWindow(QWidget):
             )
             return
 
+        if len(json_files) > 1:
+            # A whole sequence: every shot is built under mayapy and saved as
+            # Cache_<scene>/<scene>_lighting.ma
+            print(f"Building {len(json_files)} lighting scenes headless")
+            threading.Thread(
+                target=self.open_maya_batch,
+                args=(json_files, self.cache_sharder_script),
+                daemon=True
+            ).start()
+            return
+
+        json_file = json_files[0]
+
         print("JSON Found:", json_file)
         try:
             with open(json_file, "r") as f:
@@ -243,30 +287,26 @@ class MainWindow(QWidget):
             )
             return
 
-        maya_exe = rf"C:\Program Files\Autodesk\Maya{maya_version}\bin\maya.exe"
+        maya_exe = maya_executable(maya_version)
         print("Maya Executable:", maya_exe)
-        script_path_maya = self.cache_sharder_script.replace("\\", "/")
-        json_file_maya = json_file.replace("\\", "/")
-
-        maya_command = (
-            f'python("json_path = r\'{json_file_maya}\'; '
-            f'exec(open(r\'{script_path_maya}\').read())")'
-        )
-
-        print("Maya Command:", maya_command)
-
-        try:
-            subprocess.Popen([maya_exe, "-command", maya_command])
-        except Exception as e:
+        if not os.path.exists(maya_exe):
             QMessageBox.critical(
                 self.window,
                 "Maya Launch Failed",
-                f"Failed to launch Maya:\n{maya_exe}\n\nError: {e}"
+                f"Maya executable not found:\n{maya_exe}"
             )
+            return
+
+        threading.Thread(
+            target=self.open_maya_batch,
+            args=([json_file], self.cache_sharder_script, False),
+            daemon=True
+        ).start()
 
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     main_window = MainWindow()
+    app.aboutToQuit.connect(main_window.close_worker_pool)
     sys.exit(app.exec())
 
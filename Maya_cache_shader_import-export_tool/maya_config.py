@@ -0,0 +1,69 @@
+import os
+import sys
+import json
+import threading
+
+
+DEFAULT_LOCATIONS = {
+    "win32": r"C:\Program Files\Autodesk\Maya{year}",
+    "darwin": "/Applications/Autodesk/maya{year}/Maya.app/Contents",
+    "linux": "/usr/autodesk/maya{year}",
+}
+
+_config = None
+_config_lock = threading.Lock()
+
+
+def config_path():
+    return os.environ.get(
+        "MAYA_PIPELINE_CONFIG",
+        os.path.join(os.path.expanduser("~"), ".maya_pipeline", "maya_versions.json")
+    )
+
+
+def load_config():
+    # {"2023": {"location": "...", "maya": "...", "mayapy": "...", "env": {...}}, ...}
+    # Every key is optional; missing paths come from the install location.
+    global _config
+    with _config_lock:
+        if _config is None:
+            try:
+                with open(config_path(), "r") as f:
+                    _config = json.load(f)
+            except FileNotFoundError:
+                _config = {}
+            except (OSError, ValueError) as e:
+                print("Ignoring bad Maya config:", config_path(), e)
+                _config = {}
+        return _config
+
+
+def platform_key():
+    if sys.platform == "win32":
+        return "win32"
+    if sys.platform == "darwin":
+        return "darwin"
+    return "linux"
+
+
+class MayaInstall:
+    def __init__(self, year, location, maya=None, mayapy=None, env=None):
+        self.year = year
+        self.location = location
+        exe = ".exe" if platform_key() == "win32" else ""
+        self.maya = maya or os.path.join(location, "bin", "maya" + exe)
+        self.mayapy = mayapy or os.path.join(location, "bin", "mayapy" + exe)
+        self.env = env or {}
+
+
+def resolve(year):
+    # Config entry, then MAYA<year>_LOCATION / MAYA_LOCATION, then the platform default
+    entry = load_config().get(str(year), {})
+    location = (
+        entry.get("location")
+        or os.environ.get(f"MAYA{year}_LOCATION")
+        or os.environ.get("MAYA_LOCATION")
+        or DEFAULT_LOCATIONS[platform_key()].format(year=year)
+    )
+    env = {key: os.path.expandvars(str(value)) for key, value in entry.get("env", {}).items()}
+    return MayaInstall(year, location, entry.get("maya"), entry.get("mayapy"), env)
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+
+
+METRICS_ENV = "MAYA_PIPELINE_METRICS"
+
+
+def metrics_dir():
+    return os.environ.get(
+        "MAYA_PIPELINE_METRICS_DIR",
+        os.path.join(os.path.expanduser("~"), ".maya_pipeline", "metrics")
+    )
+
+
+def new_batch_metrics_path():
+    folder = metrics_dir()
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    name = "batch_{}_{}.jsonl".format(time.strftime("%Y%m%d_%H%M%S"), os.getpid())
+    return os.path.join(folder, name)
+
+
+def load_records(path):
+    records = []
+    if not path or not os.path.exists(path):
+        return records
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                print("Skipping bad metrics line:", line[:80])
+    return records
+
+
+def build_report(records, top=10):
+    scenes = sorted(records, key=lambda record: record.get("duration", 0), reverse=True)
+
+    stage_totals = {}
+    stage_instances = []
+    for record in records:
+        for name, stage in record.get("stages", {}).items():
+            key = (record.get("job"), name)
+            total = stage_totals.setdefault(key, {"job": key[0], "stage": name, "seconds": 0.0, "scenes": 0})
+            total["seconds"] += stage["seconds"]
+            total["scenes"] += 1
+            stage_instances.append({
+                "job": record.get("job"),
+                "scene": record.get("scene"),
+                "stage": name,
+                "seconds": stage["seconds"],
+            })
+
+    stages = sorted(stage_totals.values(), key=lambda stage: stage["seconds"], reverse=True)
+    for stage in stages:
+        stage["seconds"] = round(stage["seconds"], 3)
+        stage["mean_seconds"] = round(stage["seconds"] / stage["scenes"], 3)
+    stage_instances.sort(key=lambda stage: stage["seconds"], reverse=True)
+
+    return {
+        "jobs": len(records),
+        "failed": sum(1 for record in records if record.get("status") != "ok"),
+        "total_seconds": round(sum(record.get("duration", 0) for record in records), 3),
+        "peak_memory_mb": max([record.get("peak_memory_mb") or 0 for record in records] or [0]),
+        "slowest_scenes": [
+            {
+                "job": record.get("job"),
+                "scene": record.get("scene"),
+                "duration": record.get("duration"),
+                "status": record.get("status"),
+                "peak_memory_mb": record.get("peak_memory_mb"),
+                "counts": record.get("counts", {}),
+            }
+            for record in scenes[:top]
+        ],
+        "slowest_stages": stages[:top],
+        "slowest_stage_runs": stage_instances[:top],
+    }
+
+
+def format_report(report):
+    lines = [
+        f"Metrics: {report['jobs']} job(s), {report['failed']} failed, "
+        f"{report['total_seconds']}s total, peak {report['peak_memory_mb']} MB"
+    ]
+    if report["slowest_scenes"]:
+        lines.append("  Slowest scenes:")
+        for scene in report["slowest_scenes"]:
+            lines.append(f"    {scene['duration']:>9.1f}s  {scene['job']:<7} {scene['scene']}")
+    if report["slowest_stages"]:
+        lines.append("  Slowest stages (all scenes):")
+        for stage in report["slowest_stages"]:
+            lines.append(f"    {stage['seconds']:>9.1f}s  {stage['job']}.{stage['stage']} "
+                         f"(mean {stage['mean_seconds']}s over {stage['scenes']})")
+    return "\n".join(lines)
+
+
+def write_report(metrics_path, report):
+    report_path = os.path.splitext(metrics_path)[0] + "_report.json"
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=4)
+    return report_path
+
+
+def summarize(metrics_path, log=print):
+    records = load_records(metrics_path)
+    if not records:
+        return None
+    report = build_report(records)
+    report["metrics_path"] = metrics_path
+    report["report_path"] = write_report(metrics_path, report)
+    log(format_report(report))
+    return report
@@ -0,0 +1,46 @@
+import os
+
+from scene_scan import default_index
+from build_manifest import resolve_reference
+
+
+def plan_references(scene_path, always_load=None, index=None):
+    # Decides, without Maya, which top-level references a cache export needs:
+    # those whose file has a Cache/cache set or a camera, those the job lists
+    # (namespace, reference node or file name) and any that can't be parsed.
+    # Returns None when the scene can't be opened selectively.
+    index = index or default_index()
+    info = index.get(scene_path)
+    if not info:
+        return None
+
+    always_load = set(always_load or [])
+    scene_dir = os.path.dirname(os.path.abspath(scene_path))
+    plan = {"load": [], "skip": [], "reasons": {}}
+    for ref in info.get("references", []):
+        ref_node = ref.get("ref_node")
+        if not ref_node:
+            return None
+        path = resolve_reference(ref["file"], scene_dir)
+
+        listed = {ref.get("namespace"), ref_node, os.path.basename(path)} & always_load
+        if listed:
+            reason = "listed"
+        elif ref.get("deferred"):
+            # Saved unloaded; a normal open leaves it unloaded too
+            plan["skip"].append(ref_node)
+            continue
+        else:
+            contents = index.contents(path) if os.path.exists(path) else None
+            if contents is None:
+                reason = "unknown"
+            elif contents["cache_sets"]:
+                reason = "cache_set"
+            elif contents["cameras"]:
+                reason = "camera"
+            else:
+                plan["skip"].append(ref_node)
+                continue
+        plan["load"].append(ref_node)
+        plan["reasons"][ref_node] = reason
+    return plan
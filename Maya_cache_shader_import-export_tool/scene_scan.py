@@ -0,0 +1,261 @@
+import os
+import re
+import json
+import shlex
+import threading
+
+
+HEADER_COMMANDS = ("file", "requires", "currentUnit", "fileInfo")
+TAIL_PROBE_BYTES = 64 * 1024
+INDEX_VERSION = 2
+
+VERSION_RE = re.compile(r"^//Maya ASCII (\d{4})")
+NUMBER_RE = re.compile(r"^-?[\d.]+$")
+PLAYBACK_RE = re.compile(r"playbackOptions((?:\s+-\w+\s+-?[\d.]+)+)")
+CREATE_NODE_RE = re.compile(r'^createNode (objectSet|camera) -n "([^"]+)"(.*);')
+CACHE_SET_NAMES = ("Cache", "cache")
+DEFAULT_CAMERAS = ("perspShape", "topShape", "frontShape", "sideShape")
+
+
+def default_index_path():
+    return os.environ.get(
+        "MAYA_PIPELINE_INDEX",
+        os.path.join(os.path.expanduser("~"), ".maya_pipeline", "scene_index.json")
+    )
+
+
+def iter_header_statements(f):
+    # Yields (command, tokens) for each header statement and stops at the
+    # first statement that isn't part of the header (usually createNode).
+    statement = ""
+    for line in f:
+        stripped = line.strip()
+        if not statement:
+            if not stripped or stripped.startswith("//"):
+                continue
+            if stripped.split(None, 1)[0] not in HEADER_COMMANDS:
+                return
+        statement += " " + stripped
+        if not statement.endswith(";"):
+            continue
+        try:
+            tokens = shlex.split(statement[:-1])
+        except ValueError:
+            tokens = statement[:-1].split()
+        statement = ""
+        if tokens:
+            yield tokens[0], tokens[1:]
+
+
+def is_flag(token):
+    return token.startswith("-") and not NUMBER_RE.match(token)
+
+
+def parse_flags(args):
+    flags, values = {}, []
+    idx = 0
+    while idx < len(args):
+        arg = args[idx]
+        if is_flag(arg) and idx + 1 < len(args) and not is_flag(args[idx + 1]):
+            flags[arg[1:]] = args[idx + 1]
+            idx += 2
+            continue
+        if is_flag(arg):
+            flags[arg[1:]] = True
+        else:
+            values.append(arg)
+        idx += 1
+    return flags, values
+
+
+def read_playback_range(path, size):
+    # playbackOptions lives in sceneConfigurationScriptNode near the end of the file
+    with open(path, "rb") as f:
+        f.seek(max(0, size - TAIL_PROBE_BYTES))
+        tail = f.read().decode("utf-8", "replace")
+
+    match = None
+    for match in PLAYBACK_RE.finditer(tail):
+        pass
+    if not match:
+        return {}
+    flags, _ = parse_flags(match.group(1).split())
+    playback = {}
+    for key in ("min", "max", "ast", "aet"):
+        if key in flags:
+            playback[key] = float(flags[key])
+    return playback
+
+
+def scan_scene(path):
+    info = {
+        "maya_version": None,
+        "references": [],
+        "requires": [],
+        "units": {},
+        "file_info": {},
+        "playback": {},
+    }
+    if not path.lower().endswith(".ma"):
+        return info
+
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        match = VERSION_RE.match(f.readline())
+        if match:
+            info["maya_version"] = int(match.group(1))
+
+        # Every top-level "file -r" line carries -dr 1; the load state is on the
+        # "file -rdi 1" lines, where an unloaded reference is missing or has -dr 1
+        load_state = {}
+        for command, args in iter_header_statements(f):
+            flags, values = parse_flags(args)
+            if command == "file" and flags.get("rdi") == "1":
+                if flags.get("rfn"):
+                    load_state[flags["rfn"]] = flags.get("dr") != "1"
+            elif command == "file" and "r" in flags and values:
+                info["references"].append({
+                    "file": values[-1],
+                    "namespace": flags.get("ns"),
+                    "ref_node": flags.get("rfn"),
+                    "type": flags.get("typ"),
+                    "deferred": False,
+                })
+            elif command == "requires" and len(values) >= 2:
+                info["requires"].append({"plugin": values[0], "version": values[1]})
+                if values[0] == "maya" and not info["maya_version"]:
+                    year = re.match(r"\d{4}", values[1])
+                    info["maya_version"] = int(year.group(0)) if year else None
+            elif command == "currentUnit":
+                units = {"l": "linear", "a": "angle", "t": "time"}
+                for flag, key in units.items():
+                    if flag in flags:
+                        info["units"][key] = flags[flag]
+            elif command == "fileInfo" and len(values) >= 2:
+                info["file_info"][values[0]] = values[1]
+
+    if load_state:
+        for ref in info["references"]:
+            ref["deferred"] = not load_state.get(ref["ref_node"], False)
+    info["playback"] = read_playback_range(path, os.path.getsize(path))
+    return info
+
+
+def scan_contents(path):
+    # Reads the whole file, so it is only done on demand (SceneIndex.contents):
+    # top-level cache sets and non-default cameras created in the file
+    contents = {"cache_sets": [], "cameras": []}
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if not line.startswith("createNode "):
+                continue
+            match = CREATE_NODE_RE.match(line.rstrip())
+            if not match:
+                continue
+            node_type, name, rest = match.groups()
+            if node_type == "objectSet" and name in CACHE_SET_NAMES and " -p " not in rest:
+                contents["cache_sets"].append(name)
+            elif node_type == "camera" and name not in DEFAULT_CAMERAS:
+                contents["cameras"].append(name)
+    return contents
+
+
+class SceneIndex:
+    def __init__(self, index_path=None):
+        self.index_path = index_path or default_index_path()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.entries = self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != INDEX_VERSION:
+            return {}
+        return data.get("scenes", {})
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": INDEX_VERSION, "scenes": dict(self.entries)}
+            self._dirty = False
+
+        index_dir = os.path.dirname(self.index_path)
+        if index_dir and not os.path.exists(index_dir):
+            os.makedirs(index_dir)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.index_path)
+
+    def get(self, path):
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            print("Failed to read file:", e)
+            return None
+
+        with self._lock:
+            entry = self.entries.get(path)
+        if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            return entry["info"]
+
+        try:
+            info = scan_scene(path)
+        except OSError as e:
+            print("Failed to read file:", e)
+            return None
+
+        with self._lock:
+            self.entries[path] = {"mtime": stat.st_mtime, "size": stat.st_size, "info": info}
+            self._dirty = True
+        return info
+
+    def contents(self, path):
+        # None for files that can't be parsed (e.g. .mb); cached like the header scan
+        path = os.path.abspath(path)
+        if not path.lower().endswith(".ma") or self.get(path) is None:
+            return None
+        with self._lock:
+            entry = self.entries.get(path)
+            if entry and "contents" in entry:
+                return entry["contents"]
+        try:
+            contents = scan_contents(path)
+        except OSError as e:
+            print("Failed to read file:", e)
+            return None
+        with self._lock:
+            entry = self.entries.get(path)
+            if entry:
+                entry["contents"] = contents
+                self._dirty = True
+        return contents
+
+    def maya_version(self, path):
+        info = self.get(path)
+        return info["maya_version"] if info else None
+
+    def scan_folder(self, folder, extensions=(".ma",)):
+        scenes = {}
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith(extensions):
+                path = os.path.join(folder, name)
+                scenes[path] = self.get(path)
+        return scenes
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def default_index():
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = SceneIndex()
+        return _default_index
@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import time
+import shlex
+import shutil
+import subprocess
+
+
+FANOUT_DIR = "_abc_fanout"
+
+
+def default_command():
+    # Inside a Maya session sys.executable is maya(.exe); mayapy sits next to it
+    exe = os.environ.get("MAYAPY_EXECUTABLE")
+    if not exe:
+        name = "mayapy.exe" if sys.platform == "win32" else "mayapy"
+        exe = os.path.join(os.path.dirname(sys.executable), name)
+    return [exe]
+
+
+def split_jobs(jobs, workers):
+    # Biggest jobs (most roots) first, each to the least loaded chunk
+    chunks = [[] for _ in range(max(1, min(workers, len(jobs))))]
+    loads = [0] * len(chunks)
+    for job in sorted(jobs, key=lambda job: job["args"].count(" -root "), reverse=True):
+        index = loads.index(min(loads))
+        chunks[index].append(job)
+        loads[index] += max(1, job["args"].count(" -root "))
+    return [chunk for chunk in chunks if chunk]
+
+
+def fan_out(scene_path, jobs, workers, work_dir, command=None):
+    # jobs: [{"name", "file", "args"}]. Returns {file: {"status", "error", "seconds"}}
+    if isinstance(command, str):
+        command = shlex.split(command)
+    command = list(command or default_command())
+    if not os.path.exists(work_dir):
+        os.makedirs(work_dir)
+
+    processes = []
+    for index, chunk in enumerate(split_jobs(jobs, workers)):
+        chunk_path = os.path.join(work_dir, "chunk_%d.json" % index)
+        result_path = os.path.join(work_dir, "chunk_%d_result.json" % index)
+        with open(chunk_path, "w") as f:
+            json.dump({"scene": scene_path, "jobs": chunk, "result": result_path}, f, indent=4)
+        log_path = os.path.join(work_dir, "chunk_%d.log" % index)
+        log = open(log_path, "w")
+        process = subprocess.Popen(command + [os.path.abspath(__file__), chunk_path],
+                                   stdout=log, stderr=subprocess.STDOUT)
+        processes.append((process, chunk, result_path, log, log_path))
+        print("Alembic worker %d: %d job(s), pid %d" % (index, len(chunk), process.pid))
+
+    results = {}
+    for process, chunk, result_path, log, log_path in processes:
+        returncode = process.wait()
+        log.close()
+        chunk_results = {}
+        if os.path.exists(result_path):
+            with open(result_path, "r") as f:
+                chunk_results = json.load(f)
+        for job in chunk:
+            results[job["file"]] = chunk_results.get(job["file"]) or {
+                "status": "error",
+                "error": "Worker exited with code %s before exporting (see %s)" % (returncode, log_path),
+                "seconds": 0.0,
+            }
+    return results
+
+
+def cleanup(work_dir):
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def export_chunk(chunk_path):
+    # Runs in each worker: open the baked scene once, export every job on its own
+    # so one failing asset doesn't lose the others
+    with open(chunk_path, "r") as f:
+        chunk = json.load(f)
+
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    import maya.cmds as cmds
+
+    results = {}
+    try:
+        for plugin in ["AbcExport.mll", "AbcExport"]:
+            try:
+                cmds.loadPlugin(plugin, quiet=True)
+                break
+            except RuntimeError:
+                pass
+        cmds.file(chunk["scene"], open=True, force=True)
+        for job in chunk["jobs"]:
+            start = time.time()
+            try:
+                cmds.AbcExport(j=[job["args"]])
+                results[job["file"]] = {"status": "ok", "error": None}
+            except Exception as e:
+                results[job["file"]] = {"status": "error", "error": str(e)}
+            results[job["file"]]["seconds"] = round(time.time() - start, 3)
+            print("Alembic export", results[job["file"]]["status"], job["file"])
+    finally:
+        with open(chunk["result"], "w") as f:
+            json.dump(results, f, indent=4)
+        try:
+            maya.standalone.uninitialize()
+        except Exception:
+            pass
+
+
+if __name__ == "__main__":
+    export_chunk(sys.argv[1])
@@ -0,0 +1,112 @@
+import sys
+import maya.cmds as cmds
+
+import job_events
+
+
+EVALUATION_MODES = ("off", "serial", "parallel")
+
+
+class BakePlan:
+    def __init__(self, start_frame, end_frame, evaluation_mode=None, suspend_viewport=True):
+        if evaluation_mode and evaluation_mode not in EVALUATION_MODES:
+            raise RuntimeError(f"Unknown evaluation mode: {evaluation_mode}")
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.evaluation_mode = evaluation_mode
+        self.suspend_viewport = suspend_viewport
+        self.nodes = []
+        self._seen = set()
+
+    def add(self, nodes):
+        for node in nodes or []:
+            if node not in self._seen:
+                self._seen.add(node)
+                self.nodes.append(node)
+
+    def add_controls(self, references):
+        for ref in references:
+            self.add(ref.controls)
+
+    def add_camera(self, camera):
+        # Expand the hierarchy ourselves (transforms and shapes) so the camera
+        # can share one bakeResults call with the controls, which must not
+        # bake their curve shapes.
+        self.add([camera])
+        self.add(cmds.listRelatives(camera, ad=True, f=True) or [])
+
+    def add_constrained_roots(self, references):
+        roots = [root for ref in references for root in ref.cache_roots]
+        if not roots:
+            return
+        constraints = cmds.listRelatives(roots, c=True, f=True, type="constraint") or []
+        self.add(sorted(set(constraint.rsplit("|", 1)[0] for constraint in constraints)))
+
+    def _set_evaluation_mode(self, mode):
+        try:
+            previous = cmds.evaluationManager(q=True, mode=True)
+            cmds.evaluationManager(mode=mode)
+            return previous[0] if previous else None
+        except Exception as e:
+            print("Could not set evaluation mode:", mode, e)
+            return None
+
+    def run(self):
+        if not self.nodes:
+            print("Nothing to bake.")
+            return False
+
+        previous_mode = None
+        if self.evaluation_mode:
+            previous_mode = self._set_evaluation_mode(self.evaluation_mode)
+
+        # Viewport and scriptJob calls are for interactive sessions only
+        interactive = not cmds.about(batch=True)
+        suspend_viewport = self.suspend_viewport and interactive
+        focused_panel = None
+        if suspend_viewport:
+            current_pane = cmds.getPanel(withFocus=True)
+            if current_pane and cmds.getPanel(typeOf=current_pane) == "modelPanel":
+                focused_panel = current_pane
+                cmds.modelEditor(focused_panel, edit=True, alo=False)
+            cmds.refresh(suspend=True)
+
+        progress_job = None
+        if job_events.enabled() and interactive:
+            # Best effort: bakeResults steps the time for a simulation bake
+            start, end = self.start_frame, self.end_frame
+            progress_job = cmds.scriptJob(event=["timeChanged", lambda: job_events.frame(
+                "bake", cmds.currentTime(q=True), start, end)])
+
+        try:
+            # One timeline evaluation for every node in the plan
+            cmds.bakeResults(
+                self.nodes,
+                simulation=True,
+                t=(self.start_frame, self.end_frame),
+                sb=1,
+                disableImplicitControl=True,
+                preserveOutsideKeys=True,
+                sparseAnimCurveBake=False,
+                removeBakedAttributeFromLayer=False,
+                removeBakedAnimFromLayer=False,
+                bakeOnOverrideLayer=False,
+                minimizeRotation=True,
+                controlPoints=False,
+                shape=False
+            )
+            print("Bake Completed Successfully:", len(self.nodes), "node(s)")
+            return True
+        except Exception:
+            print("Error in baking")
+            print(sys.exc_info())
+            return False
+        finally:
+            if progress_job is not None:
+                cmds.scriptJob(kill=progress_job, force=True)
+            if suspend_viewport:
+                cmds.refresh(suspend=False)
+                if focused_panel:
+                    cmds.modelEditor(focused_panel, edit=True, alo=True)
+            if previous_mode:
+                self._set_evaluation_mode(previous_mode)
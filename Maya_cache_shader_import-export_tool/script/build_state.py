@@ -0,0 +1,61 @@
+import os
+import json
+import hashlib
+import maya.cmds as cmds
+
+
+BUILD_STATE_KEY = "lightingBuild"
+
+
+def load_build_state():
+    # Per-asset build state saved in the scene's fileInfo by the lighting build
+    values = cmds.fileInfo(BUILD_STATE_KEY, q=True) or []
+    if not values:
+        return {}
+    value = values[0]
+    try:
+        return json.loads(value)
+    except ValueError:
+        # Some Maya versions return the value with its quotes still escaped
+        try:
+            return json.loads(value.encode("utf-8").decode("unicode_escape"))
+        except ValueError:
+            print("Ignoring unreadable build state in fileInfo")
+            return {}
+
+
+def save_build_state(state):
+    cmds.fileInfo(BUILD_STATE_KEY, json.dumps(state, sort_keys=True))
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_signature(path, previous=None):
+    # Size and mtime; the file is only hashed when they differ from a previous
+    # signature, so an untouched file costs one stat
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    signature = {"size": stat.st_size, "mtime": stat.st_mtime}
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime") == stat.st_mtime:
+        if previous.get("sha256"):
+            signature["sha256"] = previous["sha256"]
+    elif previous:
+        signature["sha256"] = file_hash(path)
+    return signature
+
+
+def file_changed(previous, signature):
+    # A rewritten file with the same contents (same SHA-256) counts as unchanged
+    if not previous or not signature:
+        return previous != signature
+    if previous.get("size") == signature["size"] and previous.get("mtime") == signature["mtime"]:
+        return False
+    return not previous.get("sha256") or previous["sha256"] != signature.get("sha256")
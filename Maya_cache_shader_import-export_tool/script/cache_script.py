@@ -4,8 +4,16 @@ import maya.mel as mel
 import os
 import json
 
+from job_metrics import JobMetrics
+from reference_scan import open_scene, scan_references
+from bake_planner import BakePlan
+from job_options import get_flag, get_option
+import abc_fanout
+import job_events
+
 class ExportAlembic:
     def __init__(self):
+        self.metrics = None
         for plugin in ['AbcExport.mll', 'AbcImport.mll', 'fbxmaya.mll']:
             if not cmds.pluginInfo(plugin, q=True, l=True):
                 try:
@@ -14,78 +22,83 @@ class ExportAlembic:
                     pass
 
     def open_maya(self, scene_path=None):
+        with JobMetrics("cache", scene_path) as metrics:
+            self.metrics = metrics
+            self.export_cache(scene_path)
+
+    def export_cache(self, scene_path=None):
+        metrics = self.metrics
 
         if scene_path:
             if not os.path.exists(scene_path):
                 raise RuntimeError(f"Scene file not found: {scene_path}")
-            cmds.file(scene_path, open=True, force=True)
+            plan = get_option("reference_plan")
+            with metrics.stage("open_scene"):
+                loaded = open_scene(scene_path, plan)
+            if loaded is not None:
+                metrics.count("loaded_references", len(loaded))
+                metrics.count("skipped_references", len(plan.get("skip", [])))
 
-        self.bakeConstraints()
+        with metrics.stage("reference_scan"):
+            references = scan_references()
+        metrics.count("references", len(references))
+
+        shot_camera = self.find_shot_camera()
+        with metrics.stage("bake"):
+            self.bake(references, shot_camera)
 
         scene_path = cmds.file(q=True, sn=True)
         if not scene_path:
             cmds.error("Scene is not saved. Please save the scene first.")
+        metrics.scene_path = scene_path
         scene_dir = os.path.dirname(scene_path)
         scene_name = os.path.splitext(os.path.basename(scene_path))[0]
         cache_folder_name = "Cache_{}".format(scene_name)
         cache_file_dir = os.path.join(scene_dir, cache_folder_name).replace("\\", "/")
         if not os.path.exists(cache_file_dir):
             os.makedirs(cache_file_dir)
+        metrics.output_dir = cache_file_dir
         print("Cache Directory:", cache_file_dir)
         self.shot_first_frame = cmds.playbackOptions(min=True, q=True)
         self.shot_last_frame = cmds.playbackOptions(max=True, q=True)
-        alembic_cmd_list = []
-        for panel in cmds.getPanel(all=True):
-            if panel.startswith('modelPanel'):
-                cmds.modelEditor(panel, e=True, displayAppearance='boundingBox')
-
-        for each in cmds.file(r=True, q=True):
-            namespace = cmds.file(each, namespace=True, q=True)
-            cache_file_path_local = "%s/%s.abc" % (cache_file_dir, os.path.basename(each).replace(".ma", ""))
-            cache_node = '%s:Cache' % namespace if cmds.objExists('%s:Cache' % namespace) else '%s:cache' % namespace
-            cache_node_connection = cmds.listConnections(cache_node, s=True, d=False) or []
-            if cache_node_connection:
-                cache_nodes = ""
-                for cache_set in cache_node_connection:
-                    cmds.select(cache_set)
-                    # nodeName = cmds.ls(sl=True)[0]
-                    cache_nodes += " -root " + cache_set
-                alembic_cmd_list.append(
-                    "-frameRange " + str(self.shot_first_frame) + " " + str(self.shot_last_frame) +
-                    " -stripNamespaces -uvWrite -writeFaceSets -worldSpace -writeVisibility -dataFormat ogawa "
-                    + cache_nodes +
-                    " -file " + "\"%s\"" % cache_file_path_local)
+        metrics.count("frames", int(self.shot_last_frame - self.shot_first_frame) + 1)
+        alembic_jobs = []
+        # mayapy has no panels; getPanel returns None there
+        if not cmds.about(batch=True):
+            for panel in cmds.getPanel(all=True) or []:
+                if panel.startswith('modelPanel'):
+                    cmds.modelEditor(panel, e=True, displayAppearance='boundingBox')
 
-            try:
-                frist_cam = [each for each in cmds.listCameras() if
-                             not cmds.referenceQuery(each, inr=True) and not re.search(r"front|persp|side|top", each,
-                                                                                       re.I)]
-                frist_cam = frist_cam[0]
-                cmds.select(frist_cam)
-                cache_file_path_local = "%s/%s.abc" % (cache_file_dir, frist_cam)
-                cache_nodes = ""
-                cache_nodes += " -root |" + frist_cam
-
-                cmds.bakeResults('%s' % frist_cam, simulation=True, t=(self.shot_first_frame, self.shot_last_frame),
-                                 hierarchy='below', sampleBy=1, disableImplicitControl=True,
-                                 preserveOutsideKeys=True, sparseAnimCurveBake=False,
-                                 removeBakedAttributeFromLayer=False, removeBakedAnimFromLayer=False,
-                                 bakeOnOverrideLayer=False, minimizeRotation=True, controlPoints=False,
-                                 shape=True)
-
-                alembic_cmd_list.append(
-                    "-frameRange " + str(self.shot_first_frame) + " " + str(self.shot_last_frame) +
-                    " -stripNamespaces -uvWrite -writeFaceSets -worldSpace -writeVisibility -dataFormat ogawa "
-                    + cache_nodes +
-                    " -file " + "\"%s\"" % cache_file_path_local)
-                print('alembic_cmd_list++++++', alembic_cmd_list)
-            except Exception as error:
-                print(error)
+        for ref in references:
+            cache_file_path_local = self.cache_file_path(cache_file_dir, ref.ref_file)
+            if ref.cache_roots:
+                metrics.count("cache_roots", len(ref.cache_roots), add=True)
+                alembic_jobs.append(self.alembic_job(ref.namespace, ref.cache_roots, cache_file_path_local))
 
-        try:
-            cmds.AbcExport(j=alembic_cmd_list)
-        except Exception as error:
-            print("Exception on alembic cache +++++ ", error)
+        # The shot camera is exported once, after the shared bake above
+        if shot_camera:
+            cache_file_path_local = "%s/%s.abc" % (cache_file_dir, shot_camera)
+            alembic_jobs.append(self.alembic_job(shot_camera, ["|" + shot_camera], cache_file_path_local))
+        alembic_cmd_list = [job["args"] for job in alembic_jobs]
+        print('alembic_cmd_list++++++', alembic_cmd_list)
+
+        metrics.count("alembic_jobs", len(alembic_cmd_list))
+        fanout_workers = int(get_option("abc_fanout", 0) or 0)
+        with metrics.stage("abc_export"):
+            if fanout_workers > 1 and len(alembic_jobs) > 1:
+                cache_results = self.export_fanout(alembic_jobs, fanout_workers, cache_file_dir)
+            else:
+                cache_results = self.export_serial(alembic_jobs)
+        failed = {path: result["error"] for path, result in cache_results.items() if result["status"] != "ok"}
+        for job in alembic_jobs:
+            result = cache_results.get(job["file"], {})
+            job_events.emit("asset", task="cache", name=job["name"], file=job["file"],
+                            status=result.get("status"), error=result.get("error"),
+                            seconds=result.get("seconds"))
+        if failed:
+            metrics.count("abc_export_errors", len(failed))
+            for path, error in failed.items():
+                print("Exception on alembic cache +++++ ", path, error)
 
         json_file_path = os.path.join(cache_file_dir, "scene_lit.json").replace("\\", "/")
         fps = cmds.currentUnit(q=True, time=True)
@@ -98,95 +111,131 @@ class ExportAlembic:
             "frame_range": {
                 "start_frame": self.shot_first_frame,
                 "end_frame": self.shot_last_frame
+            },
+            "cache_export": {
+                "workers": fanout_workers if fanout_workers > 1 and len(alembic_jobs) > 1 else 1,
+                "failed": failed
             }
         }
-        cache_shader_info = {}
-        for each_ref_path in cmds.file(q=True, r=True):
-            try:
-                namespace = cmds.referenceQuery(each_ref_path, namespace=True)
-                if namespace.startswith(":"):
-                    namespace = namespace[1:]
-            except:
-                continue
-            ref_node_name = namespace
-            cache_file_path_local = "%s/%s.abc" % (
-                cache_file_dir,
-                os.path.basename(each_ref_path).replace(".ma", "")
-            )
-            cache_node = '%s:Cache' % namespace if cmds.objExists('%s:Cache' % namespace) else '%s:cache' % namespace
-            cache_node_connection = cmds.listConnections(cache_node, s=True, d=False) or []
-            cache_sets_clean = [node.split("|")[-1] for node in cache_node_connection]
-            scene_dir = os.path.dirname(scene_path)
-            shader_folder_name = "Shader_{}".format(namespace)
-            shader_folder_path = os.path.join(scene_dir, shader_folder_name).replace("\\", "/")
-            shader_file_path = os.path.join(shader_folder_path, "{}.ma".format(namespace)).replace("\\", "/")
-            shader_file_info = os.path.join(shader_folder_path, "info_shader.json").replace("\\", "/")
-
-            cache_shader_info[ref_node_name] = {
-                "ref_file": each_ref_path,
-                "cache_file_path": cache_file_path_local,
-                "cache_set": cache_sets_clean,
-                "shader_file_path": shader_file_path,
-                "shader_file_info": shader_file_info,
-                "cache_type": "alembic",
-                "shader_type": "mayaAscii",
-                "namespace": namespace
-            }
+        with metrics.stage("scene_info"):
+            cache_shader_info = {}
+            for ref in references:
+                namespace = ref.namespace
+                ref_node_name = namespace
+                cache_file_path_local = self.cache_file_path(cache_file_dir, ref.ref_file)
+                cache_sets_clean = ref.cache_sets_clean
+                scene_dir = os.path.dirname(scene_path)
+                shader_folder_name = "Shader_{}".format(namespace)
+                shader_folder_path = os.path.join(scene_dir, shader_folder_name).replace("\\", "/")
+                shader_file_path = os.path.join(shader_folder_path, "{}.ma".format(namespace)).replace("\\", "/")
+                shader_file_info = os.path.join(shader_folder_path, "info_shader.json").replace("\\", "/")
+
+                cache_shader_info[ref_node_name] = {
+                    "ref_file": ref.ref_file,
+                    "cache_file_path": cache_file_path_local,
+                    "cache_set": cache_sets_clean,
+                    "shader_file_path": shader_file_path,
+                    "shader_file_info": shader_file_info,
+                    "cache_type": "alembic",
+                    "shader_type": "mayaAscii",
+                    "namespace": namespace,
+                    "cache_status": "error" if cache_file_path_local in failed else "ok"
+                }
 
         final_json_dict = {
             "File_info": file_info_dict,
             "Cache_shader_info": cache_shader_info
         }
 
-        with open(json_file_path, "w") as json_file:
-            json.dump(final_json_dict, json_file, indent=4)
+        with metrics.stage("write_json"):
+            with open(json_file_path, "w") as json_file:
+                json.dump(final_json_dict, json_file, indent=4)
         print("JSON Exported Successfully:", json_file_path)
 
-    def bakeConstraints(self):
-        cmds.select(cl=True)
-        all_controls = []
-        for each_ref_path in cmds.file(q=True, r=True):
+    def alembic_job(self, name, roots, cache_file):
+        cache_nodes = ""
+        for root in roots:
+            cache_nodes += " -root " + root
+        args = ("-frameRange " + str(self.shot_first_frame) + " " + str(self.shot_last_frame) +
+                " -stripNamespaces -uvWrite -writeFaceSets -worldSpace -writeVisibility -dataFormat ogawa "
+                + cache_nodes +
+                " -file " + "\"%s\"" % cache_file)
+        if job_events.enabled():
+            args += (" -pythonPerFrameCallback \"import job_events; job_events.frame('abc_export', #FRAME#, %s, %s)\""
+                     % (self.shot_first_frame, self.shot_last_frame))
+        return {"name": name, "file": cache_file, "args": args}
+
+    def export_serial(self, alembic_jobs):
+        # One AbcExport call writes every cache; an error fails them all
+        if not alembic_jobs:
+            return {}
+        try:
+            cmds.AbcExport(j=[job["args"] for job in alembic_jobs])
+            return {job["file"]: {"status": "ok", "error": None} for job in alembic_jobs}
+        except Exception as error:
+            return {job["file"]: {"status": "error", "error": str(error)} for job in alembic_jobs}
+
+    def export_fanout(self, alembic_jobs, workers, cache_file_dir):
+        # Save the baked scene once, then let several mayapy processes open it and
+        # export a share of the caches each
+        scene_path = cmds.file(q=True, sn=True)
+        work_dir = os.path.join(cache_file_dir, abc_fanout.FANOUT_DIR).replace("\\", "/")
+        if not os.path.exists(work_dir):
+            os.makedirs(work_dir)
+        baked_scene = "%s/%s_baked.mb" % (work_dir, os.path.splitext(os.path.basename(scene_path))[0])
+        with self.metrics.stage("save_baked_scene"):
+            cmds.file(rename=baked_scene)
             try:
-                namespace = cmds.referenceQuery(each_ref_path, namespace=True)
-                if namespace.startswith(":"):
-                    namespace = namespace[1:]
-            except:
-                continue
-            curves = cmds.ls(namespace + ":*", type="nurbsCurve", long=True)
-            for curve in curves:
-                parent = cmds.listRelatives(curve, p=True, f=True)
-                if parent:
-                    all_controls.append(parent[0])
-        all_controls = list(set(all_controls))
-        if not all_controls:
-            print("No referenced controls found.")
-            return
-        cmds.select(all_controls)
+                cmds.file(save=True, type="mayaBinary", force=True)
+            finally:
+                cmds.file(rename=scene_path)
+
+        self.metrics.count("abc_fanout_workers", min(workers, len(alembic_jobs)))
+        results = abc_fanout.fan_out(baked_scene, alembic_jobs, workers, work_dir,
+                                     command=get_option("abc_fanout_command"))
+        # Worker logs are kept when an export failed
+        if all(result["status"] == "ok" for result in results.values()) and not get_flag("abc_fanout_keep"):
+            abc_fanout.cleanup(work_dir)
+        return results
+
+    @staticmethod
+    def cache_file_path(cache_file_dir, ref_file):
+        return "%s/%s.abc" % (cache_file_dir, os.path.basename(ref_file).replace(".ma", ""))
+
+    def find_shot_camera(self):
         try:
-            start_frame = cmds.playbackOptions(q=True, min=True)
-            end_frame = cmds.playbackOptions(q=True, max=True)
-            current_pane = cmds.getPanel(withFocus=True)
-            if cmds.getPanel(typeOf=current_pane) == "modelPanel":
-                cmds.modelEditor(current_pane, edit=True, alo=False)
-            cmds.bakeResults(
-                simulation=True,
-                t=(start_frame, end_frame),
-                sb=1,
-                disableImplicitControl=True,
-                preserveOutsideKeys=True,
-                sparseAnimCurveBake=False,
-                removeBakedAttributeFromLayer=False,
-                removeBakedAnimFromLayer=False,
-                bakeOnOverrideLayer=False,
-                minimizeRotation=True,
-                controlPoints=False,
-                shape=False
-            )
-            cmds.select(cl=True)
-            print("Bake Completed Successfully")
-        except Exception:
-            print("Error in baking")
-            print(sys.exc_info())
+            cameras = [each for each in cmds.listCameras() if
+                       not cmds.referenceQuery(each, inr=True) and not re.search(r"front|persp|side|top", each, re.I)]
+        except Exception as error:
+            print(error)
+            return None
+        return cameras[0] if cameras else None
+
+    def bake(self, references, camera=None):
+        # Controls, the shot camera and (optionally) constrained cache roots are
+        # baked together so the timeline is evaluated once per scene.
+        cmds.select(cl=True)
+        plan = BakePlan(
+            cmds.playbackOptions(q=True, min=True),
+            cmds.playbackOptions(q=True, max=True),
+            evaluation_mode=get_option("bake_evaluation_mode"),
+            suspend_viewport=get_flag("bake_suspend_viewport", True)
+        )
+        plan.add_controls(references)
+        if not plan.nodes:
+            print("No referenced controls found.")
+        if camera:
+            plan.add_camera(camera)
+        if get_flag("bake_constrained_roots"):
+            plan.add_constrained_roots(references)
+        if self.metrics:
+            self.metrics.count("baked_nodes", len(plan.nodes))
+        return plan.run()
+
+    def bakeConstraints(self, references=None):
+        if references is None:
+            references = scan_references()
+        return self.bake(references)
 
     def maya_close(self):
         cmds.evalDeferred('cmds.quit(abort=True,f=True)')
@@ -199,8 +248,6 @@ if __name__ == "__main__":
     except NameError:
         try:
             cache_process.open_maya()
-            import time
-            time.sleep(10)
             cache_process.maya_close()
         except Exception as e:
             print("Error during Cache export:", e)
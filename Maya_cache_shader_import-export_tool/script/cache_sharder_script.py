@@ -1,8 +1,17 @@
 import os
-import sys
 import json
 import maya.cmds as cmds
 
+from job_metrics import JobMetrics
+from job_options import get_flag, get_option
+from shader_assign import AssignmentReport, assign_shader_groups
+from build_state import file_changed, file_signature, load_build_state, save_build_state
+from shader_library import library_entry
+import job_events
+
+
+BUILD_MODES = ("full", "deferred", "proxy", "update")
+
 
 def validate_json_path(json_path):
     if not json_path:
@@ -29,7 +38,7 @@ def apply_scene_settings(file_info):
     cmds.currentUnit(time=fps)
     cmds.playbackOptions(min=start, max=end)
 
-def reference_file(path, file_type, namespace):
+def reference_file(path, file_type, namespace, defer=False):
     if not os.path.exists(path):
         print("File not found:", path)
         return None
@@ -42,83 +51,471 @@ def reference_file(path, file_type, namespace):
         mergeNamespacesOnClash=False,
         gl=True,
         namespace=namespace,
+        deferReference=defer,
         options="v=0;"
     )
 
 
+def replace_reference(ref_file, path, file_type):
+    # replaceReference keeps the reference node, its namespace and its edits. An
+    # unloaded (deferred) reference is re-created unloaded instead, since
+    # replacing it would load it
+    ref_node = cmds.referenceQuery(ref_file, referenceNode=True)
+    if cmds.referenceQuery(ref_node, isLoaded=True):
+        cmds.file(path, loadReference=ref_node, type=file_type, options="v=0;")
+        return cmds.referenceQuery(ref_node, filename=True)
+    namespace = cmds.referenceQuery(ref_node, namespace=True).lstrip(":")
+    cmds.file(ref_file, removeReference=True)
+    return reference_file(path, file_type, namespace, defer=True)
+
+
+def remove_reference(ref_file):
+    try:
+        cmds.file(ref_file, removeReference=True)
+    except RuntimeError as e:
+        print("Reference not removed:", ref_file, "-", e)
+
+
+def same_file(path, other):
+    if not path or not other:
+        return path == other
+    return os.path.normcase(os.path.normpath(path)) == os.path.normcase(os.path.normpath(other))
+
+
+def create_proxy(cache_file_path, namespace, bounding_box=False):
+    # A gpuCache stand-in drawn from the same Alembic file as the deferred reference
+    try:
+        transform = cmds.createNode("transform", n=f"{namespace}_proxy")
+        shape = cmds.createNode("gpuCache", n=f"{namespace}_proxyShape", p=transform)
+        cmds.setAttr(shape + ".cacheFileName", cache_file_path, type="string")
+    except RuntimeError as e:
+        print("Proxy not created for", namespace, "-", e)
+        return None
+    if bounding_box:
+        cmds.setAttr(transform + ".overrideEnabled", 1)
+        cmds.setAttr(transform + ".overrideLevelOfDetail", 1)
+    return transform
+
+
+def shader_source(entry):
+    # The library file named in info_shader.json, else the per-scene shader file
+    try:
+        with open(entry["shader_file_info"]) as f:
+            library = library_entry(json.load(f))
+    except (OSError, ValueError):
+        library = None
+    if library and library.get("shader_file_path"):
+        return library["shader_file_path"]
+    return entry["shader_file_path"]
+
+
+def referenced_namespaces():
+    namespaces = {}
+    for ref_file in cmds.file(q=True, r=True) or []:
+        try:
+            namespace = cmds.referenceQuery(ref_file, namespace=True).lstrip(":")
+        except RuntimeError:
+            continue
+        path = os.path.normcase(os.path.normpath(ref_file.split("{")[0]))
+        namespaces.setdefault(path, namespace)
+    return namespaces
+
+
+def namespace_references():
+    references = {}
+    for ref_file in cmds.file(q=True, r=True) or []:
+        try:
+            namespace = cmds.referenceQuery(ref_file, namespace=True).lstrip(":")
+        except RuntimeError:
+            continue
+        references.setdefault(namespace, ref_file)
+    return references
+
+
 def assignshaders(shader_file_info=None,
                   ref_name_space=None,
-                  shading_namespace=None):
+                  shading_namespace=None,
+                  report=None):
     if not os.path.exists(shader_file_info):
         print("Shader info json missing:", shader_file_info)
-        return
+        return 0
 
     cmds.editRenderLayerGlobals(currentRenderLayer='defaultRenderLayer')
 
     with open(shader_file_info) as f:
         json_data = json.load(f)
 
-    for shdengin, info in json_data.items():
-
-        for mesh in info.get("dag_nodes", []):
-
-            try:
-                mesh = f"{ref_name_space}:{mesh}"
-
-                if not cmds.objExists(mesh):
-                    print("Object not found:", mesh)
-                    continue
-
-                cmds.select(mesh)
-                cmds.hyperShade(assign=f"{shading_namespace}:{shdengin}")
-                cmds.select(cl=True)
-
-            except Exception as e:
-                print("Shader assign error:", mesh, e)
+    report = report or AssignmentReport()
+    assigned_before = report.assigned
+    assign_shader_groups(json_data, ref_name_space, shading_namespace, report)
+    return report.assigned - assigned_before
 
 
 def process_scene(json_path):
-    for each in ['AbcExport.mll', 'AbcImport.mll', 'atomImportExport.mll',
-                 'vrayformaya.mll', 'modelingToolkit.mll']:
+    with JobMetrics("build", json_path) as metrics:
+        build_scene(json_path, metrics)
+
+
+def update_lighting(json_path):
+    with JobMetrics("build", json_path) as metrics:
+        build_scene(json_path, metrics, "update")
+
+
+def lighting_scene_path(json_path):
+    # Cache_<scene>/<scene>_lighting.ma, next to the scene_lit.json
+    folder = os.path.dirname(os.path.abspath(json_path))
+    name = os.path.basename(folder)
+    name = name[len("Cache_"):] if name.startswith("Cache_") else "scene"
+    return os.path.join(folder, f"{name}_lighting.ma").replace("\\", "/")
+
+
+def build_lighting_scene(json_path):
+    # Headless builds start from a new scene, or with build_mode update from the
+    # lighting scene saved by an earlier run, and save the result
+    scene_path = lighting_scene_path(json_path)
+    with JobMetrics("build", json_path) as metrics:
+        with metrics.stage("open_scene"):
+            if get_option("build_mode") == "update" and os.path.exists(scene_path):
+                cmds.file(scene_path, open=True, force=True)
+            else:
+                cmds.file(new=True, force=True)
+        build_scene(json_path, metrics)
+        with metrics.stage("save_scene"):
+            cmds.file(rename=scene_path)
+            cmds.file(save=True, type="mayaAscii", force=True)
+    job_events.emit("asset", task="build", name=os.path.basename(scene_path), file=scene_path, status="saved")
+    print("Lighting scene saved:", scene_path)
+    return scene_path
+
+
+def load_plugins(mode):
+    plugins = ['AbcExport.mll', 'AbcImport.mll', 'atomImportExport.mll',
+               'vrayformaya.mll', 'modelingToolkit.mll']
+    if mode == "proxy":
+        plugins.append('gpuCache.mll')
+    for each in plugins:
         if not cmds.pluginInfo(each, q=True, l=True):
             try:
                 cmds.loadPlugin(each)
             except:
                 pass
 
+
+def reference_asset(info, mode, metrics):
+    # References one asset's cache and returns its build state entry
+    base_namespace = info["namespace"]
+    cache_namespace = f"{base_namespace}_cache"
+
+    with metrics.stage("reference_cache"):
+        cache_reference = reference_file(
+            info["cache_file_path"],
+            "Alembic",
+            cache_namespace,
+            defer=mode != "full"
+        )
+
+    proxy = None
+    if mode == "proxy" and cache_reference:
+        with metrics.stage("create_proxy"):
+            proxy = create_proxy(info["cache_file_path"], base_namespace,
+                                 bounding_box=get_flag("proxy_bounding_box"))
+
+    return {
+        "namespace": base_namespace,
+        "cache_reference": cache_reference,
+        "cache_file_path": info["cache_file_path"],
+        "cache_signature": file_signature(info["cache_file_path"]),
+        "cache_namespace": cache_namespace,
+        "shader_file_path": info["shader_file_path"],
+        "shader_file_info": info["shader_file_info"],
+        "shader_type": info["shader_type"],
+        "shader_namespace": f"{base_namespace}_shader",
+        "proxy": proxy,
+        "loaded": False,
+    }
+
+
+def build_scene(json_path, metrics, mode=None):
+    mode = mode or get_option("build_mode", "full")
+    if mode not in BUILD_MODES:
+        raise RuntimeError(f"Unknown build mode: {mode}")
+    if mode == "update":
+        return update_scene(json_path, metrics)
+
+    with metrics.stage("load_plugins"):
+        load_plugins(mode)
+
     json_path = validate_json_path(json_path)
+    metrics.output_dir = os.path.dirname(json_path)
     data = load_json(json_path)
 
     apply_scene_settings(data["File_info"])
 
     cache_shader_info = data["Cache_shader_info"]
+    metrics.count("assets", len(cache_shader_info))
 
+    # Deferred and proxy builds only reference the caches (unloaded); shaders are
+    # referenced and assigned when load_assets loads an asset
+    state = load_build_state()
     for asset_name, info in cache_shader_info.items():
-        base_namespace = info["namespace"]
-        cache_namespace = f"{base_namespace}_cache"
-        shader_namespace = f"{base_namespace}_shader"
-
-        reference_file(
-            info["cache_file_path"],
-            "Alembic",
-            cache_namespace
-        )
+        state[asset_name] = reference_asset(info, mode, metrics)
+    save_build_state(state)
 
-        reference_file(
-            info["shader_file_path"],
-            info["shader_type"],
-            shader_namespace
-        )
+    if mode == "full":
+        assignment_report = load_assets(list(cache_shader_info), metrics)
+    else:
+        metrics.count("deferred_assets", len(cache_shader_info))
+        assignment_report = AssignmentReport()
 
-        assignshaders(
-            shader_file_info=info["shader_file_info"],
-            ref_name_space=cache_namespace,
-            shading_namespace=shader_namespace
-        )
+    # Missing meshes for every asset are reported together
+    metrics.count("missing_meshes", len(assignment_report.missing))
+    assignment_report.print_summary("for " + os.path.basename(json_path))
 
     print("\nCache + Shader reference process completed.")
 
 
+def update_cache(entry, info):
+    # True when the cache reference now points at another file, or at new
+    # contents of the same file
+    path = info["cache_file_path"]
+    previous = entry.get("cache_signature") if same_file(path, entry["cache_file_path"]) else None
+    signature = file_signature(path, previous)
+    if signature is None:
+        print("Cache not found, keeping the current one:", path)
+        return False
+    if previous and not file_changed(previous, signature):
+        entry["cache_signature"] = signature
+        return False
+
+    if entry["cache_reference"]:
+        entry["cache_reference"] = replace_reference(entry["cache_reference"], path, "Alembic")
+    else:
+        entry["cache_reference"] = reference_file(path, "Alembic", entry["cache_namespace"],
+                                                  defer=not entry["loaded"])
+    if entry.get("proxy") and cmds.objExists(entry["proxy"]):
+        for shape in cmds.listRelatives(entry["proxy"], shapes=True) or []:
+            cmds.setAttr(shape + ".cacheFileName", path, type="string")
+    entry["cache_file_path"] = path
+    entry["cache_signature"] = signature
+    return True
+
+
+def update_shaders(state, names, references):
+    # Returns the assets whose shader reference changed. Assets with the same
+    # library look share one reference: it is replaced in place only when all
+    # of its users move to the same file, otherwise the moving assets get their
+    # own reference and the old one is removed once nothing uses it.
+    # references is {namespace: reference file} and is kept up to date.
+    paths = {}
+    for namespace, ref_file in references.items():
+        paths.setdefault(os.path.normcase(os.path.normpath(ref_file.split("{")[0])), namespace)
+    moves = {}
+    for name in names:
+        entry = state[name]
+        source = shader_source(entry)
+        current = entry.get("shader_source") or references.get(entry["shader_namespace"])
+        previous = entry.get("shader_signature") if same_file(source, current) else None
+        signature = file_signature(source, previous)
+        if signature is None:
+            print("Shader file not found, keeping the current one:", source)
+            continue
+        if previous and not file_changed(previous, signature):
+            entry["shader_signature"] = signature
+            continue
+        moves.setdefault(entry["shader_namespace"], {})[name] = (source, signature)
+
+    changed = set()
+    for namespace, moving in moves.items():
+        ref_file = references.get(namespace)
+        users = [name for name in names if state[name]["shader_namespace"] == namespace]
+        targets = set(os.path.normcase(os.path.normpath(source)) for source, _ in moving.values())
+        target = targets.pop() if len(targets) == 1 else None
+        if ref_file and target and set(users) <= set(moving) and paths.get(target, namespace) == namespace:
+            replace_reference(ref_file, moving[users[0]][0], state[users[0]]["shader_type"])
+            paths[target] = namespace
+            for name in users:
+                state[name]["shader_source"], state[name]["shader_signature"] = moving[name]
+            changed.update(users)
+            continue
+
+        for name, (source, signature) in moving.items():
+            entry = state[name]
+            key = os.path.normcase(os.path.normpath(source))
+            if key not in paths:
+                reference = reference_file(source, entry["shader_type"], entry["namespace"] + "_shader")
+                if not reference:
+                    continue
+                paths[key] = cmds.referenceQuery(reference, namespace=True).lstrip(":")
+                references[paths[key]] = reference
+            entry["shader_namespace"] = paths[key]
+            entry["shader_source"], entry["shader_signature"] = source, signature
+            changed.add(name)
+        if ref_file and not any(state[name]["shader_namespace"] == namespace for name in names):
+            remove_reference(references.pop(namespace))
+    return changed
+
+
+def update_scene(json_path, metrics):
+    # Brings the open lighting scene up to date with a new scene_lit.json using
+    # the build state in fileInfo: caches and shader files whose path or
+    # contents changed are swapped with replaceReference, and shaders are
+    # reassigned only for the assets that changed
+    state = load_build_state()
+    if not state:
+        print("No lighting build in this scene, building it from scratch.")
+        return build_scene(json_path, metrics, "full")
+
+    with metrics.stage("load_plugins"):
+        load_plugins("update")
+
+    json_path = validate_json_path(json_path)
+    metrics.output_dir = os.path.dirname(json_path)
+    data = load_json(json_path)
+    apply_scene_settings(data["File_info"])
+    cache_shader_info = data["Cache_shader_info"]
+    metrics.count("assets", len(cache_shader_info))
+
+    for entry in state.values():
+        entry.setdefault("namespace", entry["cache_namespace"].rsplit("_cache", 1)[0])
+
+    references = namespace_references()
+    removed = sorted(name for name in state if name not in cache_shader_info)
+    with metrics.stage("remove_assets"):
+        for name in removed:
+            entry = state.pop(name)
+            references.pop(entry["cache_namespace"], None)
+            if entry["cache_reference"]:
+                remove_reference(entry["cache_reference"])
+            if entry.get("proxy") and cmds.objExists(entry["proxy"]):
+                cmds.delete(entry["proxy"])
+            namespace = entry["shader_namespace"]
+            in_use = any(other["loaded"] and other["shader_namespace"] == namespace for other in state.values())
+            if entry["loaded"] and namespace in references and not in_use:
+                remove_reference(references.pop(namespace))
+
+    added, updated, reassign = [], [], set()
+    with metrics.stage("replace_cache"):
+        for name, info in cache_shader_info.items():
+            entry = state.get(name)
+            if entry is None:
+                state[name] = reference_asset(info, "deferred", metrics)
+                added.append(name)
+                continue
+            if update_cache(entry, info):
+                updated.append(name)
+                if entry["loaded"]:
+                    reassign.add(name)
+            entry.update(shader_file_path=info["shader_file_path"], shader_type=info["shader_type"],
+                         shader_file_info=info["shader_file_info"])
+    metrics.count("updated_caches", len(updated))
+
+    loaded = sorted(name for name, entry in state.items() if entry["loaded"])
+    with metrics.stage("replace_shader"):
+        shader_changes = update_shaders(state, loaded, references)
+    metrics.count("updated_shaders", len(shader_changes))
+    reassign |= shader_changes
+    for name in loaded:
+        entry = state[name]
+        signature = file_signature(entry["shader_file_info"], entry.get("info_signature"))
+        if file_changed(entry.get("info_signature"), signature):
+            reassign.add(name)
+        entry["info_signature"] = signature
+    save_build_state(state)
+
+    report = AssignmentReport()
+    with metrics.stage("assign_shaders"):
+        for name in sorted(reassign):
+            entry = state[name]
+            assigned = assignshaders(
+                shader_file_info=entry["shader_file_info"],
+                ref_name_space=entry["cache_namespace"],
+                shading_namespace=entry["shader_namespace"],
+                report=report
+            )
+            metrics.count("assigned_meshes", assigned, add=True)
+            job_events.emit("asset", task="build", name=name, status="updated", assigned=assigned)
+    metrics.count("reassigned_assets", len(reassign))
+    metrics.count("added_assets", len(added))
+    metrics.count("removed_assets", len(removed))
+
+    # New assets are loaded like the rest of the scene; a deferred build with
+    # nothing loaded yet keeps them deferred
+    if added and loaded:
+        added_report = load_assets(added, metrics)
+        report.assigned += added_report.assigned
+        report.missing += added_report.missing
+        report.errors += added_report.errors
+
+    metrics.count("missing_meshes", len(report.missing))
+    report.print_summary("for " + os.path.basename(json_path))
+    unchanged = len(cache_shader_info) - len(reassign | set(updated)) - len(added)
+    print(f"\nLighting scene updated: {len(reassign | set(updated))} changed, {len(added)} added, "
+          f"{len(removed)} removed, {unchanged} unchanged.")
+
+
+def load_assets(asset_names=None, metrics=None):
+    # Loads a set of assets from a deferred or proxy build in bulk: cache
+    # references first, then each shader file, then the assignments, and the
+    # proxies go in one delete. Call with no names to load everything.
+    metrics = metrics or JobMetrics("load_assets")
+    state = load_build_state()
+    names = [name for name in (asset_names or sorted(state))
+             if name in state and not state[name]["loaded"]]
+    unknown = [name for name in (asset_names or []) if name not in state]
+    if unknown:
+        print("Assets not in this build:", ", ".join(unknown))
+
+    report = AssignmentReport()
+    with metrics.stage("reference_cache"):
+        for name in names:
+            entry = state[name]
+            if not entry["cache_reference"]:
+                continue
+            ref_node = cmds.referenceQuery(entry["cache_reference"], referenceNode=True)
+            if not cmds.referenceQuery(ref_node, isLoaded=True):
+                cmds.file(loadReference=ref_node)
+
+    with metrics.stage("reference_shader"):
+        # Assets sharing a library look share one shader reference and namespace
+        shader_namespaces = referenced_namespaces()
+        for name in names:
+            entry = state[name]
+            shader_file_path = shader_source(entry)
+            key = os.path.normcase(os.path.normpath(shader_file_path))
+            if key not in shader_namespaces:
+                if reference_file(shader_file_path, entry["shader_type"], entry["shader_namespace"]):
+                    shader_namespaces[key] = entry["shader_namespace"]
+                    metrics.count("shader_references", 1, add=True)
+            entry["shader_namespace"] = shader_namespaces.get(key, entry["shader_namespace"])
+            entry["shader_source"] = shader_file_path
+            entry["shader_signature"] = file_signature(shader_file_path)
+            entry["info_signature"] = file_signature(entry["shader_file_info"])
+
+    with metrics.stage("assign_shaders"):
+        for name in names:
+            entry = state[name]
+            assigned = assignshaders(
+                shader_file_info=entry["shader_file_info"],
+                ref_name_space=entry["cache_namespace"],
+                shading_namespace=entry["shader_namespace"],
+                report=report
+            )
+            metrics.count("assigned_meshes", assigned, add=True)
+            job_events.emit("asset", task="build", name=name, status="ok", assigned=assigned)
+
+    proxies = [state[name]["proxy"] for name in names if state[name]["proxy"]]
+    proxies = cmds.ls(proxies) if proxies else []
+    if proxies:
+        cmds.delete(proxies)
+
+    for name in names:
+        state[name]["loaded"] = True
+        state[name]["proxy"] = None
+    save_build_state(state)
+    metrics.count("loaded_assets", len(names))
+    return report
+
+
 if __name__ == "__main__":
 
     if "json_path" not in globals():
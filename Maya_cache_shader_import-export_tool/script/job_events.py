@@ -0,0 +1,62 @@
+import os
+import json
+import time
+import socket
+
+
+EVENTS_ENV = "MAYA_PIPELINE_EVENTS"
+JOB_ID_ENV = "MAYA_PIPELINE_JOB_ID"
+FRAME_INTERVAL = 0.25
+
+_connection = None
+_address = None
+_last_frame = {}
+
+
+def _connect(address):
+    global _connection, _address
+    if _connection is not None and _address == address:
+        return _connection
+    close()
+    host, port = address.rsplit(":", 1)
+    _connection = socket.create_connection((host, int(port)), timeout=2)
+    _address = address
+    return _connection
+
+
+def enabled():
+    return bool(os.environ.get(EVENTS_ENV))
+
+
+def emit(event, **fields):
+    # One JSON line per event to the launcher's socket (MAYA_PIPELINE_EVENTS).
+    # Without a launcher listening this does nothing, and a broken channel never
+    # fails the job.
+    address = os.environ.get(EVENTS_ENV)
+    if not address:
+        return
+    message = dict(fields, event=event, job=os.environ.get(JOB_ID_ENV), pid=os.getpid(), time=time.time())
+    try:
+        _connect(address).sendall((json.dumps(message) + "\n").encode("utf-8"))
+    except (OSError, ValueError):
+        close()
+
+
+def frame(stage, frame, start, end):
+    # Throttled: at most one event per stage every FRAME_INTERVAL seconds, plus the last frame
+    now = time.time()
+    if frame < end and now - _last_frame.get(stage, 0) < FRAME_INTERVAL:
+        return
+    _last_frame[stage] = now
+    emit("frame", stage=stage, frame=frame, start=start, end=end)
+
+
+def close():
+    global _connection, _address
+    if _connection is not None:
+        try:
+            _connection.close()
+        except OSError:
+            pass
+    _connection = None
+    _address = None
@@ -0,0 +1,162 @@
+import os
+import sys
+import json
+import time
+import socket
+from contextlib import contextmanager
+
+import job_events
+from job_options import get_flag, get_option
+
+
+METRICS_ENV = "MAYA_PIPELINE_METRICS"
+METRICS_FILE = "job_metrics.jsonl"
+
+
+def _windows_memory_counters():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+    handle = ctypes.windll.kernel32.GetCurrentProcess()
+    if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+        return counters
+    return None
+
+
+def current_memory_mb():
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/statm", "r") as f:
+                pages = int(f.read().split()[1])
+            return pages * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+        except (OSError, ValueError):
+            return None
+
+    if sys.platform == "win32":
+        counters = _windows_memory_counters()
+        return counters.WorkingSetSize // (1024 * 1024) if counters else None
+    return None
+
+
+def peak_memory_mb():
+    if sys.platform == "win32":
+        counters = _windows_memory_counters()
+        return counters.PeakWorkingSetSize // (1024 * 1024) if counters else None
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak // (1024 * 1024) if sys.platform == "darwin" else peak // 1024
+
+
+class JobMetrics:
+    def __init__(self, job, scene_path=None):
+        self.job = job
+        self.scene_path = scene_path
+        self.output_dir = None
+        self.stages = {}
+        self.counts = {}
+        self.status = "ok"
+        self.error = None
+        self.started = time.time()
+        self.profiler = None
+
+    def __enter__(self):
+        job_events.emit("job_start", task=self.job, scene=self.scene_path)
+        if get_flag("maya_profile"):
+            from maya_profiler import MayaProfiler
+            self.profiler = MayaProfiler().start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.status = "error"
+            self.error = str(exc)
+        if self.profiler:
+            self.finish_profile()
+        try:
+            self.write()
+        except OSError as e:
+            print("Failed to write job metrics:", e)
+        job_events.emit("job_end", task=self.job, scene=self.scene_path, status=self.status,
+                        error=self.error, duration=round(time.time() - self.started, 3))
+        return False
+
+    @contextmanager
+    def stage(self, name):
+        start = time.time()
+        job_events.emit("stage_start", task=self.job, stage=name)
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += time.time() - start
+            entry["calls"] += 1
+            job_events.emit("stage_end", task=self.job, stage=name, seconds=round(time.time() - start, 3))
+
+    def finish_profile(self):
+        profiler, self.profiler = self.profiler, None
+        profiler.stop()
+        self.count("maya_calls", profiler.total_calls)
+        self.count("maya_seconds", round(profiler.total_seconds, 3))
+        profiler.print_summary()
+        folder = get_option("maya_profile_dir") or self.output_dir
+        if not folder:
+            print("Maya profile not written: no output folder (set maya_profile_dir)")
+            return
+        try:
+            print("Maya profile:", profiler.write(folder, self.job, self.scene_path))
+        except OSError as e:
+            print("Failed to write Maya profile:", e)
+
+    def count(self, name, value=1, add=False):
+        self.counts[name] = self.counts.get(name, 0) + value if add else value
+
+    def record(self):
+        return {
+            "job": self.job,
+            "scene": self.scene_path,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "started": self.started,
+            "duration": round(time.time() - self.started, 3),
+            "status": self.status,
+            "error": self.error,
+            "stages": {
+                name: {"seconds": round(entry["seconds"], 3), "calls": entry["calls"]}
+                for name, entry in self.stages.items()
+            },
+            "counts": self.counts,
+            "peak_memory_mb": peak_memory_mb(),
+        }
+
+    def write(self):
+        path = os.environ.get(METRICS_ENV)
+        if not path and self.output_dir:
+            path = os.path.join(self.output_dir, METRICS_FILE)
+        if not path:
+            return None
+
+        # One short appended line per job, so jobs sharing a batch file don't interleave
+        with open(path, "a") as f:
+            f.write(json.dumps(self.record()) + "\n")
+        return path
@@ -0,0 +1,24 @@
+import os
+import json
+
+
+OPTIONS_ENV = "MAYA_PIPELINE_OPTIONS"
+
+
+def job_options():
+    try:
+        return json.loads(os.environ.get(OPTIONS_ENV) or "{}")
+    except ValueError:
+        print("Ignoring bad job options:", os.environ.get(OPTIONS_ENV))
+        return {}
+
+
+def get_option(name, default=None):
+    return job_options().get(name, default)
+
+
+def get_flag(name, default=False):
+    value = get_option(name, default)
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import math
+import time
+
+
+# Opt-in profiler for maya.cmds and maya.mel.eval (job option maya_profile).
+# While running, every public function on maya.cmds is replaced by a timing
+# wrapper, so modules that did "import maya.cmds as cmds" are covered too.
+# Only the outermost Maya call is timed when one command calls another.
+
+MAX_STACK_DEPTH = 64
+TOP_ENTRIES = 10
+
+
+def percentile(durations, fraction):
+    ordered = sorted(durations)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)] if ordered else 0.0
+
+
+def frame_name(frame):
+    module = os.path.splitext(os.path.basename(frame.f_code.co_filename))[0]
+    return f"{module}.{frame.f_code.co_name}"
+
+
+def summarize(durations):
+    total = sum(durations)
+    return {
+        "calls": len(durations),
+        "seconds": round(total, 6),
+        "mean_ms": round(total / len(durations) * 1000.0, 4) if durations else 0.0,
+        "p95_ms": round(percentile(durations, 0.95) * 1000.0, 4),
+    }
+
+
+class MayaProfiler:
+    def __init__(self):
+        self.commands = {}
+        self.callers = {}
+        self.stacks = {}
+        self._originals = []
+        self._depth = 0
+        self.started = None
+        self.stopped = None
+
+    def wrap(self, name, function):
+        profiler = self
+
+        def wrapper(*args, **kwargs):
+            if profiler._depth:
+                return function(*args, **kwargs)
+            profiler._depth += 1
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler._depth -= 1
+                profiler.record(name, time.perf_counter() - start, sys._getframe(1))
+
+        wrapper.__name__ = getattr(function, "__name__", name)
+        wrapper.__doc__ = getattr(function, "__doc__", None)
+        wrapper.__wrapped__ = function
+        return wrapper
+
+    def record(self, name, seconds, frame):
+        self.commands.setdefault(name, []).append(seconds)
+        caller = frame_name(frame)
+        self.callers.setdefault((caller, name), []).append(seconds)
+
+        # Collapsed stack for flame graphs: outermost frame first, the command last
+        frames = []
+        while frame is not None and len(frames) < MAX_STACK_DEPTH:
+            frames.append(frame_name(frame))
+            frame = frame.f_back
+        stack = ";".join(reversed(frames)) + ";" + name
+        self.stacks[stack] = self.stacks.get(stack, 0.0) + seconds
+
+    def start(self):
+        import maya.cmds
+        import maya.mel
+
+        for attr in dir(maya.cmds):
+            function = getattr(maya.cmds, attr)
+            if attr.startswith("_") or not callable(function) or isinstance(function, type):
+                continue
+            self._originals.append((maya.cmds, attr, function))
+            setattr(maya.cmds, attr, self.wrap("cmds." + attr, function))
+        self._originals.append((maya.mel, "eval", maya.mel.eval))
+        maya.mel.eval = self.wrap("mel.eval", maya.mel.eval)
+        self.started = time.time()
+        return self
+
+    def stop(self):
+        for module, attr, function in reversed(self._originals):
+            setattr(module, attr, function)
+        self._originals = []
+        self.stopped = time.time()
+
+    @property
+    def total_calls(self):
+        return sum(len(durations) for durations in self.commands.values())
+
+    @property
+    def total_seconds(self):
+        return sum(sum(durations) for durations in self.commands.values())
+
+    def report(self, job=None, scene=None):
+        commands = {name: summarize(durations) for name, durations in self.commands.items()}
+        callers = {}
+        for (caller, name), durations in self.callers.items():
+            callers.setdefault(caller, {})[name] = summarize(durations)
+        by_seconds = lambda item: -item[1]["seconds"]
+        return {
+            "job": job,
+            "scene": scene,
+            "wall_seconds": round((self.stopped or time.time()) - self.started, 3) if self.started else None,
+            "maya_calls": self.total_calls,
+            "maya_seconds": round(self.total_seconds, 6),
+            "commands": dict(sorted(commands.items(), key=by_seconds)),
+            "callers": {
+                caller: dict(sorted(entries.items(), key=by_seconds))
+                for caller, entries in sorted(
+                    callers.items(), key=lambda item: -sum(entry["seconds"] for entry in item[1].values())
+                )
+            },
+        }
+
+    def write(self, folder, job, scene=None):
+        # <folder>/maya_profile_<job>_<scene>.json plus a .folded file for
+        # flamegraph.pl / speedscope (stack, then microseconds)
+        name = os.path.splitext(os.path.basename(scene))[0] if scene else "scene"
+        base = os.path.join(folder, f"maya_profile_{job}_{name}")
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        with open(base + ".json", "w") as f:
+            json.dump(self.report(job, scene), f, indent=4)
+        with open(base + ".folded", "w") as f:
+            for stack, seconds in sorted(self.stacks.items()):
+                f.write(f"{stack} {max(1, int(round(seconds * 1e6)))}\n")
+        return base + ".json"
+
+    def print_summary(self, log=print):
+        log(f"Maya profile: {self.total_calls} call(s), {self.total_seconds:.3f}s in Maya")
+        entries = sorted(self.callers.items(), key=lambda item: -sum(item[1]))[:TOP_ENTRIES]
+        for (caller, name), durations in entries:
+            stats = summarize(durations)
+            log(f"  {stats['seconds']:>9.3f}s {stats['calls']:>7} x  p95 {stats['p95_ms']:>8.3f}ms  "
+                f"{name} in {caller}")
@@ -0,0 +1,96 @@
+import os
+import sys
+import json
+import traceback
+
+from job_metrics import current_memory_mb
+
+
+def serve(handlers, reset=None):
+    # Keep the real stdout for the protocol and send everything else
+    # (print calls, Maya output) to stderr so it can't corrupt a reply.
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    def reply(message):
+        protocol.write(json.dumps(message) + "\n")
+        protocol.flush()
+
+    reply({"ready": True, "pid": os.getpid(), "memory_mb": current_memory_mb()})
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        job = json.loads(line)
+        task = job.get("task")
+        if task == "shutdown":
+            break
+
+        response = {"id": job.get("id"), "status": "ok", "message": ""}
+        handler = handlers.get(task)
+
+        # Per-job environment (e.g. the batch metrics file), restored afterwards
+        job_env = job.get("env") or {}
+        saved_env = {key: os.environ.get(key) for key in job_env}
+        os.environ.update(job_env)
+        try:
+            if not handler:
+                raise RuntimeError(f"Unknown task: {task}")
+            handler(job)
+        except Exception as e:
+            traceback.print_exc()
+            response["status"] = "error"
+            response["message"] = str(e)
+        finally:
+            for key, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+            if reset:
+                try:
+                    reset()
+                except Exception as e:
+                    print("Scene reset failed:", e)
+
+        response["memory_mb"] = current_memory_mb()
+        reply(response)
+
+    protocol.close()
+
+
+def maya_handlers():
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+
+    import maya.cmds as cmds
+    from cache_script import ExportAlembic
+    from sharder_export import shader_ex
+    from cache_sharder_script import build_lighting_scene
+
+    # Plugins are loaded once here instead of once per scene
+    cache_exporter = ExportAlembic()
+    shader_exporter = shader_ex()
+
+    handlers = {
+        "cache": lambda job: cache_exporter.open_maya(job["path"]),
+        "shader": lambda job: shader_exporter.getShaders(job["path"]),
+        "build": lambda job: build_lighting_scene(job["path"]),
+    }
+
+    def reset():
+        cmds.file(new=True, force=True)
+
+    return handlers, reset
+
+
+if __name__ == "__main__":
+    handlers, reset = maya_handlers()
+    serve(handlers, reset)
+    try:
+        import maya.standalone
+        maya.standalone.uninitialize()
+    except Exception:
+        pass
@@ -0,0 +1,97 @@
+import maya.cmds as cmds
+
+
+CACHE_SET_NAMES = ("Cache", "cache")
+
+
+class ReferenceInfo:
+    def __init__(self, ref_file, namespace):
+        self.ref_file = ref_file
+        self.namespace = namespace
+        self.cache_node = None
+        self.cache_roots = []
+        self.controls = []
+
+    @property
+    def cache_sets_clean(self):
+        return [node.split("|")[-1] for node in self.cache_roots]
+
+
+def _namespace_of(node):
+    short_name = node.split("|")[-1]
+    return short_name.rsplit(":", 1)[0] if ":" in short_name else ""
+
+
+def scan_references():
+    # One pass over the loaded references with bulk queries: one ls for the
+    # cache sets, one listConnections for their members and one ls for the
+    # control curves (parents come from the long names), instead of several
+    # calls per reference.
+    references = []
+    for ref_file in cmds.file(q=True, r=True) or []:
+        try:
+            namespace = cmds.referenceQuery(ref_file, namespace=True)
+            if namespace.startswith(":"):
+                namespace = namespace[1:]
+        except Exception:
+            continue
+        references.append(ReferenceInfo(ref_file, namespace))
+
+    if not references:
+        return references
+
+    by_namespace = {}
+    for ref in references:
+        by_namespace.setdefault(ref.namespace, []).append(ref)
+
+    candidates = ["%s:%s" % (ref.namespace, name) for ref in references for name in CACHE_SET_NAMES]
+    existing = set(cmds.ls(candidates) or [])
+    cache_nodes = {}
+    for ref in references:
+        for name in CACHE_SET_NAMES:
+            node = "%s:%s" % (ref.namespace, name)
+            if node in existing:
+                ref.cache_node = node
+                cache_nodes[node] = ref
+                break
+
+    if cache_nodes:
+        # connections=True returns (plug on the cache set, source node) pairs
+        pairs = cmds.listConnections(list(cache_nodes), s=True, d=False, c=True) or []
+        for plug, source in zip(pairs[::2], pairs[1::2]):
+            ref = cache_nodes.get(plug.split(".", 1)[0])
+            if ref and source not in ref.cache_roots:
+                ref.cache_roots.append(source)
+
+    curves = cmds.ls(type="nurbsCurve", long=True) or []
+    curves = [curve for curve in curves if _namespace_of(curve) in by_namespace]
+    if curves:
+        seen = set()
+        for curve in curves:
+            parent = "|".join(curve.split("|")[:-1])
+            if not parent or parent in seen:
+                continue
+            seen.add(parent)
+            for ref in by_namespace[_namespace_of(curve)]:
+                ref.controls.append(parent)
+
+    return references
+
+
+def open_scene(scene_path, plan=None):
+    # With a plan (reference_plan.plan_references, computed outside Maya) the
+    # scene opens with every reference unloaded and only the planned ones are
+    # loaded; without one it is a normal open. Returns the loaded reference nodes.
+    if not plan:
+        cmds.file(scene_path, open=True, force=True)
+        return None
+
+    cmds.file(scene_path, open=True, force=True, loadReferenceDepth="none")
+    loaded = []
+    for ref_node in plan.get("load", []):
+        try:
+            cmds.file(loadReference=ref_node)
+            loaded.append(ref_node)
+        except RuntimeError as e:
+            print("Failed to load reference:", ref_node, e)
+    return loaded
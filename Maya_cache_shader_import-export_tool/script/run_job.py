@@ -0,0 +1,71 @@
+import os
+import sys
+import traceback
+
+
+# Entry point for batch jobs. Headless, from the launcher:
+#     mayapy run_job.py cache|shader|build <path>
+# or inside GUI Maya through run_in_session(). Job options arrive in the
+# environment (job_options.py), so the arguments are only the task and path.
+# A headless build saves its lighting scene; in GUI Maya it is left open.
+
+
+def run(task, path, headless=False):
+    if task == "cache":
+        from cache_script import ExportAlembic
+        ExportAlembic().open_maya(path)
+    elif task == "shader":
+        from sharder_export import shader_ex
+        shader_ex().getShaders(path)
+    elif task == "build":
+        from cache_sharder_script import build_lighting_scene, process_scene
+        if headless:
+            build_lighting_scene(path)
+        else:
+            process_scene(path)
+    else:
+        raise RuntimeError(f"Unknown task: {task}")
+
+
+def run_safely(task, path, headless=False):
+    try:
+        run(task, path, headless)
+    except Exception:
+        traceback.print_exc()
+        print(f"{task} job failed:", path)
+        return 1
+    print(f"{task} job completed:", path)
+    return 0
+
+
+def run_in_session(task, path, quit_when_done=False):
+    import maya.cmds as cmds
+    exit_code = run_safely(task, path)
+    if quit_when_done:
+        cmds.evalDeferred(lambda: cmds.quit(force=True, exitCode=exit_code))
+    return exit_code
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("usage: mayapy run_job.py cache|shader|build <path>")
+        return 2
+
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    exit_code = run_safely(*argv, headless=True)
+    try:
+        maya.standalone.uninitialize()
+    except Exception as e:
+        print("Maya shutdown failed:", e)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    exit_code = main()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    # Skip interpreter teardown: mayapy can stall there after the work is done
+    os._exit(exit_code)
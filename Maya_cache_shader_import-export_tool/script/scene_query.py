@@ -0,0 +1,123 @@
+import maya.cmds as cmds
+
+
+def _parent_path(long_name):
+    return long_name.rsplit("|", 1)[0]
+
+
+def find_empty_groups():
+    # One ls and one listRelatives over every transform instead of a
+    # listRelatives call per transform
+    transforms = cmds.ls(type="transform", long=True) or []
+    if not transforms:
+        return []
+    children = cmds.listRelatives(transforms, children=True, fullPath=True) or []
+    has_children = set(_parent_path(child) for child in children)
+    return [node for node in transforms if node not in has_children]
+
+
+def find_empty_groups_per_node():
+    empty_groups = []
+    for node in cmds.ls(type="transform", long=True) or []:
+        if not cmds.listRelatives(node, children=True):
+            empty_groups.append(node)
+    return empty_groups
+
+
+def collect_shaders(shading_engines):
+    # connections=True keeps each connection paired with its shading engine,
+    # and a single typed ls replaces nodeType(inherited=True) per connection
+    shaders = {shading_engine: [] for shading_engine in shading_engines}
+    if not shading_engines:
+        return shaders
+    pairs = cmds.listConnections(shading_engines, c=True) or []
+    connected = sorted(set(pairs[1::2]))
+    shading_nodes = set(cmds.ls(connected, type="shadingDependNode") or []) if connected else set()
+    for plug, node in zip(pairs[::2], pairs[1::2]):
+        shading_engine = plug.split(".", 1)[0]
+        if shading_engine in shaders and node in shading_nodes:
+            shaders[shading_engine].append(node)
+    return shaders
+
+
+def _pick_walk_up(member):
+    parent = cmds.pickWalk(member, d='up')
+    return parent[0] if parent else None
+
+
+def _match_names(names, long_names):
+    # ls may drop duplicates, reorder its results or return several paths for
+    # an instance, so results are matched back by name rather than position.
+    # A name only maps to a long name that it is the unique tail of.
+    by_leaf = {}
+    for long_name in long_names:
+        by_leaf.setdefault(long_name.rsplit("|", 1)[-1], []).append(long_name)
+    matched = {}
+    for name in names:
+        tail = "|" + name.lstrip("|")
+        candidates = [long_name for long_name in by_leaf.get(name.rsplit("|", 1)[-1], [])
+                      if long_name == tail or long_name.endswith(tail)]
+        if len(candidates) == 1:
+            matched[name] = candidates[0]
+    return matched
+
+
+def collect_members(shading_engines):
+    # Parents come from long names instead of a pickWalk per member. Components,
+    # top-level members and anything the bulk ls can't match back by name keep
+    # using pickWalk so the names match exactly.
+    members = {shading_engine: cmds.sets(shading_engine, q=True) or [] for shading_engine in shading_engines}
+    flat = sorted(set(member for shading_engine in shading_engines for member in members[shading_engine]
+                      if "." not in member))
+
+    long_names = (cmds.ls(flat, long=True) or []) if flat else []
+    long_by_member = _match_names(flat, long_names)
+
+    parents = sorted(set(
+        _parent_path(long_name) for long_name in long_by_member.values()
+        if long_name.count("|") > 1
+    ))
+    short_names = (cmds.ls(parents) or []) if parents else []
+    short_by_parent = {long_name: short for short, long_name in _match_names(short_names, parents).items()}
+
+    dag_nodes = {}
+    for shading_engine in shading_engines:
+        result = dag_nodes[shading_engine] = []
+        for member in members[shading_engine]:
+            long_name = long_by_member.get(member)
+            parent = None
+            if long_name and long_name.count("|") > 1:
+                parent = short_by_parent.get(_parent_path(long_name))
+            if not parent:
+                parent = _pick_walk_up(member)
+            if parent:
+                result.append(parent)
+    return dag_nodes
+
+
+def collect_shading_info(shading_engines):
+    shaders = collect_shaders(shading_engines)
+    dag_nodes = collect_members(shading_engines)
+    return {
+        shading_engine: {"shaders": shaders[shading_engine], "dag_nodes": dag_nodes[shading_engine]}
+        for shading_engine in shading_engines
+    }
+
+
+def collect_shading_info_per_node(shading_engines):
+    final_dict = {}
+    for shEngine in shading_engines:
+        final_dict[shEngine] = {"shaders": [], "dag_nodes": []}
+
+        connections = cmds.listConnections(shEngine) or []
+        for connection in connections:
+            inherited_types = cmds.nodeType(connection, inherited=True) or []
+            if 'shadingDependNode' in inherited_types:
+                final_dict[shEngine]["shaders"].append(connection)
+
+        members = cmds.sets(shEngine, q=True) or []
+        for member in members:
+            parent = cmds.pickWalk(member, d='up')
+            if parent:
+                final_dict[shEngine]["dag_nodes"].append(parent[0])
+    return final_dict
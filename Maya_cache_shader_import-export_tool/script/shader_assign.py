@@ -0,0 +1,72 @@
+import maya.cmds as cmds
+
+from shader_library import shading_groups
+
+
+class AssignmentReport:
+    def __init__(self):
+        self.assigned = 0
+        self.missing = []
+        self.errors = []
+
+    def print_summary(self, label=""):
+        print(f"Shader assignment {label}: {self.assigned} assigned, "
+              f"{len(self.missing)} missing, {len(self.errors)} error(s)")
+        if self.missing:
+            print("  Objects not found:")
+            for mesh in self.missing:
+                print("   ", mesh)
+        for shading_engine, error in self.errors:
+            print("  Shader assign error:", shading_engine, error)
+
+
+def group_targets(shader_data, ref_name_space):
+    groups = {}
+    for shading_engine, info in shading_groups(shader_data).items():
+        meshes = [f"{ref_name_space}:{mesh}" for mesh in info.get("dag_nodes", [])]
+        if meshes:
+            groups[shading_engine] = meshes
+    return groups
+
+
+def resolve_existing(names):
+    # One ls for every target; only names ls reports differently fall back to objExists
+    existing = set(cmds.ls(names) or [])
+    for name in names:
+        if name not in existing and cmds.objExists(name):
+            existing.add(name)
+    return existing
+
+
+def assign_shader_groups(shader_data, ref_name_space, shading_namespace, report=None):
+    report = report or AssignmentReport()
+    groups = group_targets(shader_data, ref_name_space)
+    if not groups:
+        return report
+
+    all_targets = sorted(set(mesh for meshes in groups.values() for mesh in meshes))
+    existing = resolve_existing(all_targets)
+    report.missing.extend(mesh for mesh in all_targets if mesh not in existing)
+
+    # One forceElement per shading engine: no selection changes, no hyperShade
+    for shading_engine, meshes in groups.items():
+        meshes = [mesh for mesh in meshes if mesh in existing]
+        if not meshes:
+            continue
+        target = f"{shading_namespace}:{shading_engine}"
+        try:
+            cmds.sets(meshes, e=True, forceElement=target)
+            report.assigned += len(meshes)
+        except Exception as e:
+            if not cmds.objExists(target):
+                report.errors.append((shading_engine, e))
+                continue
+            # One bad name (e.g. matching several nodes) fails the whole call;
+            # mesh by mesh, only that mesh is lost
+            for mesh in meshes:
+                try:
+                    cmds.sets(mesh, e=True, forceElement=target)
+                    report.assigned += 1
+                except Exception as mesh_error:
+                    report.errors.append((shading_engine, mesh_error))
+    return report
@@ -0,0 +1,79 @@
+import os
+import json
+import time
+import hashlib
+
+from job_options import get_option
+
+
+LIBRARY_ENV = "MAYA_PIPELINE_SHADER_LIBRARY"
+LIBRARY_KEY = "__library__"
+FINGERPRINT_VERSION = 2
+
+
+def library_root():
+    # Shared folder for shader files; None keeps the per-scene Shader_<scene>/<scene>.ma
+    return get_option("shader_library") or os.environ.get(LIBRARY_ENV) or None
+
+
+# Lines that differ between two exports of the same network: the header
+# comments, file info, plugin requirements and the node UUIDs
+VOLATILE_PREFIXES = ("//", "fileInfo ", "requires ", "currentUnit ", "rename -uid ")
+
+
+def fingerprint(path):
+    # Hash of an exported shader file. Each statement (a line plus its indented
+    # continuation) is hashed in sorted order, so the order Maya wrote the
+    # nodes and connections in doesn't matter. Reading the file Maya already
+    # wrote replaces a getAttr per attribute of every node in the network.
+    digest = hashlib.sha256(("shader-network:%d" % FINGERPRINT_VERSION).encode("utf-8"))
+    statements = []
+    skipping = False
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            text = line.strip()
+            if not text:
+                continue
+            volatile = text.startswith(VOLATILE_PREFIXES)
+            if line[0] not in " \t":
+                skipping = volatile
+                if not skipping:
+                    statements.append([text])
+            elif not skipping and not volatile and statements:
+                statements[-1].append(text)
+    for statement in sorted("\n".join(lines) for lines in statements):
+        digest.update(("\n" + statement).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def library_file(root, digest):
+    return os.path.join(root, digest[:2], digest + ".ma").replace("\\", "/")
+
+
+def publish(root, digest, export, source=None):
+    # export(path) writes (or copies) the shader file. Returns (path, reused): an existing
+    # entry is a lookup, a new one is written under a temp name and renamed so a
+    # concurrent export of the same look never leaves a partial file.
+    path = library_file(root, digest)
+    if os.path.exists(path):
+        return path, True
+
+    folder = os.path.dirname(path)
+    if not os.path.exists(folder):
+        os.makedirs(folder, exist_ok=True)
+    tmp_path = "%s.%d.tmp.ma" % (path[:-3], os.getpid())
+    export(tmp_path)
+    os.replace(tmp_path, path)
+    with open(path[:-3] + ".json", "w") as f:
+        json.dump({"digest": digest, "source": source, "created": time.time()}, f, indent=4)
+    return path, False
+
+
+def library_entry(shader_data):
+    entry = shader_data.get(LIBRARY_KEY) if isinstance(shader_data, dict) else None
+    return entry if isinstance(entry, dict) else None
+
+
+def shading_groups(shader_data):
+    # info_shader.json entries without the reserved library key
+    return {key: value for key, value in shader_data.items() if key != LIBRARY_KEY}
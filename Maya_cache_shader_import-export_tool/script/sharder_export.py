@@ -1,10 +1,20 @@
 import os
-import sys
 import re
+import shutil
 import maya.mel as mel
 import maya.cmds as cmds
 import json
 
+from job_metrics import JobMetrics
+from job_options import get_flag
+import uv_store
+import job_events
+from shader_library import LIBRARY_KEY, fingerprint, library_root, publish
+from scene_query import (
+    find_empty_groups, find_empty_groups_per_node,
+    collect_shading_info, collect_shading_info_per_node,
+)
+
 
 class shader_ex:
     def __init__(self):
@@ -29,40 +39,64 @@ class shader_ex:
         if not meshes:
             return
 
-        for mesh in meshes:
+        for mesh in sorted(set(meshes)):
             if re.search(r'\|mash_grp|\|mash', mesh, re.I):
                 continue
-            data = UVManager().getUVData(mesh)
-            uv_data.setdefault(mesh, data)
-
-        UVManager().write(path, uv_data)
+            uv_data.setdefault(mesh, uv_store.get_uv_data(mesh))
+
+        return uv_store.write(path, uv_data)
+
+    def import_uvs(self, path, namespace=None, meshes=None):
+        # Meshes are stored by long name; a namespace is added to every path part
+        store = uv_store.UVStore(path)
+        applied = []
+        for mesh in meshes or store.meshes:
+            target = mesh
+            if namespace:
+                target = "|".join(f"{namespace}:{part}" if part else part for part in mesh.split("|"))
+            if not cmds.objExists(target):
+                continue
+            try:
+                uv_store.set_uv_data(target, store.load(mesh))
+                applied.append(target)
+            except RuntimeError as e:
+                print("Skipping UVs for", target, "-", e)
+        store.close()
+        return applied
 
     def getShaders(self, scene_path=None):
+        with JobMetrics("shader", scene_path) as metrics:
+            self.metrics = metrics
+            return self.export_shaders(scene_path)
+
+    def export_shaders(self, scene_path=None):
+        metrics = self.metrics
         if scene_path:
             if not os.path.exists(scene_path):
                 raise RuntimeError(f"Scene file not found: {scene_path}")
-            cmds.file(scene_path, open=True, force=True)
+            with metrics.stage("open_scene"):
+                cmds.file(scene_path, open=True, force=True)
         scene_path = cmds.file(q=True, sn=True)
-        curves = cmds.ls(type="nurbsCurve")
-        if curves:
-            curve_transforms = cmds.listRelatives(curves, parent=True, fullPath=True)
-            curve_transforms = list(set(curve_transforms))
-            cmds.delete(curve_transforms)
-            print("Deleted NURBS Curves:", len(curve_transforms))
-        else:
-            print("No NURBS Curves found.")
-        transforms = cmds.ls(type="transform", long=True)
-        empty_groups = []
-        for node in transforms:
-            children = cmds.listRelatives(node, children=True)
-            if not children:
-                empty_groups.append(node)
-
-        if empty_groups:
-            cmds.delete(empty_groups)
-            print("Deleted Empty Groups:", len(empty_groups))
-        else:
-            print("No Empty Groups found.")
+        metrics.scene_path = scene_path
+        bulk_query = get_flag("bulk_scene_query", True)
+        with metrics.stage("delete_curves"):
+            curves = cmds.ls(type="nurbsCurve")
+            if curves:
+                curve_transforms = cmds.listRelatives(curves, parent=True, fullPath=True)
+                curve_transforms = list(set(curve_transforms))
+                cmds.delete(curve_transforms)
+                metrics.count("deleted_curves", len(curve_transforms))
+                print("Deleted NURBS Curves:", len(curve_transforms))
+            else:
+                print("No NURBS Curves found.")
+        with metrics.stage("delete_empty_groups"):
+            empty_groups = find_empty_groups() if bulk_query else find_empty_groups_per_node()
+            if empty_groups:
+                cmds.delete(empty_groups)
+                metrics.count("deleted_empty_groups", len(empty_groups))
+                print("Deleted Empty Groups:", len(empty_groups))
+            else:
+                print("No Empty Groups found.")
 
         scene_dir = os.path.dirname(scene_path)
         basename = os.path.splitext(os.path.basename(scene_path))[0]
@@ -71,42 +105,76 @@ class shader_ex:
         # Create folder if it doesn't exist
         if not os.path.exists(Shader_folder):
             os.makedirs(Shader_folder)
-
-        cmds.select(mel.eval('lsThroughFilter DefaultShadingGroupsAndMaterialsFilter;'), ne=True)
-        shader_file_name = f"{basename}.ma"
-        shader_file_path = os.path.join(Shader_folder, shader_file_name).replace("\\", "/")
-        cmds.file(shader_file_path, options="v=0;", typ="mayaAscii", pr=False, es=True, force=True)
-        cmds.select(cl=True)
+        metrics.output_dir = Shader_folder
+
+        materials = mel.eval('lsThroughFilter DefaultShadingGroupsAndMaterialsFilter;') or []
+        library = library_root()
+        library_info = None
+        if library:
+            # Identical looks share one library file. The look is exported next to
+            # the scene and fingerprinted from that file; an unchanged look is not
+            # copied to the library again.
+            export_path = os.path.join(Shader_folder, f"{basename}.library.tmp.ma").replace("\\", "/")
+            try:
+                with metrics.stage("export_shader_file"):
+                    self.export_selection(materials, export_path)
+                with metrics.stage("fingerprint"):
+                    digest = fingerprint(export_path)
+                with metrics.stage("publish_shader_file"):
+                    shader_file_path, reused = publish(
+                        library, digest, lambda path: shutil.copyfile(export_path, path), scene_path
+                    )
+            finally:
+                if os.path.exists(export_path):
+                    os.remove(export_path)
+            metrics.count("library_reused", int(reused))
+            library_info = {"digest": digest, "shader_file_path": shader_file_path, "reused": reused}
+            print("Shader library entry:", digest, "(reused)" if reused else "(new)")
+        else:
+            shader_file_name = f"{basename}.ma"
+            shader_file_path = os.path.join(Shader_folder, shader_file_name).replace("\\", "/")
+            with metrics.stage("export_shader_file"):
+                self.export_selection(materials, shader_file_path)
 
         connection_info_path = os.path.join(Shader_folder, "info_shader.json")
         uv_export_path = os.path.join(Shader_folder, "uvinfo.json")
 
-        final_dict = {}
-        shading_engines = cmds.ls(type='shadingEngine')
+        with metrics.stage("collect_assignments"):
+            shading_engines = cmds.ls(type='shadingEngine')
+            metrics.count("shading_engines", len(shading_engines))
 
-        for shEngine in shading_engines:
-            final_dict[shEngine] = {"shaders": [], "dag_nodes": []}
+            if bulk_query:
+                final_dict = collect_shading_info(shading_engines)
+            else:
+                final_dict = collect_shading_info_per_node(shading_engines)
+            metrics.count("assigned_meshes", sum(len(info["dag_nodes"]) for info in final_dict.values()))
 
-            connections = cmds.listConnections(shEngine) or []
-            for connection in connections:
-                inherited_types = cmds.nodeType(connection, inherited=True) or []
-                if 'shadingDependNode' in inherited_types:
-                    final_dict[shEngine]["shaders"].append(connection)
+        if library_info:
+            final_dict[LIBRARY_KEY] = library_info
 
-            members = cmds.sets(shEngine, q=True) or []
-            for member in members:
-                parent = cmds.pickWalk(member, d='up')
-                if parent:
-                    final_dict[shEngine]["dag_nodes"].append(parent[0])
+        with metrics.stage("write_json"):
+            with open(connection_info_path, 'w') as f:
+                json.dump(final_dict, f, indent=4)
 
-        with open(connection_info_path, 'w') as f:
-            json.dump(final_dict, f, indent=4)
+        if get_flag("export_uvs"):
+            with metrics.stage("export_uvs"):
+                if self.export_uvs('all', uv_export_path):
+                    print("UV info path:", uv_export_path)
 
+        job_events.emit("asset", task="shader", name=basename, file=shader_file_path, status="ok",
+                        shading_engines=len(shading_engines),
+                        reused=library_info["reused"] if library_info else None)
         print("Shader export completed successfully")
         print("Shader path:", shader_file_path)
         print("Connection info path:", connection_info_path)
-        cmds.file(shader_file_path, options="v=0;", typ="mayaAscii", pr=False, es=True, force=True)
         return shader_file_path, connection_info_path, uv_export_path
+
+    def export_selection(self, nodes, path):
+        cmds.select(nodes, ne=True)
+        try:
+            cmds.file(path, options="v=0;", typ="mayaAscii", pr=False, es=True, force=True)
+        finally:
+            cmds.select(cl=True)
     def maya_close(self):
         print("Process Completed Successfully.")
         cmds.refresh(force=True)
@@ -121,8 +189,6 @@ if __name__ == "__main__":
     except NameError:
         try:
             shader.getShaders()
-            import time
-            time.sleep(6)
             shader.maya_close()
         except Exception as e:
             print("Error during shader export:", e)
@@ -0,0 +1,224 @@
+import os
+import sys
+import json
+import hashlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+STORE_VERSION = 1
+DATA_SUFFIX = ".bin"
+ALIGNMENT = 16
+ARRAYS = (("uvs", "float32"), ("counts", "int32"), ("ids", "int32"))
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("numpy is required for UV export/import")
+
+
+def data_path(index_path):
+    return os.path.splitext(index_path)[0] + DATA_SUFFIX
+
+
+def get_uv_data(mesh):
+    # One MFnMesh per mesh: every UV set as (u, v) pairs plus the per-face
+    # UV counts and UV ids, instead of polyEditUV/polyListComponentConversion
+    # calls per vertex
+    require_numpy()
+    import maya.api.OpenMaya as om
+
+    selection = om.MSelectionList()
+    selection.add(mesh)
+    fn_mesh = om.MFnMesh(selection.getDagPath(0))
+
+    uv_sets = {}
+    for uv_set in fn_mesh.getUVSetNames():
+        u, v = fn_mesh.getUVs(uv_set)
+        counts, ids = fn_mesh.getAssignedUVs(uv_set)
+        uvs = np.empty((len(u), 2), dtype=np.float32)
+        uvs[:, 0] = np.fromiter(u, dtype=np.float32, count=len(u))
+        uvs[:, 1] = np.fromiter(v, dtype=np.float32, count=len(v))
+        uv_sets[uv_set] = {
+            "uvs": uvs,
+            "counts": np.fromiter(counts, dtype=np.int32, count=len(counts)),
+            "ids": np.fromiter(ids, dtype=np.int32, count=len(ids)),
+        }
+    return {
+        "faces": fn_mesh.numPolygons,
+        "current_set": fn_mesh.currentUVSetName(),
+        "sets": uv_sets,
+    }
+
+
+def set_uv_data(mesh, data):
+    # Rebuilds every stored UV set on a mesh with the same topology
+    import maya.api.OpenMaya as om
+
+    selection = om.MSelectionList()
+    selection.add(mesh)
+    fn_mesh = om.MFnMesh(selection.getDagPath(0))
+    if fn_mesh.numPolygons != data["faces"]:
+        raise RuntimeError(f"Face count changed on {mesh}: "
+                           f"{fn_mesh.numPolygons} != {data['faces']}")
+
+    existing = fn_mesh.getUVSetNames()
+    for uv_set, arrays in data["sets"].items():
+        if uv_set not in existing:
+            fn_mesh.createUVSet(uv_set)
+        uvs = np.asarray(arrays["uvs"])
+        fn_mesh.clearUVs(uv_set)
+        fn_mesh.setUVs(uvs[:, 0].tolist(), uvs[:, 1].tolist(), uv_set)
+        fn_mesh.assignUVs(np.asarray(arrays["counts"]).tolist(),
+                          np.asarray(arrays["ids"]).tolist(), uv_set)
+    if data.get("current_set") in data["sets"]:
+        fn_mesh.setCurrentUVSetName(data["current_set"])
+
+
+def _digest(*arrays):
+    digest = hashlib.sha1()
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def write(index_path, uv_data):
+    # uv_data: {mesh: get_uv_data(mesh)}. The arrays go into one flat binary
+    # file next to a small JSON index of offsets and digests, so readers can
+    # memory-map the data and compare exports from the index alone.
+    require_numpy()
+    bin_path = data_path(index_path)
+    meshes = {}
+    offset = 0
+    with open(bin_path + ".tmp", "wb") as f:
+        for mesh in sorted(uv_data):
+            data = uv_data[mesh]
+            sets = {}
+            for uv_set in sorted(data["sets"]):
+                entry = {}
+                arrays = []
+                for name, dtype in ARRAYS:
+                    array = np.ascontiguousarray(data["sets"][uv_set][name], dtype=dtype)
+                    padding = -offset % ALIGNMENT
+                    f.write(b"\0" * padding)
+                    offset += padding
+                    f.write(array.tobytes())
+                    entry[name] = {"offset": offset, "dtype": dtype, "shape": list(array.shape)}
+                    offset += array.nbytes
+                    arrays.append(array)
+                entry["digest"] = _digest(*arrays)
+                sets[uv_set] = entry
+            meshes[mesh] = {
+                "faces": data["faces"],
+                "current_set": data.get("current_set"),
+                "digest": hashlib.sha1("".join(
+                    uv_set + sets[uv_set]["digest"] for uv_set in sorted(sets)
+                ).encode("utf-8")).hexdigest(),
+                "sets": sets,
+            }
+
+    index = {
+        "version": STORE_VERSION,
+        "data": os.path.basename(bin_path),
+        "size": offset,
+        "meshes": meshes,
+    }
+    with open(index_path + ".tmp", "w") as f:
+        json.dump(index, f, indent=4)
+    os.replace(bin_path + ".tmp", bin_path)
+    os.replace(index_path + ".tmp", index_path)
+    return index_path
+
+
+class UVStore:
+    def __init__(self, index_path):
+        self.index_path = index_path
+        with open(index_path, "r") as f:
+            self.index = json.load(f)
+        if self.index.get("version") != STORE_VERSION:
+            raise RuntimeError(f"Unsupported UV store version in {index_path}")
+        self.bin_path = os.path.join(os.path.dirname(index_path), self.index["data"])
+        self._data = None
+
+    @property
+    def meshes(self):
+        return sorted(self.index["meshes"])
+
+    def __contains__(self, mesh):
+        return mesh in self.index["meshes"]
+
+    def digest(self, mesh):
+        return self.index["meshes"][mesh]["digest"]
+
+    def _buffer(self):
+        # Mapped on first use; only the pages of the meshes read are loaded
+        if self._data is None:
+            require_numpy()
+            if self.index["size"]:
+                self._data = np.memmap(self.bin_path, dtype=np.uint8, mode="r")
+            else:
+                self._data = np.zeros(0, dtype=np.uint8)
+        return self._data
+
+    def load(self, mesh):
+        entry = self.index["meshes"][mesh]
+        buffer = self._buffer()
+        sets = {}
+        for uv_set, arrays in entry["sets"].items():
+            sets[uv_set] = {}
+            for name, _ in ARRAYS:
+                info = arrays[name]
+                dtype = np.dtype(info["dtype"])
+                count = int(np.prod(info["shape"]))
+                view = buffer[info["offset"]:info["offset"] + count * dtype.itemsize]
+                sets[uv_set][name] = view.view(dtype).reshape(info["shape"])
+        return {"faces": entry["faces"], "current_set": entry["current_set"], "sets": sets}
+
+    def close(self):
+        self._data = None
+
+
+def compare(index_a, index_b):
+    # Works from the two JSON indexes only; no UV data is read
+    with open(index_a, "r") as f:
+        meshes_a = json.load(f)["meshes"]
+    with open(index_b, "r") as f:
+        meshes_b = json.load(f)["meshes"]
+
+    changed = {}
+    for mesh in sorted(set(meshes_a) & set(meshes_b)):
+        entry_a, entry_b = meshes_a[mesh], meshes_b[mesh]
+        if entry_a["digest"] == entry_b["digest"] and entry_a["faces"] == entry_b["faces"]:
+            continue
+        sets_a, sets_b = entry_a["sets"], entry_b["sets"]
+        changed[mesh] = {
+            "faces": [entry_a["faces"], entry_b["faces"]],
+            "sets": sorted(
+                uv_set for uv_set in set(sets_a) | set(sets_b)
+                if sets_a.get(uv_set, {}).get("digest") != sets_b.get(uv_set, {}).get("digest")
+            ),
+        }
+    return {
+        "changed": changed,
+        "added": sorted(set(meshes_b) - set(meshes_a)),
+        "removed": sorted(set(meshes_a) - set(meshes_b)),
+    }
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare two UV exports (uvinfo.json).")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    args = parser.parse_args(argv)
+
+    result = compare(args.old, args.new)
+    print(json.dumps(result, indent=4))
+    return 1 if result["changed"] or result["added"] or result["removed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+
+
+SCHEMA_VERSION = 2
+INDEXED_NAMES = {"scene_lit.json": "scene_lit", "info_shader.json": "shader_info"}
+LIBRARY_KEY = "__library__"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shots (
+    json_path TEXT PRIMARY KEY,
+    scene_path TEXT,
+    maya_version TEXT,
+    fps TEXT,
+    start_frame REAL,
+    end_frame REAL
+);
+CREATE TABLE IF NOT EXISTS assets (
+    json_path TEXT NOT NULL,
+    asset TEXT NOT NULL,
+    namespace TEXT,
+    ref_file TEXT,
+    cache_file_path TEXT,
+    has_cache INTEGER,
+    cache_status TEXT,
+    shader_file_path TEXT,
+    shader_file_info TEXT,
+    PRIMARY KEY (json_path, asset)
+);
+CREATE TABLE IF NOT EXISTS shader_infos (
+    info_path TEXT PRIMARY KEY,
+    library_digest TEXT,
+    library_file TEXT
+);
+CREATE TABLE IF NOT EXISTS shading_groups (
+    info_path TEXT NOT NULL,
+    shading_engine TEXT NOT NULL,
+    shaders TEXT,
+    dag_nodes INTEGER,
+    PRIMARY KEY (info_path, shading_engine)
+);
+CREATE INDEX IF NOT EXISTS assets_namespace ON assets (namespace);
+CREATE INDEX IF NOT EXISTS assets_ref_file ON assets (ref_file);
+CREATE INDEX IF NOT EXISTS assets_cache_file ON assets (cache_file_path);
+CREATE INDEX IF NOT EXISTS shots_maya_version ON shots (maya_version);
+"""
+
+
+def default_db_path():
+    return os.environ.get(
+        "MAYA_PIPELINE_SHOT_DB",
+        os.path.join(os.path.expanduser("~"), ".maya_pipeline", "shots.db")
+    )
+
+
+def iter_project_files(root):
+    # os.scandir keeps the crawl to one stat per entry; hidden and work folders
+    # (e.g. _abc_fanout) are skipped
+    pending = [root]
+    while pending:
+        folder = pending.pop()
+        try:
+            entries = list(os.scandir(folder))
+        except OSError as e:
+            print("Skipping folder:", folder, e)
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if not entry.name.startswith((".", "_")):
+                    pending.append(entry.path)
+            elif entry.name in INDEXED_NAMES:
+                yield entry
+
+
+class ShotDatabase:
+    def __init__(self, db_path=None):
+        self.db_path = db_path or default_db_path()
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.setup()
+
+    def setup(self):
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            for table in ("files", "shots", "assets", "shader_infos", "shading_groups"):
+                self.connection.execute(f"DROP TABLE IF EXISTS {table}")
+        self.connection.executescript(SCHEMA)
+        self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def index(self, root):
+        # Incremental: files whose mtime and size match the last crawl are not
+        # read again; files that disappeared under root are dropped
+        root = os.path.abspath(root)
+        prefix = os.path.join(root, "")
+        known = {
+            row["path"]: (row["mtime"], row["size"])
+            for row in self.connection.execute("SELECT path, mtime, size FROM files")
+            if row["path"].startswith(prefix)
+        }
+        stats = {"indexed": 0, "unchanged": 0, "removed": 0, "errors": 0}
+        seen = set()
+        with self.connection:
+            for entry in iter_project_files(root):
+                path = os.path.abspath(entry.path)
+                seen.add(path)
+                stat = entry.stat()
+                if known.get(path) == (stat.st_mtime, stat.st_size):
+                    stats["unchanged"] += 1
+                    continue
+                try:
+                    with open(path, "r") as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    print("Failed to index:", path, e)
+                    stats["errors"] += 1
+                    continue
+                self.remove(path)
+                kind = INDEXED_NAMES[entry.name]
+                if kind == "scene_lit":
+                    self.add_scene_lit(path, data)
+                else:
+                    self.add_shader_info(path, data)
+                self.connection.execute(
+                    "INSERT INTO files (path, kind, mtime, size, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                    (path, kind, stat.st_mtime, stat.st_size, time.time())
+                )
+                stats["indexed"] += 1
+
+            for path in set(known) - seen:
+                self.remove(path)
+                stats["removed"] += 1
+        return stats
+
+    def remove(self, path):
+        for table, column in (("files", "path"), ("shots", "json_path"), ("assets", "json_path"),
+                              ("shader_infos", "info_path"), ("shading_groups", "info_path")):
+            self.connection.execute(f"DELETE FROM {table} WHERE {column} = ?", (path,))
+
+    def add_scene_lit(self, path, data):
+        file_info = data.get("File_info", {})
+        frame_range = file_info.get("frame_range", {})
+        self.connection.execute(
+            "INSERT INTO shots (json_path, scene_path, maya_version, fps, start_frame, end_frame) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (path, file_info.get("scene_path"), str(file_info.get("maya_version") or ""),
+             file_info.get("fps"), frame_range.get("start_frame"), frame_range.get("end_frame"))
+        )
+        self.connection.executemany(
+            "INSERT INTO assets (json_path, asset, namespace, ref_file, cache_file_path, has_cache, "
+            "cache_status, shader_file_path, shader_file_info) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (path, asset, info.get("namespace"), info.get("ref_file"), info.get("cache_file_path"),
+                 int(bool(info.get("cache_set"))), info.get("cache_status"), info.get("shader_file_path"),
+                 info.get("shader_file_info"))
+                for asset, info in data.get("Cache_shader_info", {}).items()
+            ]
+        )
+
+    def add_shader_info(self, path, data):
+        library = data.get(LIBRARY_KEY) or {}
+        self.connection.execute(
+            "INSERT INTO shader_infos (info_path, library_digest, library_file) VALUES (?, ?, ?)",
+            (path, library.get("digest"), library.get("shader_file_path"))
+        )
+        self.connection.executemany(
+            "INSERT INTO shading_groups (info_path, shading_engine, shaders, dag_nodes) VALUES (?, ?, ?, ?)",
+            [
+                (path, name, json.dumps(info.get("shaders", [])), len(info.get("dag_nodes", [])))
+                for name, info in data.items() if name != LIBRARY_KEY and isinstance(info, dict)
+            ]
+        )
+
+    def shots(self, asset=None, maya_version=None):
+        # asset matches a namespace, an asset key or a referenced file (name or path)
+        query = ("SELECT DISTINCT shots.* FROM shots LEFT JOIN assets ON assets.json_path = shots.json_path"
+                 " WHERE 1 = 1")
+        params = []
+        if asset:
+            query += (" AND (assets.namespace = ? OR assets.asset = ? OR assets.ref_file = ?"
+                      " OR assets.ref_file LIKE ?)")
+            params += [asset, asset, asset, "%/" + os.path.basename(asset)]
+        if maya_version:
+            query += " AND shots.maya_version LIKE ?"
+            params.append(str(maya_version) + "%")
+        query += " ORDER BY shots.json_path"
+        return [dict(row) for row in self.connection.execute(query, params)]
+
+    def assets(self, json_path=None, cache_file_path=None):
+        query, params = "SELECT * FROM assets WHERE 1 = 1", []
+        if json_path:
+            query += " AND json_path = ?"
+            params.append(json_path)
+        if cache_file_path:
+            query += " AND cache_file_path = ?"
+            params.append(cache_file_path)
+        return [dict(row) for row in self.connection.execute(query + " ORDER BY json_path, asset", params)]
+
+    def stale_caches(self, shots=None):
+        # Checked against the files as they are now: a cache is stale when it is
+        # missing, failed to export or is older than its shot scene. Assets
+        # without a cache set (props, sets) never get a cache and are left out.
+        shots = shots if shots is not None else self.shots()
+        stale = []
+        for shot in shots:
+            try:
+                scene_mtime = os.path.getmtime(shot["scene_path"])
+            except (OSError, TypeError):
+                scene_mtime = None
+            for asset in self.assets(json_path=shot["json_path"]):
+                path = asset["cache_file_path"]
+                if not asset["has_cache"]:
+                    continue
+                if asset["cache_status"] == "error":
+                    reason = "failed"
+                elif not path or not os.path.exists(path):
+                    reason = "missing"
+                elif scene_mtime and os.path.getmtime(path) < scene_mtime:
+                    reason = "older than scene"
+                else:
+                    continue
+                stale.append(dict(asset, scene_path=shot["scene_path"], reason=reason))
+        return stale
+
+
+def jobs_for(shots, task):
+    # Job manifest entries for cli.py: builds run from scene_lit.json, cache
+    # exports from the shot scene
+    jobs = []
+    for shot in shots:
+        path = shot["json_path"] if task == "build" else shot["scene_path"]
+        if path and {"path": path, "task": task} not in jobs:
+            jobs.append({"path": path, "task": task})
+    return jobs
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Index and query scene_lit.json / info_shader.json files.")
+    parser.add_argument("--db", default=None, help="Database path (default: MAYA_PIPELINE_SHOT_DB)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index = commands.add_parser("index", help="Crawl project roots and update the database")
+    index.add_argument("roots", nargs="+")
+
+    query = commands.add_parser("query", help="List shots, optionally as a cli.py job manifest")
+    query.add_argument("--asset", help="Namespace, asset name or referenced file")
+    query.add_argument("--version", help="Maya version, e.g. 2023")
+    query.add_argument("--stale", action="store_true", help="Only shots with stale or missing caches")
+    query.add_argument("--jobs", choices=("build", "cache"), help="Print a job manifest for cli.py run")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    db = ShotDatabase(args.db)
+    try:
+        if args.command == "index":
+            output = {root: db.index(root) for root in args.roots}
+        else:
+            shots = db.shots(asset=args.asset, maya_version=args.version)
+            if args.stale:
+                stale = db.stale_caches(shots)
+                stale_paths = set(entry["json_path"] for entry in stale)
+                shots = [shot for shot in shots if shot["json_path"] in stale_paths]
+                output = {"shots": shots, "stale_caches": stale}
+            else:
+                output = {"shots": shots}
+            if args.jobs:
+                output = {"jobs": jobs_for(shots, args.jobs)}
+    finally:
+        db.close()
+    print(json.dumps(output, indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
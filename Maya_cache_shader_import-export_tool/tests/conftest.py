@@ -0,0 +1,93 @@
+import os
+import sys
+import stat
+
+import pytest
+
+
+TOOL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT_DIR = os.path.join(TOOL_DIR, "script")
+BENCH_DIR = os.path.join(TOOL_DIR, "benchmarks")
+
+for path in (TOOL_DIR, SCRIPT_DIR, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import scene_scan  # noqa: E402
+import fake_maya  # noqa: E402
+
+# The Maya-side scripts import maya.cmds once, so every test shares one fake
+MAYA = fake_maya.install()
+
+
+# Stands in for maya (-command "python(...)") and mayapy (run_job.py <task>
+# <path>). The scene's first line that isn't a comment says what to do: "ok",
+# "exit <code>", "crash", "sleep <seconds>" or "flaky <n>" (crash until the
+# nth launch).
+STUB_MAYA = r'''#!{python}
+import os
+import re
+import sys
+import time
+import signal
+
+if sys.argv[1] == "-command":
+    path = re.search(r"run_in_session\('(\w+)', '([^']+)'", sys.argv[2]).group(2)
+else:
+    path = sys.argv[3]
+with open(path) as f:
+    action = next((line.split() for line in f if not line.startswith("//")), None) or ["ok"]
+print("stub", os.getpid(), path, flush=True)
+
+if action[0] == "exit":
+    sys.exit(int(action[1]))
+if action[0] == "sleep":
+    time.sleep(float(action[1]))
+if action[0] == "crash":
+    os.kill(os.getpid(), signal.SIGKILL)
+if action[0] == "flaky":
+    counter = path + ".launches"
+    launches = int(open(counter).read()) + 1 if os.path.exists(counter) else 1
+    with open(counter, "w") as f:
+        f.write(str(launches))
+    if launches < int(action[1]):
+        os.kill(os.getpid(), signal.SIGKILL)
+'''
+
+
+@pytest.fixture(autouse=True)
+def pipeline_env(tmp_path, monkeypatch):
+    # Keeps the scene index, metrics and options of the tests out of ~/.maya_pipeline
+    monkeypatch.setenv("MAYA_PIPELINE_METRICS_DIR", str(tmp_path / "metrics"))
+    monkeypatch.setenv("MAYA_PIPELINE_INDEX", str(tmp_path / "scene_index.json"))
+    monkeypatch.setenv("MAYA_PIPELINE_CONFIG", str(tmp_path / "maya_versions.json"))
+    for name in ("MAYA_PIPELINE_OPTIONS", "MAYA_PIPELINE_METRICS", "MAYA_PIPELINE_EVENTS",
+                 "MAYA_PIPELINE_WORKER_MAX_MEMORY_MB", "MAYA_EXECUTABLE", "MAYAPY_EXECUTABLE"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(scene_scan, "_default_index", None)
+
+
+@pytest.fixture
+def maya():
+    MAYA.reset()
+    MAYA.batch = True
+    return MAYA
+
+
+@pytest.fixture
+def stub_maya(tmp_path, monkeypatch):
+    if sys.platform == "win32":
+        pytest.skip("the stub executable needs a shebang")
+    path = tmp_path / "stub_maya"
+    path.write_text(STUB_MAYA.format(python=sys.executable))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("MAYA_EXECUTABLE", str(path))
+    monkeypatch.setenv("MAYAPY_EXECUTABLE", str(path))
+    return str(path)
+
+
+def write_scene(folder, name, action="ok"):
+    path = os.path.join(str(folder), name)
+    with open(path, "w") as f:
+        f.write(action + "\n")
+    return path
@@ -0,0 +1,24 @@
+import os
+import sys
+import json
+
+TOOL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(TOOL_DIR, "script"), os.path.join(TOOL_DIR, "benchmarks")]
+
+import fake_maya  # noqa: E402
+
+
+# Stands in for mayapy in abc_fanout_command: "python stub_abc_export.py
+# abc_fanout.py <chunk.json>" exports the chunk on the fake Maya backend. A
+# chunk holding the cache named in STUB_ABC_CRASH exits before writing results.
+
+if __name__ == "__main__":
+    chunk_path = sys.argv[2]
+    with open(chunk_path) as f:
+        chunk = json.load(f)
+    if any(os.path.basename(job["file"]) == os.environ.get("STUB_ABC_CRASH") for job in chunk["jobs"]):
+        os._exit(3)
+
+    fake_maya.install()
+    import abc_fanout
+    abc_fanout.export_chunk(chunk_path)
@@ -0,0 +1,26 @@
+import os
+import sys
+import signal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "script"))
+
+from maya_worker import serve  # noqa: E402
+
+
+# Stands in for script/maya_worker.py: "python stub_worker.py <year>". Each job
+# appends "<year> <pid>" to <scene>.runs, then does what the scene's first
+# line says: "ok", "error" (the handler raises) or "crash" (the worker dies).
+
+def run(job):
+    with open(job["path"]) as f:
+        action = f.readline().strip()
+    with open(job["path"] + ".runs", "a") as f:
+        f.write("%s %d\n" % (sys.argv[1], os.getpid()))
+    if action == "error":
+        raise RuntimeError("stub error")
+    if action == "crash":
+        os.kill(os.getpid(), signal.SIGKILL)
+
+
+if __name__ == "__main__":
+    serve({"cache": run, "shader": run, "build": run})
@@ -0,0 +1,62 @@
+import os
+import sys
+import json
+
+import fake_maya
+import abc_fanout
+from scene_gen import generate_shot
+from cache_script import ExportAlembic
+
+
+STUB_EXPORT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_abc_export.py")
+
+
+def job(name, roots):
+    return {"name": name, "file": name + ".abc", "args": "".join(" -root " + root for root in roots)}
+
+
+def test_split_jobs_balances_roots():
+    jobs = [job("chr", ["a", "b", "c"]), job("prop", ["d"]), job("cam", ["e"]), job("set", ["f", "g"])]
+    chunks = abc_fanout.split_jobs(jobs, 2)
+    assert [[entry["name"] for entry in chunk] for chunk in chunks] == [["chr", "cam"], ["set", "prop"]]
+    assert len(abc_fanout.split_jobs(jobs[:1], 4)) == 1
+
+
+def test_fanout_merges_results_into_scene_lit(tmp_path, monkeypatch, maya):
+    shot = generate_shot(str(tmp_path / "shot"), meshes=20, references=2)
+    monkeypatch.setenv("MAYA_PIPELINE_OPTIONS", json.dumps({
+        "abc_fanout": 2, "abc_fanout_command": [sys.executable, STUB_EXPORT]}))
+    monkeypatch.setenv("STUB_ABC_CRASH", "asset_001.abc")
+
+    ExportAlembic().open_maya(shot["scene"])
+
+    cache_dir = tmp_path / "shot" / "Cache_shot"
+    with open(str(cache_dir / "scene_lit.json")) as f:
+        data = json.load(f)
+    assets = data["Cache_shader_info"]
+    assert assets["asset_000"]["cache_status"] == "ok"
+    assert assets["asset_001"]["cache_status"] == "error"
+    assert fake_maya.read_file(assets["asset_000"]["cache_file_path"])["nodes"]
+    assert not os.path.exists(assets["asset_001"]["cache_file_path"])
+
+    cache_export = data["File_info"]["cache_export"]
+    assert cache_export["workers"] == 2
+    assert list(cache_export["failed"]) == [assets["asset_001"]["cache_file_path"]]
+    assert "exited with code 3" in cache_export["failed"][assets["asset_001"]["cache_file_path"]]
+    # Worker logs are kept when a part failed
+    assert os.path.isdir(str(cache_dir / abc_fanout.FANOUT_DIR))
+
+
+def test_fanout_cleans_up_when_every_part_succeeds(tmp_path, monkeypatch, maya):
+    shot = generate_shot(str(tmp_path / "shot"), meshes=20, references=2)
+    monkeypatch.setenv("MAYA_PIPELINE_OPTIONS", json.dumps({
+        "abc_fanout": 2, "abc_fanout_command": [sys.executable, STUB_EXPORT]}))
+
+    ExportAlembic().open_maya(shot["scene"])
+
+    cache_dir = tmp_path / "shot" / "Cache_shot"
+    with open(str(cache_dir / "scene_lit.json")) as f:
+        data = json.load(f)
+    assert {asset["cache_status"] for asset in data["Cache_shader_info"].values()} == {"ok"}
+    assert data["File_info"]["cache_export"]["failed"] == {}
+    assert not os.path.exists(str(cache_dir / abc_fanout.FANOUT_DIR))
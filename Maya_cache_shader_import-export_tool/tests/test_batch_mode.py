@@ -0,0 +1,43 @@
+import json
+
+from scene_gen import generate_shot
+from bake_planner import BakePlan
+from cache_script import ExportAlembic
+
+
+VIEWPORT_CALLS = ("cmds.getPanel", "cmds.modelEditor", "cmds.refresh", "cmds.scriptJob")
+
+
+def bake_camera(monkeypatch, maya):
+    # Frame events on, so the bake would add a timeChanged scriptJob
+    monkeypatch.setattr("job_events.enabled", lambda: True)
+    maya.scene.add_node("shotCam", "transform")
+    plan = BakePlan(1001, 1010)
+    plan.add_camera("shotCam")
+    return plan.run()
+
+
+def test_bake_skips_viewport_in_batch(monkeypatch, maya):
+    assert bake_camera(monkeypatch, maya)
+    assert [name for name in VIEWPORT_CALLS if maya.calls[name]] == []
+
+
+def test_bake_suspends_viewport_in_gui(monkeypatch, maya):
+    maya.batch = False
+    assert bake_camera(monkeypatch, maya)
+    assert maya.calls["cmds.refresh"] == 2 and maya.calls["cmds.scriptJob"] == 2
+
+
+def test_cache_export_runs_in_batch(tmp_path, maya):
+    shot = generate_shot(str(tmp_path / "shot"), meshes=10, references=1)
+    ExportAlembic().open_maya(shot["scene"])
+    assert maya.calls["cmds.modelEditor"] == 0
+    with open(str(tmp_path / "shot" / "Cache_shot" / "scene_lit.json")) as f:
+        assert json.load(f)["Cache_shader_info"]["asset_000"]["cache_status"] == "ok"
+
+
+def test_cache_export_shows_bounding_boxes_in_gui(tmp_path, maya):
+    maya.batch = False
+    shot = generate_shot(str(tmp_path / "shot"), meshes=10, references=1)
+    ExportAlembic().open_maya(shot["scene"])
+    assert maya.calls["cmds.modelEditor"] >= 4
@@ -0,0 +1,98 @@
+import json
+import time
+import signal
+
+from batch_runner import BatchJob, BatchRunner, JobResult, find_scene_lits
+from conftest import write_scene
+
+
+def maya_2024(path):
+    return 2024
+
+
+def runner(**kwargs):
+    kwargs.setdefault("max_workers", 2)
+    return BatchRunner(version_resolver=maya_2024, force=True, retry_delay=0, **kwargs)
+
+
+def test_launch_failure_stays_pending_in_state(tmp_path, stub_maya, monkeypatch):
+    scene = write_scene(tmp_path, "sh010.ma")
+    state_path = str(tmp_path / "state.json")
+    job = BatchJob.for_task("cache", scene)
+
+    monkeypatch.setenv("MAYAPY_EXECUTABLE", str(tmp_path / "missing_mayapy"))
+    [result] = runner(state_path=state_path).run([job])
+    assert result.status == JobResult.SKIPPED and not result.done
+    with open(state_path) as f:
+        assert [entry["status"] for entry in json.load(f)["jobs"].values()] == ["pending"]
+
+    monkeypatch.setenv("MAYAPY_EXECUTABLE", stub_maya)
+    [result] = runner(state_path=state_path).run([job])
+    assert result.status == JobResult.OK
+
+    [result] = runner(state_path=state_path).run([job])
+    assert result.message == "done in an earlier run"
+
+
+def test_jobs_run_in_parallel(tmp_path, stub_maya):
+    jobs = [BatchJob.for_task("cache", write_scene(tmp_path, "sh%03d.ma" % index, "sleep 1"))
+            for index in range(4)]
+    start = time.time()
+    results = runner(max_workers=4).run(jobs)
+    assert [result.status for result in results] == [JobResult.OK] * 4
+    assert time.time() - start < 3
+
+
+def test_exit_codes_per_job(tmp_path, stub_maya):
+    jobs = [BatchJob.for_task("cache", write_scene(tmp_path, "ok.ma")),
+            BatchJob.for_task("cache", write_scene(tmp_path, "error.ma", "exit 3")),
+            BatchJob.for_task("shader", write_scene(tmp_path, "crash.ma", "crash"))]
+    results = runner(max_workers=3).run(jobs)
+    assert [(result.status, result.exit_code) for result in results] == [
+        (JobResult.OK, 0), (JobResult.FAILED, 3), (JobResult.FAILED, -signal.SIGKILL)]
+    assert results[1].message == "exit code 3"
+
+
+def test_gui_maya_command(tmp_path, stub_maya):
+    # headless=False goes through MAYA_EXECUTABLE -command "python(...)"
+    jobs = [BatchJob.for_task("build", write_scene(tmp_path, "scene_lit.json")),
+            BatchJob.for_task("cache", write_scene(tmp_path, "error.ma", "exit 2"))]
+    results = runner(headless=False).run(jobs)
+    assert [(result.status, result.exit_code) for result in results] == [(JobResult.OK, 0), (JobResult.FAILED, 2)]
+
+
+def test_crashes_are_retried(tmp_path, stub_maya):
+    jobs = [BatchJob.for_task("cache", write_scene(tmp_path, "flaky.ma", "flaky 3")),
+            BatchJob.for_task("cache", write_scene(tmp_path, "error.ma", "exit 3"))]
+    results = runner(retries=2).run(jobs)
+    assert [(result.status, result.attempts) for result in results] == [(JobResult.OK, 3), (JobResult.FAILED, 1)]
+
+
+def test_listed_exit_codes_are_retried(tmp_path, stub_maya):
+    job = BatchJob.for_task("cache", write_scene(tmp_path, "error.ma", "exit 3"))
+    batch = runner(retries=1, retry_exit_codes=(3,))
+    [result] = batch.run([job])
+    assert (result.status, result.attempts) == (JobResult.FAILED, 2)
+    assert [entry["file_path"] for entry in batch.dead_letter] == [job.file_path]
+
+
+def test_summary(tmp_path, stub_maya, capsys):
+    jobs = [BatchJob.for_task("cache", write_scene(tmp_path, "ok.ma")),
+            BatchJob.for_task("cache", write_scene(tmp_path, "error.ma", "exit 1")),
+            BatchJob.for_task("cache", write_scene(tmp_path, "missing.ma"))]
+    batch = BatchRunner(version_resolver=lambda path: None if "missing" in path else 2024, force=True)
+    batch.run(jobs)
+    output = capsys.readouterr().out
+    assert "ok: 1  failed: 1  skipped: 1" in output
+    assert "FAILED: %s exit code 1" % jobs[1].file_path in output
+    assert "SKIPPED: %s version not found" % jobs[2].file_path in output
+
+
+def test_find_scene_lits_matches_the_exact_name(tmp_path):
+    for relative in ("sh010/Cache_sh010/scene_lit.json", "sh020/Cache_sh020/old_scene_lit.json",
+                     "sh030/_abc_fanout/scene_lit.json", "sh040/Cache_sh040/scene_lit.json"):
+        path = tmp_path / relative
+        path.parent.mkdir(parents=True)
+        path.write_text("{}")
+    assert find_scene_lits(str(tmp_path)) == [str(tmp_path / "sh010/Cache_sh010/scene_lit.json"),
+                                              str(tmp_path / "sh040/Cache_sh040/scene_lit.json")]
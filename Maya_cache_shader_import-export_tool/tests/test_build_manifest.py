@@ -0,0 +1,22 @@
+import os
+
+from build_manifest import exporter_version
+
+
+def test_exporter_version_follows_script_edits(tmp_path):
+    script = tmp_path / "cache_script.py"
+    script.write_text("print('v1')\n")
+    (tmp_path / "notes.txt").write_text("not a script\n")
+    first = exporter_version(str(script))
+    assert exporter_version(str(script)) == first
+
+    script.write_text("print('v2')\n")
+    stat = os.stat(str(script))
+    os.utime(str(script), ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+    second = exporter_version(str(script))
+    assert second != first
+
+    (tmp_path / "notes.txt").write_text("still not a script\n")
+    assert exporter_version(str(script)) == second
+    (tmp_path / "helper.py").write_text("")
+    assert exporter_version(str(script)) != second
@@ -0,0 +1,12 @@
+import pytest
+
+import cli
+
+
+@pytest.mark.parametrize("flags", [["--retries", "2"], ["--idle-timeout", "60"], ["--state", "state.json"],
+                                   ["--gui"]])
+def test_warm_rejects_flags_it_would_ignore(tmp_path, capsys, flags):
+    with pytest.raises(SystemExit) as error:
+        cli.main(["cache", str(tmp_path), "--warm"] + flags)
+    assert error.value.code == 2
+    assert "--warm can't be combined with %s" % flags[0] in capsys.readouterr().err
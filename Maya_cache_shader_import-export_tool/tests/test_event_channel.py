@@ -0,0 +1,12 @@
+from event_channel import BatchProgress
+
+
+def test_skipped_jobs_stay_out_of_the_eta():
+    progress = BatchProgress()
+    progress.update({"event": "batch_start", "total": 4, "workers": 1})
+    progress.update({"event": "job_done", "job": "a.ma", "status": "ok", "duration": 100.0})
+    for job in ("b.ma", "c.ma"):
+        progress.update({"event": "job_done", "job": job, "status": "skipped", "duration": 0.0})
+    snapshot = progress.snapshot()
+    assert snapshot["done"] == 3
+    assert snapshot["eta_seconds"] == 100.0
@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+import threading
+import subprocess
+
+import farm_queue
+from batch_runner import BatchJob, JobResult
+from conftest import TOOL_DIR, write_scene
+
+
+def submit_scenes(queue_dir, folder, count, action="ok"):
+    # The farm worker takes the Maya version from the header
+    jobs = [BatchJob.for_task("cache", write_scene(folder, "sh%03d.ma" % index, "//Maya ASCII 2024 scene\n" + action))
+            for index in range(count)]
+    return farm_queue.submit(queue_dir, jobs)
+
+
+def listing(queue_dir, folder):
+    return sorted(name[:-5] for name in os.listdir(os.path.join(queue_dir, folder)) if name.endswith(".json"))
+
+
+def test_each_job_is_claimed_once(tmp_path):
+    queue_dir = str(tmp_path / "queue")
+    ids = submit_scenes(queue_dir, tmp_path, 20)
+    claimed = []
+
+    def drain(worker):
+        while True:
+            job, lease = farm_queue.claim(queue_dir, worker)
+            if not job:
+                return
+            claimed.append(job["id"])
+
+    threads = [threading.Thread(target=drain, args=("worker%d" % index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(ids)
+    assert listing(queue_dir, "pending") == []
+    assert listing(queue_dir, "claimed") == sorted(ids)
+
+
+def test_claim_order_follows_priority(tmp_path):
+    queue_dir = str(tmp_path / "queue")
+    low = farm_queue.submit(queue_dir, [BatchJob.for_task("cache", write_scene(tmp_path, "low.ma"))])
+    high = farm_queue.submit(queue_dir, [BatchJob.for_task("cache", write_scene(tmp_path, "high.ma"), priority=5)])
+    assert farm_queue.claim(queue_dir, "worker")[0]["id"] == high[0]
+    assert farm_queue.claim(queue_dir, "worker")[0]["id"] == low[0]
+
+
+def test_expired_lease_is_requeued(tmp_path):
+    queue_dir = str(tmp_path / "queue")
+    [job_id] = submit_scenes(queue_dir, tmp_path, 1)
+    job, lease = farm_queue.claim(queue_dir, "other-host:1:0")
+    assert farm_queue.release_stale(queue_dir, lease_timeout=60) == []
+
+    # A lease that stopped beating long ago, from a worker on another node
+    farm_queue.write_json(lease.path, {"worker": "other-host:1:0", "host": "other-host",
+                                       "heartbeat": time.time() - 120})
+    assert farm_queue.release_stale(queue_dir, lease_timeout=60) == [job_id]
+    assert listing(queue_dir, "pending") == [job_id]
+    assert not os.path.exists(lease.path)
+    assert not lease.owned()
+
+    job, _ = farm_queue.claim(queue_dir, "worker")
+    assert job["attempts"] == 2
+
+
+def test_lease_of_dead_local_worker_expires(tmp_path):
+    queue_dir = str(tmp_path / "queue")
+    [job_id] = submit_scenes(queue_dir, tmp_path, 1)
+    _, lease = farm_queue.claim(queue_dir, "worker")
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    lease_data = farm_queue.read_json(lease.path)
+    farm_queue.write_json(lease.path, dict(lease_data, pid=process.pid))
+    assert farm_queue.release_stale(queue_dir, lease_timeout=3600) == [job_id]
+
+
+def test_job_out_of_attempts_goes_to_failed(tmp_path):
+    queue_dir = str(tmp_path / "queue")
+    [job_id] = submit_scenes(queue_dir, tmp_path, 1)
+    for attempt in range(2):
+        _, lease = farm_queue.claim(queue_dir, "worker")
+        farm_queue.write_json(lease.path, {"worker": "worker", "heartbeat": 0})
+        farm_queue.release_stale(queue_dir, lease_timeout=60, max_attempts=2)
+    assert listing(queue_dir, "failed") == [job_id]
+    result = farm_queue.read_json(os.path.join(queue_dir, "failed", job_id + ".json"))["result"]
+    assert result["message"] == "lease expired"
+
+
+def test_two_workers_drain_the_queue(tmp_path, stub_maya):
+    queue_dir = str(tmp_path / "queue")
+    ids = submit_scenes(queue_dir, tmp_path, 10, "sleep 0.3")
+    command = [sys.executable, os.path.join(TOOL_DIR, "farm_queue.py"), "worker", queue_dir,
+               "--slots", "2", "--poll", "0.1", "--exit-when-empty"]
+    workers = [subprocess.Popen(command, stdout=subprocess.DEVNULL) for _ in range(2)]
+    for worker in workers:
+        assert worker.wait(timeout=60) == 0
+
+    assert listing(queue_dir, "done") == sorted(ids)
+    assert listing(queue_dir, "pending") == listing(queue_dir, "claimed") == listing(queue_dir, "failed") == []
+    nodes = set()
+    for job_id in ids:
+        job = farm_queue.read_json(os.path.join(queue_dir, "done", job_id + ".json"))
+        assert (job["attempts"], job["result"]["status"]) == (1, "ok")
+        nodes.add(job["result"]["worker"].rsplit(":", 1)[0])
+        with open(os.path.join(queue_dir, "done", job_id + ".log")) as f:
+            assert sum(1 for line in f if line.startswith("stub ")) == 1
+    assert nodes == {"%s:%d" % (farm_queue.socket.gethostname(), worker.pid) for worker in workers}
+
+
+class StolenLeaseRunner:
+    # Runs while the lease goes stale and another worker claims the job
+    def __init__(self, queue_dir):
+        self.queue_dir = queue_dir
+        self.log = print
+
+    def run_job(self, job):
+        self.log("first owner")
+        lease_path = os.path.join(self.queue_dir, "leases", os.listdir(os.path.join(self.queue_dir, "leases"))[0])
+        farm_queue.write_json(lease_path, dict(farm_queue.read_json(lease_path), heartbeat=0))
+        farm_queue.release_stale(self.queue_dir, lease_timeout=60)
+        farm_queue.claim(self.queue_dir, "other-host:1:0")
+        return JobResult(job.file_path, JobResult.OK)
+
+
+def test_lost_lease_parks_its_log(tmp_path):
+    queue_dir = str(tmp_path / "queue")
+    [job_id] = submit_scenes(queue_dir, tmp_path, 1)
+    worker = farm_queue.FarmWorker(queue_dir, runner_factory=lambda: StolenLeaseRunner(queue_dir), heartbeat=3600,
+                                   poll_interval=0.1, exit_when_empty=True)
+    job, lease = farm_queue.claim(queue_dir, "worker")
+    worker.run_claimed(job, lease, "worker")
+
+    assert worker.processed == 0
+    assert sorted(os.listdir(os.path.join(queue_dir, "claimed"))) == [job_id + ".json"]
+    with open(os.path.join(queue_dir, "failed", job_id + ".1.log")) as f:
+        assert f.read() == "first owner\n"
+    assert farm_queue.read_json(os.path.join(queue_dir, "claimed", job_id + ".json"))["attempts"] == 2
+
+
+def test_worker_exits_when_only_logs_are_left(tmp_path):
+    queue_dir = str(tmp_path / "queue")
+    folders = farm_queue.queue_folders(queue_dir)
+    with open(os.path.join(folders["claimed"], "orphan.1.log"), "w") as f:
+        f.write("left behind\n")
+    worker = farm_queue.FarmWorker(queue_dir, poll_interval=0.1, exit_when_empty=True)
+    thread = threading.Thread(target=worker.run, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
@@ -0,0 +1,81 @@
+from scene_scan import SceneIndex, scan_scene
+from reference_plan import plan_references
+
+
+# Header as Maya writes it: the "file -rdi 1" lines carry the load state, the
+# "file -r" lines always have -dr 1
+SHOT_HEADER = """//Maya ASCII 2024 scene
+//Name: shot.ma
+//Codeset: 1252
+file -rdi 1 -ns "chr" -rfn "chrRN" -op "v=0;" -typ "mayaAscii" "{chr}";
+file -rdi 1 -ns "cam" -rfn "camRN" -typ "mayaAscii" "{cam}";
+file -rdi 2 -ns "hair" -rfn "chr:hairRN" -typ "mayaAscii" "{prop}";
+file -rdi 1 -ns "prop" -dr 1 -rfn "propRN" -typ "mayaAscii" "{prop}";
+file -r -ns "chr" -dr 1 -rfn "chrRN" -op "v=0;" -typ "mayaAscii" "{chr}";
+file -r -ns "cam" -dr 1 -rfn "camRN" -typ "mayaAscii" "{cam}";
+file -r -ns "prop" -dr 1 -rfn "propRN" -typ "mayaAscii" "{prop}";
+file -r -ns "set" -dr 1 -rfn "setRN" -typ "mayaAscii" "{set}";
+requires maya "2024";
+currentUnit -l centimeter -a degree -t film;
+fileInfo "application" "maya";
+createNode transform -s -n "persp";
+"""
+
+CACHED_ASSET = """//Maya ASCII 2024 scene
+createNode transform -n "geo";
+createNode objectSet -n "Cache";
+"""
+
+CAMERA_ASSET = """//Maya ASCII 2024 scene
+createNode transform -n "shotCam";
+createNode camera -n "shotCamShape" -p "shotCam";
+"""
+
+PLAIN_ASSET = """//Maya ASCII 2024 scene
+createNode transform -n "set_dressing";
+"""
+
+
+def write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+
+def make_shot(tmp_path):
+    paths = {
+        "chr": write(str(tmp_path / "chr.ma"), CACHED_ASSET),
+        "cam": write(str(tmp_path / "cam.ma"), CAMERA_ASSET),
+        "prop": write(str(tmp_path / "prop.ma"), CACHED_ASSET),
+        "set": write(str(tmp_path / "set.ma"), PLAIN_ASSET),
+    }
+    return write(str(tmp_path / "shot.ma"), SHOT_HEADER.format(**paths))
+
+
+def test_scan_reads_load_state_from_rdi_lines(tmp_path):
+    info = scan_scene(make_shot(tmp_path))
+    deferred = {ref["ref_node"]: ref["deferred"] for ref in info["references"]}
+    assert deferred == {"chrRN": False, "camRN": False, "propRN": True, "setRN": True}
+    assert info["maya_version"] == 2024
+
+
+def test_scan_without_rdi_lines_is_not_deferred(tmp_path):
+    path = write(str(tmp_path / "shot.ma"), "//Maya ASCII 2024 scene\n"
+                 'file -r -ns "chr" -dr 1 -rfn "chrRN" -typ "mayaAscii" "chr.ma";\n')
+    assert [ref["deferred"] for ref in scan_scene(path)["references"]] == [False]
+
+
+def test_plan_loads_cached_and_camera_references(tmp_path):
+    index = SceneIndex(str(tmp_path / "index.json"))
+    plan = plan_references(make_shot(tmp_path), index=index)
+    assert plan["load"] == ["chrRN", "camRN"]
+    assert plan["reasons"] == {"chrRN": "cache_set", "camRN": "camera"}
+    assert sorted(plan["skip"]) == ["propRN", "setRN"]
+
+
+def test_plan_loads_listed_deferred_reference(tmp_path):
+    index = SceneIndex(str(tmp_path / "index.json"))
+    plan = plan_references(make_shot(tmp_path), ["prop"], index=index)
+    assert plan["load"] == ["chrRN", "camRN", "propRN"]
+    assert plan["reasons"]["propRN"] == "listed"
+    assert plan["skip"] == ["setRN"]
@@ -0,0 +1,54 @@
+import maya.cmds as cmds
+
+from scene_query import collect_members, collect_shading_info_per_node
+
+
+def make_scene(maya):
+    scene = maya.scene
+    scene.add_node("chr:root", "transform")
+    for name in ("body", "head", "eye"):
+        scene.add_node("chr:" + name, "transform", "chr:root")
+        scene.add_node("chr:%sShape" % name, "mesh", "chr:" + name)
+    # A top-level transform with its shape, and a loose top-level mesh
+    scene.add_node("ground", "transform")
+    scene.add_node("groundShape", "mesh", "ground")
+    scene.add_node("looseShape", "mesh")
+    for name in ("skin_SG", "eye_SG"):
+        scene.add_node(name, "shadingEngine")
+    # headShape is shared, and a face set sits next to whole meshes
+    for member in ("chr:bodyShape", "chr:headShape", "groundShape", "looseShape", "chr:headShape.f[0:3]"):
+        scene.add_member("skin_SG", member)
+    for member in ("chr:eyeShape", "chr:headShape"):
+        scene.add_member("eye_SG", member)
+    return ["skin_SG", "eye_SG"]
+
+
+def per_node(shading_engines):
+    info = collect_shading_info_per_node(shading_engines)
+    return {shading_engine: info[shading_engine]["dag_nodes"] for shading_engine in shading_engines}
+
+
+def test_bulk_members_match_pick_walk(maya):
+    shading_engines = make_scene(maya)
+    expected = per_node(shading_engines)
+    assert expected["skin_SG"] == ["chr:body", "chr:head", "ground", "looseShape", "chr:head"]
+    maya.calls.clear()
+    assert collect_members(shading_engines) == expected
+    assert maya.calls["cmds.pickWalk"] == 2
+
+
+def test_bulk_members_do_not_rely_on_ls_order(maya, monkeypatch):
+    # Maya's ls can return its results in another order than its arguments,
+    # and more than one path for an instanced shape
+    shading_engines = make_scene(maya)
+    expected = per_node(shading_engines)
+    ls = cmds.ls
+
+    def shuffled_ls(*args, **kwargs):
+        result = list(reversed(ls(*args, **kwargs) or []))
+        if kwargs.get("long") and "|chr:root|chr:eye|chr:eyeShape" in result:
+            result.append("|other|chr:eyeShape")
+        return result
+
+    monkeypatch.setattr(cmds, "ls", shuffled_ls)
+    assert collect_members(shading_engines) == expected
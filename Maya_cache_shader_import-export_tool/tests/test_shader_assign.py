@@ -0,0 +1,59 @@
+import maya.cmds as cmds
+
+from shader_assign import assign_shader_groups
+
+
+SHADER_DATA = {
+    "skin_SG": {"dag_nodes": ["body", "head", "ghost"], "shaders": ["skin"]},
+    "eye_SG": {"dag_nodes": ["eye"], "shaders": ["eye"]},
+    "__library__": {"digest": "abc"},
+}
+
+
+def make_asset(maya):
+    for name in ("body", "head", "eye"):
+        maya.scene.add_node("chr:" + name, "transform")
+        maya.scene.add_node("chr:%sShape" % name, "mesh", "chr:" + name)
+    for name in ("skin_SG", "eye_SG"):
+        maya.scene.add_node("shd:" + name, "shadingEngine")
+
+
+def members(maya, shading_engine):
+    return sorted(maya.scene.members.get("shd:" + shading_engine, []))
+
+
+def test_one_sets_call_per_shading_engine(maya):
+    make_asset(maya)
+    report = assign_shader_groups(SHADER_DATA, "chr", "shd")
+    assert (report.assigned, report.missing, report.errors) == (3, ["chr:ghost"], [])
+    assert members(maya, "skin_SG") == ["chr:bodyShape", "chr:headShape"]
+    assert members(maya, "eye_SG") == ["chr:eyeShape"]
+    assert maya.calls["cmds.sets"] == 2
+
+
+def test_ambiguous_name_only_loses_that_mesh(maya, monkeypatch):
+    # "chr:head" exists but matches several nodes, so sets raises for it
+    make_asset(maya)
+    sets = cmds.sets
+
+    def ambiguous_sets(nodes, **kwargs):
+        if "chr:head" in ([nodes] if isinstance(nodes, str) else nodes):
+            raise ValueError("More than one object matches name: chr:head")
+        return sets(nodes, **kwargs)
+
+    monkeypatch.setattr(cmds, "sets", ambiguous_sets)
+    report = assign_shader_groups(SHADER_DATA, "chr", "shd")
+    assert report.assigned == 2
+    assert [(shading_engine, str(error)) for shading_engine, error in report.errors] == [
+        ("skin_SG", "More than one object matches name: chr:head")]
+    assert members(maya, "skin_SG") == ["chr:bodyShape"]
+    assert members(maya, "eye_SG") == ["chr:eyeShape"]
+
+
+def test_missing_shading_engine_is_one_error(maya):
+    make_asset(maya)
+    maya.scene.remove_node("shd:skin_SG")
+    report = assign_shader_groups(SHADER_DATA, "chr", "shd")
+    assert report.assigned == 1
+    assert [shading_engine for shading_engine, _ in report.errors] == ["skin_SG"]
+    assert maya.calls["cmds.sets"] == 2
@@ -0,0 +1,67 @@
+import os
+import json
+import shutil
+
+from scene_gen import generate_shot
+from sharder_export import shader_ex
+from shader_library import fingerprint, library_file
+
+
+SHADER_FILE = """//Maya ASCII 2024 scene
+//Name: {name}.ma
+//Last modified: {modified}
+//Codeset: 1252
+requires maya "2024";
+currentUnit -l centimeter -a degree -t film;
+fileInfo "UUID" "{uuid}";
+{nodes}
+connectAttr "skin.oc" "skin_SG.ss";
+connectAttr "skin_tex.oc" "skin.c";
+"""
+
+NODES = [
+    'createNode lambert -n "skin";\n\trename -uid "{uuid}-1";\n\tsetAttr ".dc" 0.8;',
+    'createNode file -n "skin_tex";\n\trename -uid "{uuid}-2";\n\tsetAttr ".ftn" -type "string"\n\t\t"skin.tx";',
+    'createNode shadingEngine -n "skin_SG";\n\trename -uid "{uuid}-3";\n\tsetAttr ".ro" yes;',
+]
+
+
+def write_shader_file(path, nodes, name="asset", modified="Mon, Jan 01, 2024", uuid="A"):
+    with open(path, "w") as f:
+        f.write(SHADER_FILE.format(name=name, modified=modified, uuid=uuid,
+                                   nodes="\n".join(nodes).format(uuid=uuid)))
+    return path
+
+
+def test_fingerprint_ignores_header_uuids_and_order(tmp_path):
+    first = fingerprint(write_shader_file(str(tmp_path / "a.ma"), NODES))
+    second = fingerprint(write_shader_file(str(tmp_path / "b.ma"), list(reversed(NODES)), name="other",
+                                           modified="Tue, Feb 02, 2025", uuid="B"))
+    changed = fingerprint(write_shader_file(str(tmp_path / "c.ma"), [NODES[0].replace("0.8", "0.5")] + NODES[1:]))
+    wrapped = fingerprint(write_shader_file(str(tmp_path / "d.ma"), NODES[:1] + [NODES[1].replace("skin.tx", "eye.tx")]
+                                            + NODES[2:]))
+    assert first == second
+    assert len({first, changed, wrapped}) == 3
+
+
+def test_unchanged_look_reuses_the_library_file(tmp_path, monkeypatch, maya):
+    library = str(tmp_path / "library")
+    monkeypatch.setenv("MAYA_PIPELINE_SHADER_LIBRARY", library)
+    shot = generate_shot(str(tmp_path / "shot"), meshes=10, references=1)
+    copy = str(tmp_path / "copy" / "asset_000.ma")
+    os.makedirs(os.path.dirname(copy))
+    shutil.copyfile(shot["assets"][0], copy)
+
+    infos = []
+    for asset in (shot["assets"][0], copy):
+        maya.calls.clear()
+        shader_file_path, connection_info_path, _ = shader_ex().getShaders(asset)
+        assert maya.calls["cmds.getAttr"] == 0
+        with open(connection_info_path) as f:
+            infos.append(json.load(f)["__library__"])
+        assert not [name for name in os.listdir(os.path.dirname(connection_info_path)) if name.endswith(".ma")]
+
+    assert [info["reused"] for info in infos] == [False, True]
+    assert infos[0]["digest"] == infos[1]["digest"]
+    assert infos[1]["shader_file_path"] == library_file(library, infos[0]["digest"])
+    assert os.path.exists(infos[1]["shader_file_path"])
@@ -0,0 +1,48 @@
+import os
+import json
+
+from shot_db import ShotDatabase, jobs_for
+
+
+def write_shot(root, assets):
+    shot_dir = root / "sh010"
+    cache_dir = shot_dir / "Cache_sh010"
+    cache_dir.mkdir(parents=True)
+    scene_path = shot_dir / "sh010.ma"
+    scene_path.write_text("//Maya ASCII 2024 scene\n")
+    entries = {}
+    for name, cache_set, exported in assets:
+        cache_path = cache_dir / (name + ".abc")
+        if exported:
+            cache_path.write_bytes(b"Ogawa")
+        entries[name] = {"namespace": name, "ref_file": "%s.ma" % name, "cache_file_path": str(cache_path),
+                         "cache_set": cache_set}
+    json_path = cache_dir / "scene_lit.json"
+    json_path.write_text(json.dumps({
+        "File_info": {"scene_path": str(scene_path), "maya_version": "2024"},
+        "Cache_shader_info": entries,
+    }))
+    os.utime(str(scene_path), (0, 0))
+    return str(json_path)
+
+
+def test_assets_without_cache_set_are_not_stale(tmp_path):
+    write_shot(tmp_path, [("chr_hero", ["geo"], True), ("prop_table", [], False)])
+    db = ShotDatabase(str(tmp_path / "shots.db"))
+    try:
+        assert db.index(str(tmp_path))["indexed"] == 1
+        assert db.stale_caches() == []
+    finally:
+        db.close()
+
+
+def test_missing_cache_is_stale(tmp_path):
+    write_shot(tmp_path, [("chr_hero", ["geo"], False), ("prop_table", [], False)])
+    db = ShotDatabase(str(tmp_path / "shots.db"))
+    try:
+        db.index(str(tmp_path))
+        stale = db.stale_caches()
+        assert [(entry["asset"], entry["reason"]) for entry in stale] == [("chr_hero", "missing")]
+        assert jobs_for(db.shots(), "cache") == [{"path": stale[0]["scene_path"], "task": "cache"}]
+    finally:
+        db.close()
@@ -0,0 +1,99 @@
+import os
+import sys
+
+import pytest
+
+from batch_runner import BatchJob, JobResult
+from conftest import write_scene
+from job_metrics import current_memory_mb
+from worker_pool import MAX_MEMORY_ENV, WorkerPool
+
+
+STUB_WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_worker.py")
+
+
+def stub_command(year):
+    return [sys.executable, STUB_WORKER, str(year)]
+
+
+def version_from_name(path):
+    return int(os.path.basename(path)[:4])
+
+
+def pool(**kwargs):
+    return WorkerPool(command_resolver=stub_command, version_resolver=version_from_name, force=True, **kwargs)
+
+
+def runs(job):
+    with open(job.file_path + ".runs") as f:
+        return [tuple(int(value) for value in line.split()) for line in f]
+
+
+def cache_jobs(folder, actions, year=2024):
+    return [BatchJob.for_task("cache", write_scene(folder, "%d_sh%03d.ma" % (year, index), action))
+            for index, action in enumerate(actions)]
+
+
+def test_jobs_go_to_workers_of_their_version(tmp_path):
+    jobs = cache_jobs(tmp_path, ["ok", "error", "ok"], 2023) + cache_jobs(tmp_path, ["ok", "ok"], 2024)
+    workers = pool(size=2)
+    try:
+        results = workers.run(jobs)
+    finally:
+        workers.close()
+    assert [result.status for result in results] == [
+        JobResult.OK, JobResult.FAILED, JobResult.OK, JobResult.OK, JobResult.OK]
+    assert results[1].message == "stub error"
+    for job in jobs:
+        [(year, _)] = runs(job)
+        assert year == version_from_name(job.file_path)
+
+
+def test_workers_stay_warm_between_runs(tmp_path):
+    first, second = cache_jobs(tmp_path, ["ok", "ok"])
+    workers = pool(size=1)
+    try:
+        workers.run([first])
+        workers.run([second])
+        assert runs(first)[0][1] == runs(second)[0][1]
+    finally:
+        workers.close()
+    assert workers._idle == {}
+
+
+def test_worker_recycled_after_max_jobs(tmp_path):
+    jobs = cache_jobs(tmp_path, ["ok"] * 4)
+    workers = pool(size=1, max_jobs_per_worker=2)
+    try:
+        workers.run(jobs)
+    finally:
+        workers.close()
+    pids = [runs(job)[0][1] for job in jobs]
+    assert pids[0] == pids[1] != pids[2] == pids[3]
+
+
+@pytest.mark.skipif(current_memory_mb() is None, reason="no memory reading on this platform")
+def test_worker_recycled_over_memory_ceiling(tmp_path, monkeypatch):
+    monkeypatch.setenv(MAX_MEMORY_ENV, "1")
+    jobs = cache_jobs(tmp_path, ["ok"] * 3)
+    workers = pool(size=1)
+    assert workers.max_memory_mb == 1
+    try:
+        results = workers.run(jobs)
+    finally:
+        workers.close()
+    assert [result.status for result in results] == [JobResult.OK] * 3
+    assert len({runs(job)[0][1] for job in jobs}) == 3
+
+
+def test_crashed_worker_is_replaced(tmp_path):
+    jobs = cache_jobs(tmp_path, ["ok", "crash", "ok"])
+    workers = pool(size=1)
+    try:
+        results = workers.run(jobs)
+    finally:
+        workers.close()
+    assert [result.status for result in results] == [JobResult.OK, JobResult.FAILED, JobResult.OK]
+    assert "exited" in results[1].message
+    pids = [runs(job)[0][1] for job in jobs]
+    assert pids[0] == pids[1] != pids[2]
@@ -0,0 +1,226 @@
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from build_manifest import resolve_reference
+from shot_db import LIBRARY_KEY, iter_project_files
+
+
+# Checks what a cache export wrote without opening Maya: every Alembic cache,
+# shader file and info_shader.json named in a scene_lit.json must exist, be
+# complete and be newer than the scene it came from. Shots are checked in a
+# process pool, one shot per task.
+
+SCENE_LIT = "scene_lit.json"
+OGAWA_MAGIC = b"Ogawa"
+OGAWA_FROZEN = 0xff
+OGAWA_HEADER = struct.Struct("<5sBHQ")
+HDF5_MAGIC = b"\x89HDF\r\n\x1a\n"
+MAYA_ASCII_HEADER = b"//Maya ASCII"
+MIN_CACHE_SIZE = 1024
+MIN_SHADER_SIZE = 256
+PASS, FAIL = "pass", "fail"
+
+
+def file_problems(path, stat, min_size, source_mtime=None):
+    if stat is None:
+        return ["missing: %s" % path]
+    problems = []
+    if stat.st_size < min_size:
+        problems.append("too small (%d bytes): %s" % (stat.st_size, path))
+    if source_mtime and stat.st_mtime < source_mtime:
+        problems.append("older than its source: %s" % path)
+    return problems
+
+
+def stat_or_none(path):
+    try:
+        return os.stat(path) if path else None
+    except OSError:
+        return None
+
+
+def ogawa_problems(path, size):
+    # Header: magic, frozen flag (0xff once the writer closed the archive, 0x00
+    # while it is still being written), version, offset of the root group
+    with open(path, "rb") as f:
+        header = f.read(OGAWA_HEADER.size)
+    if header.startswith(HDF5_MAGIC):
+        return ["HDF5 archive, expected Ogawa: %s" % path]
+    if len(header) < OGAWA_HEADER.size or not header.startswith(OGAWA_MAGIC):
+        return ["not an Alembic Ogawa file: %s" % path]
+    _, frozen, _, root = OGAWA_HEADER.unpack(header)
+    if frozen != OGAWA_FROZEN:
+        return ["incomplete archive (never closed): %s" % path]
+    if not OGAWA_HEADER.size <= root < size:
+        return ["root group offset past the end of the file: %s" % path]
+    return []
+
+
+def missing_roots(path, roots):
+    # Object headers store each name after its uint32 length; they are written
+    # when the archive closes, so searching from the end finds them quickly
+    names = []
+    for root in roots:
+        name = root.split("|")[-1].rsplit(":", 1)[-1]
+        if name and name not in names:
+            names.append(name)
+    if not names:
+        return []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return [name for name in names
+                if data.rfind(struct.pack("<I", len(name)) + name.encode("utf-8")) < 0]
+
+
+def shader_library_file(info):
+    library = info.get(LIBRARY_KEY) if isinstance(info, dict) else None
+    return library.get("shader_file_path") if isinstance(library, dict) else None
+
+
+def check_cache(entry, scene_mtime, min_size):
+    path = entry.get("cache_file_path")
+    roots = entry.get("cache_set") or []
+    if entry.get("cache_status") == "error":
+        return ["export failed: %s" % path]
+    if not roots:
+        return []
+    stat = stat_or_none(path)
+    problems = file_problems(path, stat, min_size, scene_mtime)
+    if stat is None or stat.st_size < OGAWA_HEADER.size:
+        return problems
+    problems += ogawa_problems(path, stat.st_size)
+    if not problems:
+        problems += ["cache set root %s not in: %s" % (name, path) for name in missing_roots(path, roots)]
+    return problems
+
+
+def check_shader(entry, source_mtime, min_size):
+    # info_shader.json may point at a shared library file instead of the
+    # per-asset shader file, as in the lighting build
+    info_path = entry.get("shader_file_info")
+    info_stat = stat_or_none(info_path)
+    problems = file_problems(info_path, info_stat, 2, source_mtime)
+    info = None
+    if info_stat is not None:
+        try:
+            with open(info_path, "r") as f:
+                info = json.load(f)
+        except (OSError, ValueError) as e:
+            problems.append("unreadable shader info: %s (%s)" % (info_path, e))
+        else:
+            if not isinstance(info, dict) or not any(key != LIBRARY_KEY for key in info):
+                problems.append("no shading groups in: %s" % info_path)
+
+    library_file = shader_library_file(info)
+    path = library_file or entry.get("shader_file_path")
+    stat = stat_or_none(path)
+    # A library file is shared between assets, so it can be older than this one
+    problems += file_problems(path, stat, min_size, None if library_file else source_mtime)
+    if stat is not None and entry.get("shader_type", "mayaAscii") == "mayaAscii":
+        with open(path, "rb") as f:
+            if f.read(len(MAYA_ASCII_HEADER)) != MAYA_ASCII_HEADER:
+                problems.append("not a Maya ASCII file: %s" % path)
+    return problems
+
+
+def verify_shot(json_path, min_cache_size=MIN_CACHE_SIZE, min_shader_size=MIN_SHADER_SIZE):
+    start = time.time()
+    report = {"json_path": json_path, "scene_path": None, "status": PASS,
+              "problems": [], "warnings": [], "assets": {}}
+    try:
+        with open(json_path, "r") as f:
+            data = json.load(f)
+        file_info = data["File_info"]
+        assets = data["Cache_shader_info"]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        report["problems"].append("unreadable scene_lit.json: %s" % e)
+        report["status"] = FAIL
+        report["seconds"] = round(time.time() - start, 3)
+        return report
+
+    scene_path = file_info.get("scene_path")
+    report["scene_path"] = scene_path
+    scene_stat = stat_or_none(scene_path)
+    if scene_stat is None:
+        report["warnings"].append("source scene not found, timestamps not checked: %s" % scene_path)
+    scene_mtime = scene_stat.st_mtime if scene_stat else None
+    scene_dir = os.path.dirname(scene_path or json_path)
+    failed = (file_info.get("cache_export") or {}).get("failed") or {}
+
+    for name, entry in sorted(assets.items()):
+        problems = check_cache(entry, scene_mtime, min_cache_size)
+        if entry.get("cache_file_path") in failed and entry.get("cache_status") != "error":
+            problems.insert(0, "export failed: %s" % failed[entry["cache_file_path"]])
+        if not entry.get("cache_set"):
+            report["warnings"].append("%s: no cache set, nothing was exported" % name)
+
+        # Shaders are exported from the asset file, not the shot
+        source = stat_or_none(resolve_reference(entry["ref_file"], scene_dir)) if entry.get("ref_file") else None
+        problems += check_shader(entry, source.st_mtime if source else None, min_shader_size)
+        report["assets"][name] = {"status": FAIL if problems else PASS, "problems": problems}
+
+    if report["problems"] or any(asset["status"] == FAIL for asset in report["assets"].values()):
+        report["status"] = FAIL
+    report["seconds"] = round(time.time() - start, 3)
+    return report
+
+
+def find_scene_lits(inputs):
+    paths = []
+    for value in inputs:
+        if os.path.isdir(value):
+            paths += sorted(entry.path for entry in iter_project_files(value) if entry.name == SCENE_LIT)
+        else:
+            paths.append(value)
+    return paths
+
+
+def verify_shots(json_paths, workers=None, min_cache_size=MIN_CACHE_SIZE, min_shader_size=MIN_SHADER_SIZE):
+    start = time.time()
+    json_paths = list(json_paths)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(json_paths) or 1))
+    args = (json_paths, [min_cache_size] * len(json_paths), [min_shader_size] * len(json_paths))
+    if workers == 1:
+        shots = list(map(verify_shot, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            shots = list(executor.map(verify_shot, *args, chunksize=max(1, len(json_paths) // (workers * 4))))
+    return {
+        "shots": shots,
+        "summary": {status: sum(1 for shot in shots if shot["status"] == status) for status in (PASS, FAIL)},
+        "workers": workers,
+        "seconds": round(time.time() - start, 3),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Verify the caches and shader files named in scene_lit.json files.")
+    parser.add_argument("inputs", nargs="+", help="Project folders or scene_lit.json files")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Processes (default: CPU count)")
+    parser.add_argument("--min-cache-size", type=int, default=MIN_CACHE_SIZE, help="Smallest valid .abc in bytes")
+    parser.add_argument("--min-shader-size", type=int, default=MIN_SHADER_SIZE,
+                        help="Smallest valid shader file in bytes")
+    parser.add_argument("--failed-only", action="store_true", help="Only list shots that failed")
+    parser.add_argument("--output", help="Also write the report to this file")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    report = verify_shots(find_scene_lits(args.inputs), args.workers, args.min_cache_size, args.min_shader_size)
+    if args.failed_only:
+        report["shots"] = [shot for shot in report["shots"] if shot["status"] == FAIL]
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    print(json.dumps(report, indent=4))
+    return 1 if report["summary"][FAIL] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+import os
+import sys
+import json
+import queue
+import subprocess
+import threading
+import time
+
+from batch_runner import (
+    JobResult,
+    by_priority,
+    check_up_to_date,
+    finish_build,
+    get_maya_version,
+    job_done_event,
+    job_environment,
+    maya_environment,
+    mayapy_executable,
+    print_summary,
+    start_events
+)
+from metrics_report import new_batch_metrics_path, summarize
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKER_SCRIPT = os.path.join(BASE_DIR, "script", "maya_worker.py")
+WORKER_TASKS = ("cache", "shader", "build")
+MAX_MEMORY_ENV = "MAYA_PIPELINE_WORKER_MAX_MEMORY_MB"
+
+
+class WorkerError(RuntimeError):
+    pass
+
+
+def default_max_memory_mb():
+    # Memory ceiling for warm workers when none is given (the GUI has no field for it)
+    try:
+        return int(os.environ.get(MAX_MEMORY_ENV) or 0) or None
+    except ValueError:
+        print("Ignoring invalid %s: %s" % (MAX_MEMORY_ENV, os.environ[MAX_MEMORY_ENV]))
+        return None
+
+
+class WorkerProcess:
+    def __init__(self, command, env=None):
+        self.command = command
+        self.jobs_done = 0
+        self.memory_mb = None
+        self._next_id = 0
+        self.process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            bufsize=1,
+            env=dict(os.environ, **(env or {})),
+        )
+        ready = self._read_message()
+        self.pid = ready.get("pid")
+        self.memory_mb = ready.get("memory_mb")
+
+    def _read_message(self):
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                raise WorkerError(f"Worker exited with code {self.process.poll()}")
+            try:
+                return json.loads(line)
+            except ValueError:
+                # Anything that isn't a protocol line is passed through as log output
+                print(line.rstrip())
+
+    def send(self, task, path, env=None, timeout=None):
+        self._next_id += 1
+        job = {"id": self._next_id, "task": task, "path": path, "env": env or {}}
+        try:
+            self.process.stdin.write(json.dumps(job) + "\n")
+            self.process.stdin.flush()
+        except OSError as e:
+            raise WorkerError(f"Worker pipe closed: {e}")
+
+        # A hung worker is killed, which ends the read below with a WorkerError
+        timer = threading.Timer(timeout, self.process.kill) if timeout else None
+        if timer:
+            timer.daemon = True
+            timer.start()
+        try:
+            response = self._read_message()
+        except WorkerError:
+            if timer and not timer.is_alive():
+                raise WorkerError(f"Worker killed after {timeout}s timeout")
+            raise
+        finally:
+            if timer:
+                timer.cancel()
+        self.jobs_done += 1
+        self.memory_mb = response.get("memory_mb")
+        return response
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def shutdown(self, timeout=30):
+        if self.is_alive():
+            try:
+                self.process.stdin.write(json.dumps({"task": "shutdown"}) + "\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout=timeout)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+
+
+class WorkerPool:
+    def __init__(self, size=1, max_jobs_per_worker=20, max_memory_mb=None,
+                 command_resolver=None, version_resolver=get_maya_version, force=False,
+                 event_callback=None, job_timeout=None):
+        self.force = force
+        self.job_timeout = job_timeout
+        self.event_callback = event_callback
+        self.size = max(1, size)
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_memory_mb = max_memory_mb or default_max_memory_mb()
+        self.command_resolver = command_resolver or self.maya_worker_command
+        self.version_resolver = version_resolver
+        self._lock = threading.Lock()
+        self._idle = {}
+        self.metrics_path = None
+        self.report = None
+
+    @staticmethod
+    def maya_worker_command(year):
+        return [mayapy_executable(year), WORKER_SCRIPT]
+
+    def log(self, *args):
+        with self._lock:
+            print(*args)
+            sys.stdout.flush()
+
+    def acquire(self, year):
+        with self._lock:
+            idle = self._idle.get(year, [])
+            while idle:
+                worker = idle.pop()
+                if worker.is_alive():
+                    return worker
+        return None
+
+    def release(self, year, worker):
+        with self._lock:
+            self._idle.setdefault(year, []).append(worker)
+
+    def close(self):
+        with self._lock:
+            workers = [worker for idle in self._idle.values() for worker in idle]
+            self._idle = {}
+        self.metrics_path = None
+        self.report = None
+        for worker in workers:
+            worker.shutdown()
+
+    def needs_recycle(self, worker):
+        if self.max_jobs_per_worker and worker.jobs_done >= self.max_jobs_per_worker:
+            return True
+        if self.max_memory_mb and worker.memory_mb and worker.memory_mb >= self.max_memory_mb:
+            return True
+        return False
+
+    def run(self, jobs):
+        jobs = list(jobs)
+        total = len(jobs)
+        results = [None] * total
+
+        # One queue per Maya version: a worker only ever runs scenes of its own version
+        by_version = {}
+        for idx, job in by_priority(jobs):
+            task = job.task
+            if task not in WORKER_TASKS:
+                results[idx] = JobResult(job.file_path, JobResult.SKIPPED,
+                                         message=f"no worker task for {job.script_path}")
+                continue
+            year = self.version_resolver(job.file_path)
+            if not year:
+                results[idx] = JobResult(job.file_path, JobResult.SKIPPED, message="version not found")
+                continue
+            by_version.setdefault(year, queue.Queue()).put((idx, task, job))
+
+        self.metrics_path = new_batch_metrics_path()
+
+        self.log(f"Starting worker pool for {total} file(s) with {self.size} worker(s) per version...\n")
+        events = start_events(self.event_callback, total, self.size * max(1, len(by_version)))
+        events_address = events.address if events else None
+        for idx, job in enumerate(jobs):
+            job_done_event(events, job, results[idx])
+
+        def drain(year, pending):
+            worker = self.acquire(year)
+            while True:
+                try:
+                    idx, task, job = pending.get_nowait()
+                except queue.Empty:
+                    break
+
+                skipped, record = check_up_to_date(job, self.force)
+                if skipped:
+                    results[idx] = skipped
+                    job_done_event(events, job, skipped)
+                    self.log(f"   Skipping ({skipped.message}): {job.file_path}\n")
+                    continue
+
+                start = time.time()
+                try:
+                    if worker is None or not worker.is_alive():
+                        worker = WorkerProcess(self.command_resolver(year), maya_environment(year))
+                        self.log(f"  Started Maya {year} worker (pid {worker.pid})")
+                    self.log(f"[{idx + 1}/{total}] Processing: {job.file_path}")
+                    env = job_environment(job, self.metrics_path, events_address)
+                    response = worker.send(task, job.file_path, env, timeout=self.job_timeout)
+                except (OSError, WorkerError) as e:
+                    results[idx] = JobResult(job.file_path, JobResult.FAILED, message=str(e),
+                                             duration=time.time() - start)
+                    job_done_event(events, job, results[idx])
+                    worker = None
+                    continue
+
+                ok = response.get("status") == "ok"
+                results[idx] = JobResult(job.file_path, JobResult.OK if ok else JobResult.FAILED,
+                                         exit_code=0 if ok else 1, message=response.get("message", ""),
+                                         duration=time.time() - start)
+                finish_build(job, record, results[idx])
+                job_done_event(events, job, results[idx])
+                self.log(f"  Finished ({results[idx].status}): {job.file_path}\n")
+
+                if self.needs_recycle(worker):
+                    self.log(f"  Recycling worker (pid {worker.pid}) after {worker.jobs_done} job(s), "
+                             f"{worker.memory_mb} MB")
+                    worker.shutdown()
+                    worker = None
+
+            # Idle workers stay warm for the next run() until close() is called
+            if worker is not None:
+                self.release(year, worker)
+
+        threads = []
+        for year, pending in by_version.items():
+            for _ in range(min(self.size, pending.qsize())):
+                thread = threading.Thread(target=drain, args=(year, pending), daemon=True)
+                thread.start()
+                threads.append(thread)
+        for thread in threads:
+            thread.join()
+        if events:
+            events.close()
+
+        print_summary(results, self.log)
+        self.report = summarize(self.metrics_path, self.log)
+        return results